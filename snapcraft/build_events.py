@@ -0,0 +1,282 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Progress events streamed from a build instance to the host.
+
+The snapcraft process running in a build instance appends events, one JSON
+object per line, to the file named by SNAPCRAFT_EVENTS_FILE. The file lives
+in the mounted project directory, so the host can follow it while the build
+runs. Unlike a socket, this works with every provider mount.
+"""
+
+import contextlib
+import dataclasses
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+EVENTS_FILE_ENV = "SNAPCRAFT_EVENTS_FILE"
+
+STEP_STARTED = "step-started"
+STEP_FINISHED = "step-finished"
+LOG = "log"
+
+
+@dataclasses.dataclass(frozen=True)
+class ProgressEvent:
+    """An event in the build of a project.
+
+    :param event: The event type, one of STEP_STARTED, STEP_FINISHED or LOG.
+    :param timestamp: When the event happened, in seconds since the epoch.
+    :param part: The part the step is run for.
+    :param step: The name of the lifecycle step.
+    :param duration: The time it took to run the step, in seconds.
+    :param bytes_fetched: The bytes received from the network while the step ran.
+    :param level: The level of the log record.
+    :param message: The log message.
+    """
+
+    event: str
+    timestamp: float = dataclasses.field(default_factory=time.time)
+    part: Optional[str] = None
+    step: Optional[str] = None
+    duration: Optional[float] = None
+    bytes_fetched: Optional[int] = None
+    level: Optional[str] = None
+    message: Optional[str] = None
+
+    def marshal(self) -> Dict[str, Any]:
+        """Create a dictionary with the set fields of the event."""
+        return {
+            key: value
+            for key, value in dataclasses.asdict(self).items()
+            if value is not None
+        }
+
+    @classmethod
+    def unmarshal(cls, data: Dict[str, Any]) -> "ProgressEvent":
+        """Create an event from a dictionary, ignoring unknown fields."""
+        names = {field.name for field in dataclasses.fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+
+class EventWriter:
+    """Append events to an events file.
+
+    :param path: The events file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # kept open to append events as they happen, closed in close()
+        self._file = open(  # noqa: SIM115 pylint: disable=consider-using-with
+            path, "a", encoding="utf-8"
+        )
+        self._lock = threading.Lock()
+
+    def write(self, event: ProgressEvent) -> None:
+        """Write an event, making it visible to readers right away."""
+        line = json.dumps(event.marshal()) + "\n"
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+                self._file.flush()
+
+    def close(self) -> None:
+        """Close the events file."""
+        with self._lock:
+            self._file.close()
+
+
+def get_writer() -> Optional[EventWriter]:
+    """Get a writer for the events file requested by the host, if any."""
+    events_file = os.getenv(EVENTS_FILE_ENV)
+    if not events_file:
+        return None
+    return EventWriter(Path(events_file))
+
+
+class EventLogHandler(logging.Handler):
+    """A logging handler that writes log records as events.
+
+    :param writer: The writer to send the records to.
+    """
+
+    def __init__(self, writer: EventWriter, level: int = logging.INFO) -> None:
+        super().__init__(level)
+        self._writer = writer
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Write the log record as an event."""
+        try:
+            self._writer.write(
+                ProgressEvent(
+                    event=LOG,
+                    timestamp=record.created,
+                    level=record.levelname,
+                    message=self.format(record),
+                )
+            )
+        except Exception:  # pylint: disable=broad-except
+            self.handleError(record)
+
+
+@contextlib.contextmanager
+def open_writer() -> Iterator[Optional[EventWriter]]:
+    """Write log records as events while the context is active.
+
+    :return: The writer for the events file requested by the host, or None
+        if no events were requested.
+    """
+    writer = get_writer()
+    if writer is None:
+        yield None
+        return
+
+    handler = EventLogHandler(writer)
+    logger = logging.getLogger()
+    logger.addHandler(handler)
+    try:
+        yield writer
+    finally:
+        logger.removeHandler(handler)
+        writer.close()
+
+
+class EventMonitor:
+    """Follow an events file while it is written.
+
+    The callback is run from a background thread for each event. It must not
+    use the emitter while the terminal is paused.
+
+    :param path: The events file, it is truncated on start.
+    :param callback: Function to run for each event.
+    :param interval: Seconds to wait between reads of the file.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        callback: Optional[Callable[[ProgressEvent], None]] = None,
+        interval: float = 0.2,
+    ) -> None:
+        self.path = path
+        self.events: List[ProgressEvent] = []
+        self._callback = callback
+        self._interval = interval
+        self._offset = 0
+        self._buffer = b""
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "EventMonitor":
+        """Start following the events file."""
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop following the events file."""
+        self.stop()
+
+    def start(self) -> None:
+        """Create an empty events file and start following it."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_bytes(b"")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Read the remaining events and remove the events file."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self._read()
+        self.path.unlink(missing_ok=True)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            self._read()
+
+    def _read(self) -> None:
+        try:
+            with open(self.path, "rb") as events_file:
+                events_file.seek(self._offset)
+                data = events_file.read()
+        except FileNotFoundError:
+            return
+
+        self._offset += len(data)
+        *lines, self._buffer = (self._buffer + data).split(b"\n")
+        for line in lines:
+            try:
+                event = ProgressEvent.unmarshal(json.loads(line))
+            except (ValueError, TypeError):
+                continue
+            self.events.append(event)
+            if self._callback:
+                self._callback(event)
+
+
+def get_received_bytes() -> Optional[int]:
+    """Get the bytes received by the network interfaces, except loopback.
+
+    In a build instance, this counts what the build has downloaded.
+
+    :return: The bytes received since the interfaces came up, or None if the
+        counters are not available.
+    """
+    try:
+        with open("/proc/net/dev", encoding="utf-8") as dev_file:
+            # two header lines, then "<interface>: <rx bytes> ..." lines
+            lines = dev_file.readlines()[2:]
+    except OSError:
+        return None
+
+    received = 0
+    for line in lines:
+        interface, _, counters = line.partition(":")
+        if interface.strip() != "lo" and counters.split():
+            received += int(counters.split()[0])
+    return received
+
+
+def get_timing_report(events: List[ProgressEvent]) -> List[str]:
+    """Summarize the steps run in a build.
+
+    :param events: The events of the build.
+
+    :return: A line for each step run and a line with the total time.
+    """
+    lines = []
+    total = 0.0
+    for event in events:
+        if event.event != STEP_FINISHED or event.duration is None:
+            continue
+        total += event.duration
+        line = f"{event.step} {event.part}: {event.duration:.1f}s"
+        if event.bytes_fetched:
+            line += f", {event.bytes_fetched / 1024 / 1024:.1f} MiB fetched"
+        lines.append(line)
+
+    if lines:
+        lines.append(f"Total: {total:.1f}s")
+    return lines
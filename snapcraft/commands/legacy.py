@@ -163,13 +163,22 @@ class StoreLegacyMetricsCommand(LegacyBaseCommand):
     help_msg = "Get metrics for a snap"
     overview = textwrap.dedent(
         """
-        Get different metrics from the Snap Store for a given snap."""
+        Get different metrics from the Snap Store for a given snap.
+
+        The csv and ndjson formats export one row per snap, metric, series
+        and date, and accept several snaps and metric names."""
     )
 
     @overrides
     def fill_parser(self, parser: "argparse.ArgumentParser") -> None:
-        parser.add_argument("snap_name", metavar="snap-name")
-        parser.add_argument("--name", metavar="name", required=True, help="metric name")
+        parser.add_argument("snap_name", metavar="snap-name", nargs="+")
+        parser.add_argument(
+            "--name",
+            metavar="name",
+            required=True,
+            action="append",
+            help="metric name, can be repeated when exporting",
+        )
         parser.add_argument(
             "--start",
             metavar="start-date",
@@ -184,7 +193,7 @@ class StoreLegacyMetricsCommand(LegacyBaseCommand):
             "--format",
             metavar="format",
             help="format for output",
-            choices=["table", "json"],
+            choices=["table", "json", "csv", "ndjson"],
             required=True,
         )
 
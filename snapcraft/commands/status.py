@@ -19,7 +19,17 @@ import itertools
 import operator
 import textwrap
 from collections import OrderedDict
-from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Set, Tuple, cast
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    cast,
+)
 
 from craft_cli import BaseCommand, emit
 from overrides import overrides
@@ -453,14 +463,15 @@ class StoreListRevisionsCommand(BaseCommand):
             snap_name=parsed_args.snap_name
         )
 
+        if releases.releases:
+            channels_for_revisions = _get_channels_for_revisions(releases)
+
         parsed_revisions = []
         for rev in releases.revisions:
             if parsed_args.arch and parsed_args.arch not in rev.architectures:
                 continue
             if releases.releases:
-                channels_for_revision = self._get_channels_for_revision(
-                    releases, rev.revision
-                )
+                channels_for_revision = channels_for_revisions.get(rev.revision)
                 if channels_for_revision:
                     channels = ",".join(channels_for_revision)
                 else:
@@ -489,46 +500,86 @@ class StoreListRevisionsCommand(BaseCommand):
         else:
             headers = ["Rev.", "Uploaded", "Arches", "Version"]
 
-        tabulated_revisions = tabulate(
-            parsed_revisions,
-            numalign="left",
-            headers=headers,
-            tablefmt="plain",
-        )
-
-        emit.message(tabulated_revisions)
-
-    def _get_channels_for_revision(self, releases, revision: int) -> List[str]:
-        # channels: the set of channels revision was released to, active or not.
-        channels: Set[str] = set()
-        # seen_channel: applies to channels regardless of revision.
-        # The first channel that shows up for each architecture is to
-        # be marked as the active channel, all others are historic.
-        seen_channel: Dict[str, Set[str]] = {}
-
-        for release in releases.releases:
-            if release.architecture not in seen_channel:
-                seen_channel[release.architecture] = set()
-
-            # If the revision is in this release entry and was not seen
-            # before it means that this channel is active and needs to
-            # be represented with a *.
-            if (
-                release.revision == revision
-                and release.channel not in seen_channel[release.architecture]
-            ):
-                channels.add(f"{release.channel}*")
-            # All other releases found for a revision are inactive.
-            elif (
-                release.revision == revision
-                and release.channel not in channels
-                and f"{release.channel}*" not in channels
-            ):
-                channels.add(release.channel)
-
-            seen_channel[release.architecture].add(release.channel)
-
-        return sorted(list(channels))
+        # Emit the table one page at a time so the first revisions show up
+        # before the whole table is formatted.
+        for page in _get_paginated_table(
+            parsed_revisions, headers=headers, page_size=_REVISIONS_PAGE_SIZE
+        ):
+            emit.message(page)
+
+
+_REVISIONS_PAGE_SIZE: Final[int] = 500
+
+
+def _get_channels_for_revisions(releases) -> Dict[int, List[str]]:
+    """Return the channels each revision was released to, active or not.
+
+    Active channels are marked with a trailing *. The release history is only
+    walked once, regardless of the number of revisions.
+    """
+    # channels: the set of channels each revision was released to.
+    channels: Dict[int, Set[str]] = {}
+    # seen_channel: applies to channels regardless of revision.
+    # The first channel that shows up for each architecture is to
+    # be marked as the active channel, all others are historic.
+    seen_channel: Dict[str, Set[str]] = {}
+
+    for release in releases.releases:
+        seen_for_architecture = seen_channel.setdefault(release.architecture, set())
+        revision_channels = channels.setdefault(release.revision, set())
+
+        # If the revision is in this release entry and was not seen
+        # before it means that this channel is active and needs to
+        # be represented with a *.
+        if release.channel not in seen_for_architecture:
+            revision_channels.add(f"{release.channel}*")
+        # All other releases found for a revision are inactive.
+        elif (
+            release.channel not in revision_channels
+            and f"{release.channel}*" not in revision_channels
+        ):
+            revision_channels.add(release.channel)
+
+        seen_for_architecture.add(release.channel)
+
+    return {
+        revision: sorted(revision_channels)
+        for revision, revision_channels in channels.items()
+    }
+
+
+def _get_paginated_table(
+    rows: Sequence[Sequence[Optional[str]]], *, headers: Sequence[str], page_size: int
+) -> Iterator[str]:
+    """Yield pages of a plain table with columns aligned across all pages.
+
+    The layout matches the "plain" format from tabulate, column widths are
+    computed upfront in a single pass over the cells so that each page can
+    be formatted and yielded on its own.
+    """
+    cells = [
+        ["" if cell is None else str(cell).strip() for cell in row] for row in rows
+    ]
+    # Headers are padded by two, as done by tabulate.
+    widths = [len(header) + 2 for header in headers]
+    for row in cells:
+        for column, cell in enumerate(row):
+            widths[column] = max(widths[column], len(cell))
+
+    def _format_line(line: Sequence[str]) -> str:
+        return "  ".join(
+            cell.ljust(width) for cell, width in zip(line, widths)
+        ).rstrip()
+
+    page = [_format_line(headers)]
+    for row in cells:
+        page.append(_format_line(row))
+        if len(page) >= page_size:
+            yield "\n".join(page)
+            page = []
+
+    if page:
+        yield "\n".join(page)
 
 
 class StoreRevisionsCommand(StoreListRevisionsCommand):
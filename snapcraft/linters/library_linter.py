@@ -25,6 +25,7 @@ from overrides import overrides
 
 from snapcraft.elf import ElfFile, SonameCache, elf_utils
 from snapcraft.elf import errors as elf_errors
+from snapcraft_legacy.internal.repo import dpkg_db
 
 from .base import Linter, LinterIssue, LinterResult, Optional
 
@@ -139,22 +140,12 @@ class LibraryLinter(Linter):
         is not provided by any system package.
         """
         if library_name in self._ld_config_cache:
-            # Must be resolved to an absolute path for dpkg to find it
+            # Must be resolved to an absolute path to be found in the dpkg
+            # database
             library_absolute_path = self._ld_config_cache[library_name].resolve()
-            try:
-                output = subprocess.run(
-                    ["dpkg", "-S", library_absolute_path.as_posix()],
-                    check=True,
-                    stdout=subprocess.PIPE,
-                )
-            except subprocess.CalledProcessError:
-                # If the specified file doesn't belong to any package, the
-                # call will trigger an exception.
-                return None
-            except FileNotFoundError:
-                # In case that dpkg isn't available
-                return None
-            return output.stdout.decode("UTF-8").split(":", maxsplit=1)[0]
+            return dpkg_db.get_database().get_package_for_path(
+                library_absolute_path.as_posix()
+            )
         return None
 
     def _check_dependencies_satisfied(
@@ -16,20 +16,30 @@
 
 """Parts lifecycle preparation and execution."""
 
+import contextlib
 import copy
 import os
 import shutil
 import subprocess
 from datetime import datetime
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 import craft_parts
 from craft_cli import emit
 from craft_parts import ProjectInfo, Step, StepInfo, callbacks
 from craft_providers import Executor
 
-from snapcraft import errors, linters, pack, providers, ua_manager, utils
+from snapcraft import (
+    build_events,
+    errors,
+    linters,
+    pack,
+    providers,
+    shared_cache,
+    ua_manager,
+    utils,
+)
 from snapcraft.elf import Patcher, SonameCache, elf_utils
 from snapcraft.elf import errors as elf_errors
 from snapcraft.linters import LinterStatus
@@ -372,6 +382,22 @@ def _clean_provider(project: Project, parsed_args: "argparse.Namespace") -> None
     emit.progress("Cleaned build provider", permanent=True)
 
 
+def _prepare_shared_cache() -> Optional[Path]:
+    """Get the shared cache directory to mount, evicted to its maximum size.
+
+    :returns: The host shared cache directory, None if it is not enabled.
+    """
+    if not shared_cache.is_enabled():
+        return None
+
+    shared_cache_dir = shared_cache.get_host_cache_dir()
+    max_cache_size = shared_cache.get_max_size()
+    if max_cache_size is not None:
+        with shared_cache.lock(shared_cache_dir):
+            shared_cache.evict(shared_cache_dir, max_cache_size)
+    return shared_cache_dir
+
+
 # pylint: disable-next=too-many-branches, too-many-statements
 def _run_in_provider(  # noqa PLR0915
     project: Project, command_name: str, parsed_args: "argparse.Namespace"
@@ -381,6 +407,9 @@ def _run_in_provider(  # noqa PLR0915
     provider_name = "lxd" if parsed_args.use_lxd else None
     provider = providers.get_provider(provider_name)
     providers.ensure_provider_is_available(provider)
+    base_instance_pool = providers.BaseInstancePool.from_environment()
+
+    shared_cache_dir = _prepare_shared_cache()
 
     cmd = ["snapcraft", command_name]
 
@@ -420,7 +449,6 @@ def _run_in_provider(  # noqa PLR0915
         cmd.append("--enable-experimental-plugins")
 
     project_path = Path().absolute()
-    output_dir = utils.get_managed_environment_project_path()
 
     instance_name = providers.get_instance_name(
         project_name=project.name,
@@ -461,12 +489,21 @@ def _run_in_provider(  # noqa PLR0915
                 instance=instance,
                 host_project_path=project_path,
                 bind_ssh=parsed_args.bind_ssh,
+                shared_cache_dir=shared_cache_dir,
+            )
+            if command_name == "try":
+                _expose_prime(project_path, instance)
+            _execute_in_instance(
+                instance,
+                cmd,
+                instance_name=instance_name,
+                project_path=project_path,
+                interactive=bool(
+                    parsed_args.debug
+                    or getattr(parsed_args, "shell", False)
+                    or getattr(parsed_args, "shell_after", False)
+                ),
             )
-            with emit.pause():
-                if command_name == "try":
-                    _expose_prime(project_path, instance)
-                # run snapcraft inside the instance
-                instance.execute_run(cmd, check=True, cwd=output_dir)
         except subprocess.CalledProcessError as err:
             raise errors.SnapcraftError(
                 f"Failed to execute {command_name} in instance.",
@@ -479,6 +516,88 @@ def _run_in_provider(  # noqa PLR0915
         finally:
             providers.capture_logs_from_instance(instance)
 
+    providers.prune_base_instances(provider, base_instance_pool)
+    providers.warm_base_instances(
+        provider,
+        base_instance_pool,
+        project_path=project_path,
+        http_proxy=parsed_args.http_proxy,
+        https_proxy=parsed_args.https_proxy,
+    )
+
+
+def _execute_in_instance(
+    instance: Executor,
+    cmd: List[str],
+    *,
+    instance_name: str,
+    project_path: Path,
+    interactive: bool,
+) -> None:
+    """Run snapcraft in the instance, following the events of its build.
+
+    The output of the build is streamed through the emitter, unless the build
+    may open a shell, in which case the terminal is handed over to it.
+
+    :param instance: The instance to run snapcraft in.
+    :param cmd: The snapcraft command to run.
+    :param instance_name: The name of the instance.
+    :param project_path: The project directory on the host.
+    :param interactive: Whether the build may open a shell in the instance.
+    """
+    output_dir = utils.get_managed_environment_project_path()
+    # events are streamed through a file in the mounted project
+    events_file = Path(".snapcraft", f"events-{instance_name}.jsonl")
+    env: Dict[str, Optional[str]] = {
+        build_events.EVENTS_FILE_ENV: str(output_dir / events_file)
+    }
+
+    if interactive:
+        # the monitor must not use the emitter while it is paused
+        event_monitor = build_events.EventMonitor(project_path / events_file)
+    else:
+        event_monitor = build_events.EventMonitor(
+            project_path / events_file, callback=_emit_build_event
+        )
+
+    try:
+        if interactive:
+            with emit.pause(), event_monitor:
+                instance.execute_run(cmd, check=True, cwd=output_dir, env=env)
+        else:
+            with event_monitor, emit.open_stream() as stream:
+                instance.execute_run(
+                    cmd,
+                    check=True,
+                    cwd=output_dir,
+                    env=env,
+                    stdout=stream,
+                    stderr=stream,
+                )
+    finally:
+        _report_build_events(event_monitor.events)
+        with contextlib.suppress(OSError):
+            (project_path / events_file.parent).rmdir()
+
+
+def _emit_build_event(event: build_events.ProgressEvent) -> None:
+    """Show the progress of the build in the instance."""
+    if event.event == build_events.STEP_STARTED:
+        emit.progress(f"Running {event.step} for {event.part}")
+    elif event.event == build_events.STEP_FINISHED and event.duration is not None:
+        emit.debug(f"Ran {event.step} for {event.part} in {event.duration:.1f}s")
+    elif event.event == build_events.LOG:
+        emit.debug(f"{event.message}")
+
+
+def _report_build_events(events: List[build_events.ProgressEvent]) -> None:
+    """Log the time taken by each step run in the instance."""
+    report = build_events.get_timing_report(events)
+    if report:
+        emit.debug("Build timing in instance:")
+    for line in report:
+        emit.debug(f"  {line}")
+
 
 def _expose_prime(project_path: Path, instance: Executor):
     """Expose the instance's prime directory in ``project_path`` on the host."""
@@ -16,21 +16,29 @@
 
 """Craft-parts lifecycle wrapper."""
 
+import contextlib
 import pathlib
 import subprocess
+import time
 import types
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, ContextManager, Dict, List, Optional, Set
 
 import craft_parts
 from craft_archives import repo
 from craft_cli import emit
 from craft_parts import Action, ActionType, Part, ProjectDirs, Step
+from craft_parts.executor import ExecutionContext
 from craft_parts.packages import Repository
 from xdg import BaseDirectory  # type: ignore
 
-from snapcraft import errors
+from snapcraft import build_events, errors, shared_cache
 from snapcraft.meta import ExtractedMetadata, extract_metadata
-from snapcraft.utils import convert_architecture_deb_to_platform, get_host_architecture
+from snapcraft.utils import (
+    convert_architecture_deb_to_platform,
+    get_host_architecture,
+    get_managed_environment_shared_cache_path,
+    is_managed_mode,
+)
 
 _LIFECYCLE_STEPS = {
     "pull": Step.PULL,
@@ -84,7 +92,13 @@ class PartsLifecycle:
         emit.progress("Initializing parts lifecycle")
 
         # set the cache dir for parts package management
-        cache_dir = BaseDirectory.save_cache_path("snapcraft")
+        self._shared_cache_dir: Optional[pathlib.Path] = None
+        if is_managed_mode() and shared_cache.is_enabled():
+            self._shared_cache_dir = get_managed_environment_shared_cache_path()
+            cache_dir = str(self._shared_cache_dir)
+        else:
+            cache_dir = BaseDirectory.save_cache_path("snapcraft")
+        self._cache_dir = pathlib.Path(cache_dir)
 
         if target_arch == "all":
             target_arch = get_host_architecture()
@@ -172,22 +186,23 @@ class PartsLifecycle:
 
             self._install_package_repositories()
 
-            with self._lcm.action_executor() as aex:
-                for action in actions:
-                    # Workaround until canonical/craft-parts#540 is fixed
-                    if action.step == target_step and rerun_step:
-                        action = craft_parts.Action(  # noqa PLW2901
-                            part_name=action.part_name,
-                            step=action.step,
-                            action_type=ActionType.RERUN,
-                            reason="forced rerun",
-                            project_vars=action.project_vars,
-                            properties=action.properties,
-                        )
-                    message = _get_parts_action_message(action)
-                    emit.progress(message)
-                    with emit.open_stream() as stream:
-                        aex.execute(action, stdout=stream, stderr=stream)
+            with build_events.open_writer() as events:
+                with self._lcm.action_executor() as aex:
+                    for action in actions:
+                        # Workaround until canonical/craft-parts#540 is fixed
+                        if action.step == target_step and rerun_step:
+                            action = craft_parts.Action(  # noqa PLW2901
+                                part_name=action.part_name,
+                                step=action.step,
+                                action_type=ActionType.RERUN,
+                                reason="forced rerun",
+                                project_vars=action.project_vars,
+                                properties=action.properties,
+                            )
+                        message = _get_parts_action_message(action)
+                        emit.progress(message)
+                        with self._lock_cache(action), emit.open_stream() as stream:
+                            self._execute_action(aex, action, stream, events)
 
             if shell_after:
                 launch_shell()
@@ -202,6 +217,49 @@ class PartsLifecycle:
         except Exception as err:
             raise errors.PartsLifecycleError(str(err)) from err
 
+    def _execute_action(
+        self,
+        aex: ExecutionContext,
+        action: Action,
+        stream: Any,
+        events: Optional[build_events.EventWriter],
+    ) -> None:
+        """Execute an action, reporting its progress to the events writer."""
+        if events is None or action.action_type == ActionType.SKIP:
+            aex.execute(action, stdout=stream, stderr=stream)
+            return
+
+        step_name = action.step.name.lower()
+        events.write(
+            build_events.ProgressEvent(
+                event=build_events.STEP_STARTED,
+                part=action.part_name,
+                step=step_name,
+            )
+        )
+        received_bytes = (
+            build_events.get_received_bytes() if action.step == Step.PULL else None
+        )
+        start_time = time.monotonic()
+
+        aex.execute(action, stdout=stream, stderr=stream)
+
+        events.write(
+            build_events.ProgressEvent(
+                event=build_events.STEP_FINISHED,
+                part=action.part_name,
+                step=step_name,
+                duration=time.monotonic() - start_time,
+                bytes_fetched=_get_bytes_fetched(received_bytes),
+            )
+        )
+
+    def _lock_cache(self, action: Action) -> ContextManager[None]:
+        """Keep the shared cache from being evicted while the action uses it."""
+        if self._shared_cache_dir and action.step == Step.PULL:
+            return shared_cache.lock(self._shared_cache_dir, shared=True)
+        return contextlib.nullcontext()
+
     def _install_package_repositories(self) -> None:
         if not self._package_repositories:
             return
@@ -346,3 +404,13 @@ def _get_parts_action_message(action: Action) -> str:
     if action.reason:
         return message + f" ({action.reason})"
     return message
+
+
+def _get_bytes_fetched(received_bytes: Optional[int]) -> Optional[int]:
+    """Get the bytes received from the network since received_bytes."""
+    if received_bytes is None:
+        return None
+    new_received_bytes = build_events.get_received_bytes()
+    if new_received_bytes is None:
+        return None
+    return max(new_received_bytes - received_bytes, 0)
@@ -17,11 +17,13 @@
 """A base class for ROS plugins."""
 
 import abc
+import json
 import os
 import pathlib
 import re
 import subprocess
 import sys
+import tempfile
 from pathlib import Path
 from typing import Dict, Iterable, List, Set, cast
 
@@ -81,6 +83,108 @@ def _parse_rosdep_resolve_dependencies(
     return dependencies
 
 
+_ROSDEP_KEY_PATTERN = re.compile(r"^#ROSDEP\[(?P<key>.*)\]$", re.MULTILINE)
+
+
+def _parse_rosdep_resolve_batch(
+    dependency_names: List[str], output: str
+) -> Dict[str, Dict[str, Set[str]]]:
+    # When resolving more than one dependency, rosdep precedes the output of
+    # each one with a #ROSDEP[<dependency>] line.
+    if len(dependency_names) == 1:
+        return {
+            dependency_names[0]: _parse_rosdep_resolve_dependencies(
+                dependency_names[0], output
+            )
+        }
+
+    sections = _ROSDEP_KEY_PATTERN.split(output)
+    if sections[0].strip():
+        raise RosdepUnexpectedResultError(" ".join(dependency_names), output)
+
+    # sections alternate between the dependency name and its output.
+    names = sections[1::2]
+    if sorted(names) != sorted(dependency_names):
+        raise RosdepUnexpectedResultError(" ".join(dependency_names), output)
+
+    return {
+        name: _parse_rosdep_resolve_dependencies(name, section.strip())
+        for name, section in zip(names, sections[2::2])
+    }
+
+
+def _get_rosdep_cache_path(
+    cache_dir: Path, *, ros_distro: str, base: str, target_arch: str
+) -> Path:
+    return cache_dir / "rosdep" / f"{ros_distro}_{base}_{target_arch}.json"
+
+
+def resolve_dependencies(
+    dependency_names: Iterable[str],
+    *,
+    ros_distro: str,
+    base: str,
+    target_arch: str,
+    cache_dir: Path,
+) -> Dict[str, Dict[str, Set[str]]]:
+    """Resolve rosdep keys to packages by type of package.
+
+    Dependencies are resolved by a single rosdep invocation, and the result
+    of each is cached in cache_dir by ROS distribution, base and
+    architecture.
+    """
+    cache_path = _get_rosdep_cache_path(
+        cache_dir, ros_distro=ros_distro, base=base, target_arch=target_arch
+    )
+    cached: Dict[str, Dict[str, List[str]]]
+    try:
+        cached = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cached = {}
+
+    names = set(dependency_names)
+    resolved = {
+        name: {key: set(value) for key, value in cached[name].items()}
+        for name in names
+        if name in cached
+    }
+    missing = sorted(names - resolved.keys())
+    if not missing:
+        return resolved
+
+    cmd = ["rosdep", "resolve", *missing, "--rosdistro", ros_distro]
+    try:
+        click.echo(f"Running {cmd!r}")
+        proc = subprocess.run(
+            cmd,
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env={"PATH": os.environ["PATH"]},
+        )
+    except subprocess.CalledProcessError as error:
+        click.echo(f"failed to run {cmd!r}: {error.output}")
+        raise RosdepError("rosdep encountered an error") from error
+
+    newly_resolved = _parse_rosdep_resolve_batch(missing, proc.stdout.decode().strip())
+    resolved.update(newly_resolved)
+
+    cached.update(
+        {
+            name: {key: sorted(value) for key, value in dependencies.items()}
+            for name, dependencies in newly_resolved.items()
+        }
+    )
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", dir=cache_path.parent, delete=False, encoding="utf-8"
+    ) as cache_file:
+        json.dump(cached, cache_file)
+    os.replace(cache_file.name, cache_path)
+
+    return resolved
+
+
 class RosPlugin(plugins.Plugin):
     """Base class for ROS-related plugins. Not intended for use by end users."""
 
@@ -264,48 +368,67 @@ def plugin_cli():
     """Define the plugin_cli Click group."""
 
 
+def _get_apt_dependencies(package_names: List[str]) -> Set[str]:
+    cmd = [
+        "apt",
+        "depends",
+        "--recurse",
+        "--no-recommends",
+        "--no-suggests",
+        "--no-conflicts",
+        "--no-breaks",
+        "--no-replaces",
+        "--no-enhances",
+        *package_names,
+    ]
+    click.echo(f"Running {cmd!r}")
+    proc = subprocess.run(
+        cmd,
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env={"PATH": os.environ["PATH"]},
+    )
+
+    apt_dependency_regex = re.compile(r"^\w.*$")
+    return {
+        line
+        for line in proc.stdout.decode().strip().split("\n")
+        if apt_dependency_regex.match(line)
+    }
+
+
 def get_installed_dependencies(installed_packages_path: str) -> Set[str]:
     """Retrieve recursive apt dependencies of a given package list."""
     if os.path.isfile(installed_packages_path):
         try:
             with open(installed_packages_path, encoding="utf8") as file:
                 build_snap_packages = set(file.read().split())
-                package_dependencies = set()
-                for package in build_snap_packages:
-                    cmd = [
-                        "apt",
-                        "depends",
-                        "--recurse",
-                        "--no-recommends",
-                        "--no-suggests",
-                        "--no-conflicts",
-                        "--no-breaks",
-                        "--no-replaces",
-                        "--no-enhances",
-                        f"{package}",
-                    ]
-                    click.echo(f"Running {cmd!r}")
+        except OSError:
+            return set()
+
+        package_dependencies = set()
+        if build_snap_packages:
+            # Resolve the closure of all the packages at once, and only
+            # resolve packages one by one if apt fails for one of them.
+            try:
+                package_dependencies = _get_apt_dependencies(
+                    sorted(build_snap_packages)
+                )
+            except subprocess.CalledProcessError as error:
+                click.echo(f"failed to resolve dependencies at once: {error.output}")
+                for package in sorted(build_snap_packages):
                     try:
-                        proc = subprocess.run(
-                            cmd,
-                            check=True,
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.STDOUT,
-                            env={"PATH": os.environ["PATH"]},
+                        package_dependencies |= _get_apt_dependencies([package])
+                    except subprocess.CalledProcessError as package_error:
+                        click.echo(
+                            f"failed to resolve dependencies of {package!r}: "
+                            f"{package_error.output}"
                         )
-                    except subprocess.CalledProcessError as error:
-                        click.echo(f"failed to run {cmd!r}: {error.output}")
-                    else:
-                        apt_dependency_regex = re.compile(r"^\w.*$")
-                        for line in proc.stdout.decode().strip().split("\n"):
-                            if apt_dependency_regex.match(line):
-                                package_dependencies.add(line)
-
-                build_snap_packages.update(package_dependencies)
-                click.echo(f"Will not fetch staged packages: {build_snap_packages!r}")
-                return build_snap_packages
-        except OSError:
-            pass
+
+        build_snap_packages.update(package_dependencies)
+        click.echo(f"Will not fetch staged packages: {build_snap_packages!r}")
+        return build_snap_packages
     return set()
 
 
@@ -331,10 +454,14 @@ def stage_runtime_dependencies(  # noqa: PLR0913 (too many arguments)
     # @todo: support python packages (only apt currently supported)
     apt_packages: Set[str] = set()
 
-    installed_pkgs = cast(
-        Iterable[catkin_pkg.package.Package],
-        catkin_packages.find_packages(part_install).values(),
-    )
+    installed_pkg_names = {
+        pkg.name
+        for pkg in cast(
+            Iterable[catkin_pkg.package.Package],
+            catkin_packages.find_packages(part_install).values(),
+        )
+    }
+    dependency_names: Set[str] = set()
     for pkg in catkin_packages.find_packages(part_src).values():
         pkg = cast(catkin_pkg.package.Package, pkg)  # noqa PLW2901
         # Evaluate the conditions of all dependencies
@@ -350,26 +477,19 @@ def stage_runtime_dependencies(  # noqa: PLR0913 (too many arguments)
             exec_dep for exec_dep in pkg.exec_depends if exec_dep.evaluated_condition
         ):
             # No need to resolve this dependency if we know it's local
-            if any(p for p in installed_pkgs if p.name == dep.name):
-                continue
-
-            cmd = ["rosdep", "resolve", dep.name, "--rosdistro", ros_distro]
-            try:
-                click.echo(f"Running {cmd!r}")
-                proc = subprocess.run(
-                    cmd,
-                    check=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    env={"PATH": os.environ["PATH"]},
-                )
-            except subprocess.CalledProcessError as error:
-                click.echo(f"failed to run {cmd!r}: {error.output}")
-                raise RosdepError("rosdep encountered an error") from error
+            if dep.name not in installed_pkg_names:
+                dependency_names.add(dep.name)
 
-            parsed = _parse_rosdep_resolve_dependencies(
-                dep, proc.stdout.decode().strip()
-            )
+    if dependency_names:
+        resolved = resolve_dependencies(
+            dependency_names,
+            ros_distro=ros_distro,
+            base=base,
+            target_arch=target_arch,
+            cache_dir=Path(stage_cache_dir),
+        )
+        for dependency_name in sorted(resolved):
+            parsed = dict(resolved[dependency_name])
             apt_packages |= parsed.pop("apt", set())
 
             if parsed:
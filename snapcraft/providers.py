@@ -15,25 +15,30 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 """Snapcraft-specific code to interface with craft-providers."""
+import dataclasses
 import io
 import os
 import sys
+from datetime import datetime, timedelta
 from pathlib import Path
 from textwrap import dedent
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 from craft_cli import emit
 from craft_providers import Provider, ProviderError, bases, executor
 from craft_providers.actions.snap_installer import Snap
-from craft_providers.lxd import LXDProvider
+from craft_providers.lxd import LXDError, LXDInstance, LXDProvider
+from craft_providers.lxd.remotes import get_remote_image
 from craft_providers.multipass import MultipassProvider
 
+from snapcraft import errors
 from snapcraft.snap_config import get_snap_config
 from snapcraft.utils import (
     confirm_with_user,
     get_managed_environment_home_path,
     get_managed_environment_log_path,
     get_managed_environment_project_path,
+    get_managed_environment_shared_cache_path,
     get_managed_environment_snap_channel,
     is_snapcraft_running_from_snap,
 )
@@ -45,6 +50,9 @@ SNAPCRAFT_BASE_TO_PROVIDER_BASE = {
     "devel": bases.BuilddBaseAlias.DEVEL,
 }
 
+# Prefix of the names craft-providers gives to LXD base instances.
+_BASE_INSTANCE_PREFIX = "base-instance-"
+
 # TODO: move to a package data file for shellcheck and syntax highlighting
 # pylint: disable=line-too-long
 BASHRC = dedent(
@@ -234,6 +242,7 @@ def get_command_environment(
         "SNAPCRAFT_BUILD_INFO",
         "SNAPCRAFT_IMAGE_INFO",
         "SNAPCRAFT_MAX_PARALLEL_BUILD_COUNT",
+        "SNAPCRAFT_SHARED_CACHE",
     ]:
         if env_key in os.environ:
             env[env_key] = os.environ[env_key]
@@ -329,14 +338,223 @@ def get_provider(provider: Optional[str] = None) -> Provider:
     raise ValueError(f"unsupported provider specified: {chosen_provider!r}")
 
 
+@dataclasses.dataclass(frozen=True)
+class BaseInstancePool:
+    """Base instances to keep in the LXD provider.
+
+    craft-providers sets up a "base instance" for each base and clones it for
+    every new build instance. The pool keeps base instances ready for the
+    configured bases, so that the first build of any project on them starts
+    from a clone, and evicts the oldest base instances.
+
+    :param warm_bases: Snapcraft bases to keep a base instance for.
+    :param max_count: Maximum number of base instances, the oldest are evicted.
+    :param max_age: Maximum age of base instances.
+    """
+
+    warm_bases: Tuple[str, ...] = ()
+    max_count: Optional[int] = None
+    max_age: Optional[timedelta] = None
+
+    @classmethod
+    def from_environment(cls) -> "BaseInstancePool":
+        """Get the pool configuration from the environment.
+
+        - SNAPCRAFT_WARM_BASES: comma separated list of bases (e.g. core20,core22).
+        - SNAPCRAFT_BASE_INSTANCE_MAX_COUNT: maximum number of base instances.
+        - SNAPCRAFT_BASE_INSTANCE_MAX_AGE: maximum age of base instances in days.
+
+        :raises SnapcraftError: if a value is not valid.
+        """
+        warm_bases = tuple(
+            base.strip()
+            for base in os.getenv("SNAPCRAFT_WARM_BASES", "").split(",")
+            if base.strip()
+        )
+        for base in warm_bases:
+            if base not in SNAPCRAFT_BASE_TO_PROVIDER_BASE:
+                raise errors.SnapcraftError(
+                    f"Invalid base {base!r} in SNAPCRAFT_WARM_BASES.",
+                    resolution="Valid bases are "
+                    + ", ".join(SNAPCRAFT_BASE_TO_PROVIDER_BASE)
+                    + ".",
+                )
+
+        max_count = _get_positive_int_from_env("SNAPCRAFT_BASE_INSTANCE_MAX_COUNT")
+        max_age = _get_positive_int_from_env("SNAPCRAFT_BASE_INSTANCE_MAX_AGE")
+
+        return cls(
+            warm_bases=warm_bases,
+            max_count=max_count,
+            max_age=timedelta(days=max_age) if max_age is not None else None,
+        )
+
+
+def _get_positive_int_from_env(env_key: str) -> Optional[int]:
+    value = os.getenv(env_key)
+    if not value:
+        return None
+
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise errors.SnapcraftError(
+            f"Invalid value {value!r} for {env_key}.",
+            resolution="Set it to a positive integer.",
+        )
+    return number
+
+
+def _parse_lxd_date(value: str) -> datetime:
+    # LXD dates are in UTC with nanoseconds, e.g. 2023-06-01T10:00:00.123456789Z
+    return datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S")
+
+
+def prune_base_instances(provider: Provider, pool: BaseInstancePool) -> None:
+    """Delete base instances that are too old or exceed the pool size.
+
+    :param provider: The provider to prune, only LXD has base instances.
+    :param pool: The base instance pool configuration.
+    """
+    if not isinstance(provider, LXDProvider):
+        return
+    if pool.max_count is None and pool.max_age is None:
+        return
+
+    try:
+        instances = [
+            instance
+            for instance in provider.lxc.list(
+                project=provider.lxd_project, remote=provider.lxd_remote
+            )
+            if instance["name"].startswith(_BASE_INSTANCE_PREFIX)
+        ]
+    except (ProviderError, LXDError) as error:
+        emit.debug(f"Could not list base instances: {error}")
+        return
+    # newest first
+    instances.sort(key=lambda i: _parse_lxd_date(i["created_at"]), reverse=True)
+
+    now = datetime.utcnow()
+    for index, instance in enumerate(instances):
+        too_many = pool.max_count is not None and index >= pool.max_count
+        too_old = (
+            pool.max_age is not None
+            and now - _parse_lxd_date(instance["created_at"]) > pool.max_age
+        )
+        if not (too_many or too_old):
+            continue
+
+        emit.debug(f"Evicting base instance {instance['name']!r}")
+        try:
+            provider.lxc.delete(
+                instance_name=instance["name"],
+                force=True,
+                project=provider.lxd_project,
+                remote=provider.lxd_remote,
+            )
+        except LXDError as error:
+            # it may be in use by a concurrent build, retry next time
+            emit.debug(f"Could not evict base instance {instance['name']!r}: {error}")
+
+
+def warm_base_instances(
+    provider: Provider,
+    pool: BaseInstancePool,
+    *,
+    project_path: Path,
+    http_proxy: Optional[str] = None,
+    https_proxy: Optional[str] = None,
+) -> None:
+    """Make sure there is a base instance for each of the pool's bases.
+
+    For each base without a base instance, a temporary instance is launched,
+    which creates the base instance, and then deleted. Errors are only
+    reported, as the build itself is already done.
+
+    Setting up a base instance takes minutes, so it is skipped in runs that
+    are not interactive (no tty on stdin) or when CI is set, where nobody
+    benefits from waiting for it after the build.
+
+    :param provider: The provider to warm, only LXD has base instances.
+    :param pool: The base instance pool configuration.
+    :param project_path: Path used to map the user id in the instance.
+    :param http_proxy: http proxy to use to set up the instances.
+    :param https_proxy: https proxy to use to set up the instances.
+    """
+    if not isinstance(provider, LXDProvider):
+        if pool.warm_bases:
+            emit.debug(f"Base instances are not supported by {provider.name}")
+        return
+    if not pool.warm_bases:
+        return
+    if not sys.stdin.isatty() or os.getenv("CI"):
+        emit.debug("Not warming base instances in a non-interactive run")
+        return
+
+    for snapcraft_base in pool.warm_bases:
+        instance_name = f"snapcraft-warm-{snapcraft_base}"
+        base_configuration = get_base_configuration(
+            alias=SNAPCRAFT_BASE_TO_PROVIDER_BASE[snapcraft_base],
+            instance_name=instance_name,
+            http_proxy=http_proxy,
+            https_proxy=https_proxy,
+        )
+        try:
+            if _has_base_instance(provider, base_configuration):
+                continue
+            emit.progress(f"Warming base instance for {snapcraft_base}...")
+            with provider.launched_environment(
+                project_name="warm",
+                project_path=project_path,
+                base_configuration=base_configuration,
+                instance_name=instance_name,
+                allow_unstable=snapcraft_base == "devel",
+            ) as instance:
+                pass
+            instance.delete()
+        except (ProviderError, LXDError) as error:
+            emit.debug(f"Could not warm base instance for {snapcraft_base}: {error}")
+
+
+def _get_base_instance_name(base_configuration: bases.Base) -> str:
+    """Get the name of the base instance launching base_configuration uses.
+
+    craft-providers has no public API for this name. It is built the same way
+    as in the pinned craft-providers, which the tests check.
+    """
+    image = get_remote_image(base_configuration)
+    return (
+        f"{_BASE_INSTANCE_PREFIX}{base_configuration.compatibility_tag}"
+        f"-{image.remote_name}-{image.image_name}"
+    )
+
+
+def _has_base_instance(provider: LXDProvider, base_configuration: bases.Base) -> bool:
+    """Check if the base instance that launching base_configuration uses exists."""
+    base_instance = LXDInstance(
+        name=_get_base_instance_name(base_configuration),
+        project=provider.lxd_project,
+        remote=provider.lxd_remote,
+        lxc=provider.lxc,
+    )
+    return base_instance.exists()
+
+
 def prepare_instance(
-    instance: executor.Executor, host_project_path: Path, bind_ssh: bool
+    instance: executor.Executor,
+    host_project_path: Path,
+    bind_ssh: bool,
+    shared_cache_dir: Optional[Path] = None,
 ) -> None:
     """Prepare an instance to run snapcraft.
 
     The preparation includes:
     - mounting the project directory
     - mounting the `.ssh` directory, if specified
+    - mounting the shared cache directory, if specified
     - setting up `.bashrc` and the command line prompt
     """
     # mount project
@@ -352,6 +570,13 @@ def prepare_instance(
             target=get_managed_environment_home_path() / ".ssh",
         )
 
+    # mount shared cache directory
+    if shared_cache_dir:
+        instance.mount(
+            host_source=shared_cache_dir,
+            target=get_managed_environment_shared_cache_path(),
+        )
+
     instance.push_file_io(
         destination=Path("/root/.bashrc"),
         content=io.BytesIO(BASHRC.encode()),
@@ -33,7 +33,7 @@ from .git import (
     get_git_repo_type,
     is_repo,
 )
-from .launchpad import LaunchpadClient
+from .launchpad import BuildEvent, LaunchpadClient, monitor_builds
 from .remote_builder import RemoteBuilder
 from .utils import get_build_id, humanize_list, rmtree, validate_architectures
 from .worktree import WorkTree
@@ -44,9 +44,11 @@ __all__ = [
     "get_git_repo_type",
     "humanize_list",
     "is_repo",
+    "monitor_builds",
     "rmtree",
     "validate_architectures",
     "AcceptPublicUploadError",
+    "BuildEvent",
     "GitError",
     "GitRepo",
     "GitType",
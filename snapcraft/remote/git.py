@@ -136,10 +136,11 @@ class GitRepo:
                 f"Could not add changes for the git repository in {str(self.path)!r}."
             ) from error
 
-    def commit(self, message: str = "auto commit") -> str:
+    def commit(self, message: str = "auto commit", merge: Optional[str] = None) -> str:
         """Commit changes to the repo.
 
         :param message: the commit message
+        :param merge: object ID of a commit to add as a second parent
 
         :returns: object ID of the commit as str
 
@@ -158,6 +159,8 @@ class GitRepo:
 
         # a target is not needed for an unborn head (no existing commits in branch)
         target = [] if self._repo.head_is_unborn else [self._repo.head.target]
+        if merge is not None:
+            target.append(pygit2.Oid(hex=merge))
 
         try:
             return str(
@@ -169,6 +172,96 @@ class GitRepo:
                 f"in {str(self.path)!r}."
             ) from error
 
+    def fetch_head(self, source_path: Path) -> Optional[str]:
+        """Fetch the HEAD commit and the tags of a repository on disk.
+
+        :param source_path: path of the git repository to fetch from
+
+        :returns: object ID of the fetched commit as str, or None if the
+          repository has no commits
+
+        :raises GitError: if the commit could not be fetched
+        """
+        try:
+            source_repo = pygit2.Repository(source_path)
+            if source_repo.head_is_unborn:
+                return None
+            head = str(source_repo.head.target)
+        except (pygit2.GitError, KeyError) as error:
+            raise GitError(
+                f"Could not resolve HEAD for the git repository in {str(source_path)!r}."
+            ) from error
+
+        logger.debug("Fetching %r from %r.", head, str(source_path))
+
+        cmd = [
+            "git",
+            "fetch",
+            "--quiet",
+            "--force",
+            "--tags",
+            str(source_path.absolute()),
+            "HEAD",
+        ]
+        try:
+            subprocess.run(
+                cmd, cwd=str(self.path), check=True, capture_output=True, text=True
+            )
+        except subprocess.CalledProcessError as error:
+            raise GitError(
+                f"Could not fetch from {str(source_path)!r} for the git repository "
+                f"in {str(self.path)!r}: {error.stderr.strip()}"
+            ) from error
+
+        return head
+
+    def has_commit(self, commit: str) -> bool:
+        """Check if a commit is HEAD or one of its ancestors.
+
+        :param commit: object ID of the commit
+        """
+        if self._repo.head_is_unborn:
+            return False
+
+        head = self._repo.head.target
+        commit_id = pygit2.Oid(hex=commit)
+        return head == commit_id or self._repo.descendant_of(head, commit_id)
+
+    def fast_forward(self, commit: str) -> bool:
+        """Move HEAD and the index to a commit that descends from HEAD.
+
+        :param commit: object ID of the commit
+
+        :returns: True if HEAD was moved, False if commit does not descend
+          from HEAD
+
+        :raises GitError: if HEAD could not be moved
+        """
+        commit_id = pygit2.Oid(hex=commit)
+        if not self._repo.head_is_unborn and not self._repo.descendant_of(
+            commit_id, self._repo.head.target
+        ):
+            return False
+
+        logger.debug("Fast-forwarding to %r.", commit)
+
+        try:
+            self._repo.index.read_tree(self._repo[commit_id].tree)
+            self._repo.index.write()
+            head = self._repo.lookup_reference("HEAD")
+            # HEAD is a symbolic reference to a branch, unless it is detached
+            if isinstance(head.target, str):
+                self._repo.references.create(head.target, commit_id, force=True)
+            else:
+                self._repo.set_head(commit_id)
+        except (pygit2.GitError, KeyError) as error:
+            raise GitError(
+                f"Could not fast-forward to {commit!r} for the git repository "
+                f"in {str(self.path)!r}."
+            ) from error
+
+        return True
+
     def is_clean(self) -> bool:
         """Check if the repo is clean.
 
@@ -198,13 +291,14 @@ class GitRepo:
                 f"Could not initialize a git repository in {str(self.path)!r}."
             ) from error
 
-    def push_url(  # pylint: disable=too-many-branches
+    def push_url(  # noqa: PLR0913 pylint: disable=too-many-branches,too-many-arguments
         self,
         remote_url: str,
         remote_branch: str,
         ref: str = "HEAD",
         token: Optional[str] = None,
         push_tags: bool = False,
+        force: bool = False,
     ) -> None:
         """Push a reference to a branch on a remote url.
 
@@ -213,6 +307,8 @@ class GitRepo:
         :param ref: name of shorthand ref to push (i.e. a branch, tag, or `HEAD`)
         :param token: token in the url to hide in logs and errors
         :param push_tags: if true, push all tags to URL (similar to `git push --tags`)
+        :param force: if true, update the remote even if it is not a fast-forward
+          (similar to `git push --force`)
 
         :raises GitError: if the ref cannot be resolved or pushed
         """
@@ -235,6 +331,8 @@ class GitRepo:
         cmd: list[str] = ["git", "push", remote_url, refspec, "--progress"]
         if push_tags:
             cmd.append("--tags")
+        if force:
+            cmd.append("--force")
 
         git_proc: Optional[subprocess.Popen] = None
         try:
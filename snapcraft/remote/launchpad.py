@@ -17,13 +17,16 @@
 
 """Class to manage remote builds on Launchpad."""
 
+import asyncio
 import gzip
 import logging
 import shutil
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence, cast
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, cast
 from urllib.parse import unquote, urlsplit
 
 import requests
@@ -35,6 +38,10 @@ from xdg import BaseDirectory
 from . import GitRepo, errors
 
 _LP_POLL_INTERVAL = 30
+_LP_MIN_POLL_INTERVAL = 5
+_LP_POLL_BACKOFF = 1.5
+_LP_DOWNLOAD_WORKERS = 4
+_LP_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
 _LP_SUCCESS_STATUS = "Successfully built"
 _LP_FAIL_STATUS = "Failed to build"
 
@@ -78,6 +85,75 @@ def _get_url_basename(url: str):
     return unquote(path).split("/")[-1]
 
 
+@dataclass(frozen=True)
+class BuildEvent:
+    """A change in the state of the build for an architecture.
+
+    :param build_id: Unique identifier of the remote build.
+    :param arch: Architecture of the build.
+    :param state: Launchpad state of the build.
+    :param previous_state: Previous state of the build, None when first seen.
+    :param build: The build entry from Launchpad.
+    """
+
+    build_id: str
+    arch: str
+    state: str
+    previous_state: Optional[str]
+    build: Dict[str, Any] = field(repr=False, compare=False)
+
+    @property
+    def finished(self) -> bool:
+        """True if the build will not change state anymore."""
+        return not _is_build_pending({"buildstate": self.state})
+
+
+class _Backoff:
+    """Intervals growing from `initial` up to `maximum` until reset."""
+
+    def __init__(self, *, initial: float, maximum: float, factor: float) -> None:
+        self._initial = min(initial, maximum)
+        self._maximum = maximum
+        self._factor = factor
+        self._interval = self._initial
+
+    def next(self) -> float:
+        """Get the next interval."""
+        interval = self._interval
+        self._interval = min(interval * self._factor, self._maximum)
+        return interval
+
+    def reset(self) -> None:
+        """Start again from the initial interval."""
+        self._interval = self._initial
+
+
+async def monitor_builds(
+    clients: Sequence["LaunchpadClient"],
+    callback: Callable[[BuildEvent], None],
+    *,
+    min_interval: float = _LP_MIN_POLL_INTERVAL,
+    max_interval: float = _LP_POLL_INTERVAL,
+) -> None:
+    """Watch the builds of several remote builds concurrently.
+
+    :param clients: Clients for each of the remote builds.
+    :param callback: Called with the BuildEvents of all remote builds.
+    :param min_interval: Minimum time in seconds between polls of a remote build.
+    :param max_interval: Maximum time in seconds between polls of a remote build.
+
+    :raises RemoteBuildTimeoutError: If the deadline of a remote build is reached.
+    """
+    await asyncio.gather(
+        *(
+            client.watch_builds(
+                callback, min_interval=min_interval, max_interval=max_interval
+            )
+            for client in clients
+        )
+    )
+
+
 class LaunchpadClient:
     """Launchpad remote builder operations.
 
@@ -166,23 +242,34 @@ class LaunchpadClient:
         cache_dir.mkdir(mode=0o700, exist_ok=True)
         return cache_dir
 
-    def _fetch_artifacts(self, snap: Optional[Entry]) -> None:
-        """Fetch build arftifacts (logs and snaps)."""
-        builds = self._get_builds(snap)
-        error_list: list[str] = []
+    def _fetch_artifacts(
+        self, build: Dict[str, Any], executor: ThreadPoolExecutor
+    ) -> List["Future[None]"]:
+        """Start fetching the artifacts (logs and snaps) of a finished build.
 
-        logger.info("Downloading artifacts...")
-        for build in builds:
-            self._download_build_artifacts(build)
-            try:
-                self._download_log(build)
-            except errors.RemoteBuildFailedError as error:
-                error_list.append(str(error.details))
+        Launchpad is queried from the calling thread, only the downloads run
+        in the executor.
 
-        if error_list:
-            raise errors.RemoteBuildFailedError(
-                details="\n".join(error_list),
-            )
+        :returns: The futures of the downloads.
+        """
+        arch = build["arch_tag"]
+        downloads = []
+
+        snap_build = self._lp_load_url(build["self_link"])
+        urls = snap_build.getFileUrls()  # type: ignore
+        if not urls:
+            logger.error("Snap file not available for arch %r.", arch)
+        for url in urls:
+            downloads.append(executor.submit(self._download_artifact, url))
+
+        url = build["build_log_url"]
+        if url is None:
+            logger.info("No build log available for %r.", arch)
+        else:
+            log_name = self._get_logfile_name(arch)
+            downloads.append(executor.submit(self._download_log, url, log_name))
+
+        return downloads
 
     def _get_builds_collection_entry(self, snap: Optional[Entry]) -> Optional[Entry]:
         logger.debug("Fetching builds collection information from Launchpad...")
@@ -225,6 +312,9 @@ class LaunchpadClient:
     def _wait_for_build_request_acceptance(self, build_request: Entry) -> None:
         # Not to be confused with the actual build(s), this is
         # ensuring that Launchpad accepts the build request.
+        backoff = _Backoff(
+            initial=1, maximum=_LP_MIN_POLL_INTERVAL, factor=_LP_POLL_BACKOFF
+        )
         while build_request.status == "Pending":
             # Check to see if we've run out of time.
             self._check_timeout_deadline()
@@ -234,7 +324,7 @@ class LaunchpadClient:
                 "status=%s error=%s", build_request.status, build_request.error_message
             )
 
-            time.sleep(1)
+            time.sleep(backoff.next())
 
             # Refresh status.
             build_request.lp_refresh()
@@ -306,12 +396,15 @@ class LaunchpadClient:
             name=self._lp_name, owner=self._lp_owner, target=self._lp_owner
         )
 
-    def _delete_git_repository(self) -> None:
-        """Delete git repository."""
+    def _get_git_repository(self) -> Optional[Entry]:
+        """Get git repository, or None if it does not exist."""
         git_path = self.get_git_repo_path()
-        git_repo = self._lp.git_repositories.getByPath(path=git_path)  # type: ignore
-
         # git_repositories.getByPath returns None if git repo does not exist.
+        return self._lp.git_repositories.getByPath(path=git_path)  # type: ignore
+
+    def _delete_git_repository(self) -> None:
+        """Delete git repository."""
+        git_repo = self._get_git_repository()
         if git_repo is None:
             return
 
@@ -367,22 +460,59 @@ class LaunchpadClient:
         build_request = self._issue_build_request(snap)
         self._wait_for_build_request_acceptance(build_request)
 
-    def monitor_build(self, interval: int = _LP_POLL_INTERVAL) -> None:
-        """Check build progress, and download artifacts when ready."""
-        snap = self._get_snap()
+    async def watch_builds(
+        self,
+        callback: Callable[[BuildEvent], None],
+        *,
+        min_interval: float = _LP_MIN_POLL_INTERVAL,
+        max_interval: float = _LP_POLL_INTERVAL,
+    ) -> None:
+        """Poll the builds until they are all finished, reporting state changes.
+
+        The interval between polls starts at `min_interval` and grows up to
+        `max_interval` while no build changes state. Launchpad is queried from
+        a worker thread, `callback` is called from the event loop.
+
+        :param callback: Called with a BuildEvent for every build seen for the
+          first time or that changed state.
+        :param min_interval: Minimum time in seconds between polls.
+        :param max_interval: Maximum time in seconds between polls.
+
+        :raises RemoteBuildTimeoutError: If the deadline is reached.
+        """
+        snap = await asyncio.to_thread(self._get_snap)
+        states: Dict[str, str] = {}
+        backoff = _Backoff(
+            initial=min_interval, maximum=max_interval, factor=_LP_POLL_BACKOFF
+        )
 
         while True:
             # Check to see if we've run out of time.
             self._check_timeout_deadline()
 
-            builds = self._get_builds(snap)
+            builds = await asyncio.to_thread(self._get_builds, snap)
             pending = False
+            changed = False
             statuses = []
             for build in builds:
                 state = build["buildstate"]
                 arch = build["arch_tag"]
                 statuses.append(f"{arch}: {state}")
 
+                previous_state = states.get(arch)
+                if state != previous_state:
+                    states[arch] = state
+                    changed = True
+                    callback(
+                        BuildEvent(
+                            build_id=self._build_id,
+                            arch=arch,
+                            state=state,
+                            previous_state=previous_state,
+                            build=build,
+                        )
+                    )
+
                 if _is_build_pending(build):
                     pending = True
 
@@ -391,10 +521,50 @@ class LaunchpadClient:
             if pending is False:
                 break
 
-            time.sleep(interval)
+            if changed:
+                backoff.reset()
+            await asyncio.sleep(backoff.next())
+
+    def monitor_build(self, interval: int = _LP_POLL_INTERVAL) -> None:
+        """Check build progress, and download artifacts when ready.
+
+        The artifacts of each build are downloaded as soon as it finishes,
+        while other builds are still running.
+
+        :param interval: Maximum time in seconds between polls.
+        """
+        fetched: Set[str] = set()
+        downloads: List["Future[None]"] = []
+        error_list: List[str] = []
+
+        with ThreadPoolExecutor(max_workers=_LP_DOWNLOAD_WORKERS) as executor:
+
+            def _fetch_finished_build(event: BuildEvent) -> None:
+                if not event.finished or event.arch in fetched:
+                    return
+                if not fetched:
+                    logger.info("Downloading artifacts...")
+                fetched.add(event.arch)
+                downloads.extend(self._fetch_artifacts(event.build, executor))
+                if _is_build_status_failure(event.build):
+                    logger.error("Build failed for arch %r.", event.arch)
+                    error_list.append(f"Build failed for arch {event.arch}.")
+
+            asyncio.run(
+                self.watch_builds(
+                    _fetch_finished_build,
+                    min_interval=min(_LP_MIN_POLL_INTERVAL, interval),
+                    max_interval=interval,
+                )
+            )
 
-        # Build is complete - download build artifacts.
-        self._fetch_artifacts(snap)
+            for download in downloads:
+                download.result()
+
+        if error_list:
+            raise errors.RemoteBuildFailedError(
+                details="\n".join(error_list),
+            )
 
     def get_build_status(self) -> Dict[str, str]:
         """Get status of builds."""
@@ -419,53 +589,50 @@ class LaunchpadClient:
 
         return log_name
 
-    def _download_log(self, build: Dict[str, Any]) -> None:
-        url = build["build_log_url"]
-        arch = build["arch_tag"]
-        if url is None:
-            logger.info("No build log available for %r.", arch)
-        else:
-            log_name = self._get_logfile_name(arch)
-            self._download_file(url=url, dst=log_name, gunzip=True)
-            logger.info("Build log available at %r.", log_name)
+    def _download_log(self, url: str, log_name: str) -> None:
+        self._download_file(url=url, dst=log_name, gunzip=True)
+        logger.info("Build log available at %r.", log_name)
+
+    def _download_artifact(self, url: str) -> None:
+        file_name = _get_url_basename(url)
 
-        if _is_build_status_failure(build):
-            logger.error("Build failed for arch %r.", arch)
-            raise errors.RemoteBuildFailedError(f"Build failed for arch {arch}.")
+        self._download_file(url=url, dst=file_name)
+
+        if file_name.endswith(".snap"):
+            logger.info("Snapped %s", file_name)
+        else:
+            logger.info("Fetched %s", file_name)
 
     def _download_file(self, *, url: str, dst: str, gunzip: bool = False) -> None:
         # TODO: consolidate with, and use indicators.download_requests_stream
         logger.info("Downloading: %s", url)
+        partial_dst = Path(f"{dst}.partial")
         try:
             with requests.get(url, stream=True, timeout=3600) as response:
+                response.raise_for_status()
                 # Wrap response with gzipfile if gunzip is requested.
                 stream = response.raw
                 if gunzip:
                     stream = gzip.GzipFile(fileobj=stream)
-                with open(dst, "wb") as f_dst:
-                    shutil.copyfileobj(stream, f_dst)
-                response.raise_for_status()
+                with partial_dst.open("wb") as f_dst:
+                    shutil.copyfileobj(stream, f_dst, _LP_DOWNLOAD_CHUNK_SIZE)
+
+                # The size on the wire, before gunzip.
+                expected_size = response.headers.get("Content-Length")
+                received_size = response.raw.tell()
+                if expected_size is not None and received_size != int(expected_size):
+                    logger.error(
+                        "Error downloading %s: expected %s bytes, received %d.",
+                        url,
+                        expected_size,
+                        received_size,
+                    )
+                    return
+            partial_dst.replace(dst)
         except requests.exceptions.RequestException as error:
             logger.error("Error downloading %s: %s", url, str(error))
-
-    def _download_build_artifacts(self, build: Dict[str, Any]) -> None:
-        arch = build["arch_tag"]
-        snap_build = self._lp_load_url(build["self_link"])
-        urls = snap_build.getFileUrls()  # type: ignore
-
-        if not urls:
-            logger.error("Snap file not available for arch %r.", arch)
-            return
-
-        for url in urls:
-            file_name = _get_url_basename(url)
-
-            self._download_file(url=url, dst=file_name)
-
-            if file_name.endswith(".snap"):
-                logger.info("Snapped %s", file_name)
-            else:
-                logger.info("Fetched %s", file_name)
+        finally:
+            partial_dst.unlink(missing_ok=True)
 
     def has_outstanding_build(self) -> bool:
         """Check if there is an existing build configured on Launchpad."""
@@ -473,8 +640,14 @@ class LaunchpadClient:
         return snap is not None
 
     def push_source_tree(self, repo_dir: Path) -> None:
-        """Push source tree to Launchpad."""
-        lp_repo = self._create_git_repository(force=True)
+        """Push source tree to Launchpad.
+
+        An existing repository for the build is reused so git only sends the
+        objects Launchpad does not have yet.
+        """
+        lp_repo = self._get_git_repository()
+        if lp_repo is None:
+            lp_repo = self._create_git_repository()
         # This token will be used multiple times, so we don't want it to
         # expire too soon. Especially if the git push takes a long time.
         date_expires = datetime.now(timezone.utc) + timedelta(minutes=60)
@@ -492,4 +665,5 @@ class LaunchpadClient:
         logger.info("Sending build data to Launchpad: %s", stripped_url)
 
         repo = GitRepo(repo_dir)
-        repo.push_url(url, "main", "HEAD", token, push_tags=True)
+        # the cached repo may have been removed while this repository was kept
+        repo.push_url(url, "main", "HEAD", token, push_tags=True, force=True)
@@ -16,17 +16,34 @@
 
 """Remote build utilities."""
 
+import json
+import logging
+import mmap
+import os
 import shutil
 import stat
-from functools import partial
+import time
+from concurrent.futures import ThreadPoolExecutor
 from hashlib import md5
 from pathlib import Path
-from typing import Iterable, List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from xdg import BaseDirectory
 
 from .errors import UnsupportedArchitectureError
 
+logger = logging.getLogger(__name__)
+
 _SUPPORTED_ARCHS = ["amd64", "arm64", "armhf", "i386", "ppc64el", "riscv64", "s390x"]
 
+# Not part of the project hash anywhere in the tree.
+_HASH_IGNORED_NAMES = frozenset([".git"])
+# Not part of the project hash at the root of the project (lifecycle directories).
+_HASH_IGNORED_ROOT_NAMES = frozenset(["parts", "stage", "prime"])
+_HASH_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+_HASH_MMAP_MIN_SIZE = 1024 * 1024
+_HASH_CACHE_MIN_AGE_NS = 2 * 10**9
+
 
 def validate_architectures(architectures: List[str]) -> None:
     """Validate that architectures are supported for remote building.
@@ -56,19 +73,25 @@ def get_build_id(app_name: str, project_name: str, project_path: Path) -> str:
 
     :returns: The build id.
     """
-    project_hash = _compute_hash(project_path)
+    cache_dir = Path(BaseDirectory.save_cache_path(app_name, "remote-build", "hashes"))
+    project_hash = _compute_hash(project_path, cache_dir=cache_dir)
 
     return f"{app_name}-{project_name}-{project_hash}"
 
 
-def _compute_hash(directory: Path) -> str:
-    """Compute an md5 hash from the contents of the files in a directory.
+def _compute_hash(directory: Path, *, cache_dir: Optional[Path] = None) -> str:
+    """Compute an md5 hash from the paths and contents of the files in a directory.
+
+    If a file or its contents within the directory are modified, moved or renamed,
+    then the hash will be different. Paths in `_HASH_IGNORED_NAMES` and
+    `_HASH_IGNORED_ROOT_NAMES` are not part of the hash.
 
-    If a file or its contents within the directory are modified, then the hash
-    will be different.
+    Files are hashed concurrently. If `cache_dir` is set, the digest of each file
+    is stored there along with its size, modification time and inode, so
+    unchanged files are not read again on the next run.
 
-    The hash may not be unique if the contents of one file are moved to another file
-    or if files are reorganized.
+    :param directory: The directory to hash.
+    :param cache_dir: Directory to keep the file digest cache in.
 
     :returns: A string containing the md5 hash.
 
@@ -85,19 +108,102 @@ def _compute_hash(directory: Path) -> str:
             "a directory."
         )
 
-    files = sorted([file for file in Path().glob("**/*") if file.is_file()])
-    hashes: List[str] = []
-
-    for file_path in files:
-        md5_hash = md5()  # noqa: S324 (insecure-hash-function)
-        with open(file_path, "rb") as file:
-            # read files in chunks in case they are large
-            for block in iter(partial(file.read, 4096), b""):
-                md5_hash.update(block)
-        hashes.append(md5_hash.hexdigest())
-
-    all_hashes = "".join(hashes).encode()
-    return md5(all_hashes).hexdigest()  # noqa: S324 (insecure-hash-function)
+    directory = directory.absolute()
+    cache_file = None
+    cache: Dict[str, List] = {}
+    if cache_dir is not None:
+        cache_file = cache_dir / (
+            md5(str(directory).encode()).hexdigest() + ".json"  # noqa: S324
+        )
+        cache = _load_hash_cache(cache_file)
+
+    files = sorted(_walk_files(directory, skip=cache_dir))
+    hashed_at = time.time_ns()
+    new_cache: Dict[str, List] = {}
+
+    def _get_digest(file: Tuple[str, os.stat_result]) -> str:
+        relative_path, stat_result = file
+        key = [stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino]
+        cached = cache.get(relative_path)
+        if cached is not None and cached[:3] == key:
+            digest = cached[3]
+        else:
+            digest = _hash_file(directory / relative_path, stat_result.st_size)
+        # Files modified within the mtime resolution could change again
+        # without changing their stat, do not trust the cache for those.
+        if hashed_at - stat_result.st_mtime_ns > _HASH_CACHE_MIN_AGE_NS:
+            new_cache[relative_path] = key + [digest]
+        return digest
+
+    with ThreadPoolExecutor(max_workers=_HASH_WORKERS) as executor:
+        digests = list(executor.map(_get_digest, files))
+
+    project_hash = md5()  # noqa: S324 (insecure-hash-function)
+    for (relative_path, _), digest in zip(files, digests):
+        project_hash.update(f"{relative_path}\0{digest}\n".encode())
+
+    if cache_file is not None:
+        _save_hash_cache(cache_file, new_cache)
+
+    return project_hash.hexdigest()
+
+
+def _walk_files(
+    directory: Path, *, skip: Optional[Path] = None
+) -> Iterator[Tuple[str, os.stat_result]]:
+    """Yield the relative path and stat of every file to hash in a directory.
+
+    :param directory: The directory to walk.
+    :param skip: A directory to leave out, such as the hash cache.
+    """
+    skipped_dir = None
+    if skip is not None and skip.absolute().is_relative_to(directory):
+        skipped_dir = skip.absolute().relative_to(directory).as_posix() + "/"
+
+    pending = [""]
+    while pending:
+        relative_dir = pending.pop()
+        with os.scandir(directory / relative_dir) as entries:
+            for entry in entries:
+                if entry.name in _HASH_IGNORED_NAMES or (
+                    not relative_dir and entry.name in _HASH_IGNORED_ROOT_NAMES
+                ):
+                    continue
+                relative_path = f"{relative_dir}{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    if relative_path + "/" != skipped_dir:
+                        pending.append(relative_path + "/")
+                elif entry.is_file():
+                    yield relative_path, entry.stat()
+
+
+def _hash_file(file_path: Path, size: int) -> str:
+    """Compute the md5 hash of a file, mapping it into memory if it is large."""
+    with open(file_path, "rb") as file:
+        if size < _HASH_MMAP_MIN_SIZE:
+            return md5(file.read()).hexdigest()  # noqa: S324
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return md5(mapped).hexdigest()  # noqa: S324
+
+
+def _load_hash_cache(cache_file: Path) -> Dict[str, List]:
+    try:
+        with cache_file.open(encoding="utf-8") as cache:
+            return json.load(cache)
+    except (OSError, ValueError) as error:
+        logger.debug("Ignoring hash cache %s: %s", str(cache_file), error)
+        return {}
+
+
+def _save_hash_cache(cache_file: Path, cache: Dict[str, List]) -> None:
+    temporary_file = cache_file.with_suffix(".tmp")
+    try:
+        with temporary_file.open("w", encoding="utf-8") as temporary_cache:
+            json.dump(cache, temporary_cache)
+        temporary_file.replace(cache_file)
+    except OSError as error:
+        logger.debug("Could not save hash cache %s: %s", str(cache_file), error)
 
 
 def humanize_list(
@@ -16,14 +16,24 @@
 
 """Manages trees for remote builds."""
 
+import logging
+import os
+import shutil
+import stat
 from pathlib import Path
-from shutil import copytree
+from typing import Optional, Tuple
 
 from xdg import BaseDirectory
 
-from .git import GitRepo
+from .git import GitRepo, is_repo
 from .utils import rmtree
 
+logger = logging.getLogger(__name__)
+
+# The cached repo has a git directory of its own, where the auto commits
+# are stacked on top of each other. The project history is fetched into it.
+_SYNC_EXCLUDED_PATHS = frozenset([".git"])
+
 
 class WorkTree:
     """Class to manage trees for remote builds.
@@ -46,22 +56,125 @@ class WorkTree:
         return self._repo_dir
 
     def init_repo(self) -> None:
-        """Initialize a clean repo."""
-        if self._repo_dir.exists():
-            rmtree(self._repo_dir)
+        """Initialize or update the cached repo from the project directory.
+
+        The cached repo is kept between runs, only files that were added,
+        modified or removed in the project since the last run are synced.
+        The project's git directory is not synced.
+        """
+        self._repo_dir.mkdir(parents=True, exist_ok=True)
 
-        copytree(self._project_dir, self._repo_dir)
+        copied, removed = _sync_tree(self._project_dir, self._repo_dir)
+        logger.debug(
+            "Synced %r to %r: %d copied, %d removed.",
+            str(self._project_dir),
+            str(self._repo_dir),
+            copied,
+            removed,
+        )
 
         self._gitify_repository()
 
     def _gitify_repository(self) -> None:
-        """Git-ify source repository tree."""
+        """Git-ify source repository tree.
+
+        Changes are committed on top of the previous auto commit. When the
+        project is a git repository, its HEAD is fast-forwarded to or merged
+        in if it is not part of the history yet, so tags and versions can be
+        derived from it.
+        """
         repo = GitRepo(self._repo_dir)
-        if not repo.is_clean():
+
+        merge: Optional[str] = None
+        if is_repo(self._project_dir):
+            project_head = repo.fetch_head(self._project_dir)
+            if (
+                project_head is not None
+                and not repo.has_commit(project_head)
+                and not repo.fast_forward(project_head)
+            ):
+                merge = project_head
+
+        if merge is not None or not repo.is_clean():
             repo.add_all()
-            repo.commit()
+            repo.commit(merge=merge)
 
     def clean_cache(self):
         """Clean the cache."""
         if self._base_dir.exists():
             rmtree(self._base_dir)
+
+
+def _sync_tree(
+    source: Path, destination: Path, relative_dir: str = ""
+) -> Tuple[int, int]:
+    """Make destination a copy of source, copying only what changed.
+
+    Files are compared by size and modification time, which `shutil.copy2`
+    preserves. Symbolic links in source are followed, as `shutil.copytree`
+    does by default.
+
+    :param source: Directory to copy from.
+    :param destination: Directory to copy to, must exist.
+    :param relative_dir: Path of the directories relative to the top of the tree.
+
+    :returns: A tuple with the number of files copied and paths removed.
+    """
+    copied = 0
+    removed = 0
+
+    with os.scandir(source) as entries:
+        source_entries = {entry.name: entry for entry in entries}
+
+    with os.scandir(destination) as entries:
+        for entry in entries:
+            relative_path = relative_dir + entry.name
+            if entry.name in source_entries or relative_path in _SYNC_EXCLUDED_PATHS:
+                continue
+            _remove(Path(entry.path), entry.is_dir(follow_symlinks=False))
+            removed += 1
+
+    for name, entry in source_entries.items():
+        relative_path = relative_dir + name
+        if relative_path in _SYNC_EXCLUDED_PATHS:
+            continue
+
+        target = destination / name
+        try:
+            target_stat: Optional[os.stat_result] = target.lstat()
+        except FileNotFoundError:
+            target_stat = None
+
+        if entry.is_dir():
+            if target_stat is not None and not stat.S_ISDIR(target_stat.st_mode):
+                _remove(target, False)
+            target.mkdir(exist_ok=True)
+            sub_copied, sub_removed = _sync_tree(
+                Path(entry.path), target, relative_path + "/"
+            )
+            copied += sub_copied
+            removed += sub_removed
+            continue
+
+        if target_stat is not None:
+            source_stat = entry.stat()
+            if (
+                stat.S_ISREG(target_stat.st_mode)
+                and target_stat.st_size == source_stat.st_size
+                and target_stat.st_mtime_ns == source_stat.st_mtime_ns
+            ):
+                continue
+            # unlink first as git objects are read-only
+            _remove(target, stat.S_ISDIR(target_stat.st_mode))
+
+        shutil.copy2(entry.path, target)
+        copied += 1
+
+    return copied, removed
+
+
+def _remove(path: Path, is_dir: bool) -> None:
+    if is_dir:
+        rmtree(path)
+    else:
+        path.unlink()
@@ -0,0 +1,155 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Host cache shared with build instances.
+
+When SNAPCRAFT_SHARED_CACHE is set, a cache directory on the host is mounted
+into every build instance and used as the craft-parts cache, so packages and
+source archives fetched by one instance are reused by the others. Entries
+are stored by content: debs by package, version and architecture, source
+archives by their checksum.
+
+The cache can be bounded with SNAPCRAFT_SHARED_CACHE_MAX_SIZE, in MiB; the
+least recently used entries are evicted before an instance is launched.
+"""
+
+import contextlib
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from craft_cli import emit
+from xdg import BaseDirectory  # type: ignore
+
+from snapcraft import errors
+from snapcraft.utils import strtobool
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
+# craft-parts cache directories with entries that can be evicted, the apt
+# state under stage-packages is small and regenerated on demand.
+_EVICTABLE_DIRS = ("download", "files")
+
+_LOCK_FILE = ".lock"
+
+
+def is_enabled() -> bool:
+    """Check if the shared cache is enabled."""
+    return strtobool(os.getenv("SNAPCRAFT_SHARED_CACHE", "n"))
+
+
+def get_max_size() -> Optional[int]:
+    """Get the maximum size of the shared cache in bytes.
+
+    :raises SnapcraftError: if SNAPCRAFT_SHARED_CACHE_MAX_SIZE is not valid.
+    """
+    value = os.getenv("SNAPCRAFT_SHARED_CACHE_MAX_SIZE")
+    if not value:
+        return None
+
+    try:
+        max_size = int(value)
+    except ValueError:
+        max_size = -1
+    if max_size < 0:
+        raise errors.SnapcraftError(
+            f"Invalid value {value!r} for SNAPCRAFT_SHARED_CACHE_MAX_SIZE.",
+            resolution="Set it to the maximum cache size in MiB.",
+        )
+    return max_size * 1024 * 1024
+
+
+def get_host_cache_dir() -> Path:
+    """Get the shared cache directory on the host."""
+    return Path(BaseDirectory.save_cache_path("snapcraft", "shared"))
+
+
+@contextlib.contextmanager
+def lock(cache_dir: Path, *, shared: bool = False) -> Iterator[None]:
+    """Hold a lock on the shared cache.
+
+    Builds hold a shared lock while they pull, so that concurrent builds pull
+    in parallel. Entries are written under their key, apt locks its own
+    directories, and concurrent writes of an entry write the same contents.
+    Eviction holds the exclusive lock, so that it never removes entries a
+    build is using.
+
+    The lock is an advisory lock on a file in the cache. It is honoured by
+    processes on the host and in LXD containers, which bind mount the cache.
+    It is not honoured across Multipass' sshfs mounts, where it only holds
+    among the processes on the same side of the mount.
+
+    :param cache_dir: The shared cache directory.
+    :param shared: Whether to hold a shared lock rather than an exclusive one.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    with open(cache_dir / _LOCK_FILE, "ab") as lock_file:
+        try:
+            fcntl.flock(lock_file, operation | fcntl.LOCK_NB)
+        except BlockingIOError:
+            emit.progress("Waiting for the shared cache lock...")
+            fcntl.flock(lock_file, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _get_entries(cache_dir: Path) -> List[Tuple[float, int, Path]]:
+    entries = []
+    for name in _EVICTABLE_DIRS:
+        for root, _, files in os.walk(cache_dir / name):
+            for file_name in files:
+                path = Path(root, file_name)
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                last_used = max(stat.st_atime, stat.st_mtime)
+                entries.append((last_used, stat.st_size, path))
+    return entries
+
+
+def evict(cache_dir: Path, max_size: int) -> int:
+    """Remove the least recently used entries until the cache fits max_size.
+
+    The cache must be locked by the caller.
+
+    :param cache_dir: The shared cache directory.
+    :param max_size: The maximum size of the cache in bytes.
+
+    :return: The number of bytes freed.
+    """
+    entries = _get_entries(cache_dir)
+    size = sum(entry_size for _, entry_size, _ in entries)
+    freed = 0
+
+    for _, entry_size, path in sorted(entries):
+        if size - freed <= max_size:
+            break
+        emit.debug(f"Evicting {str(path)!r} from the shared cache")
+        path.unlink(missing_ok=True)
+        freed += entry_size
+
+    return freed
@@ -23,7 +23,7 @@ The full API is documented on
 https://dashboard.snapcraft.io/docs/v2/en/snaps.html#snap-channel-map
 """
 
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import jsonschema
 from craft_store.models import SnapListReleasesModel
@@ -32,6 +32,8 @@ from craft_store.models import SnapListReleasesModel
 class Progressive:
     """Represent Progressive information for a MappedChannel."""
 
+    __slots__ = ("paused", "percentage", "current_percentage")
+
     @classmethod
     def unmarshal(cls, payload: Dict[str, Any]) -> "Progressive":
         """Unmarshal payload into a Progressive."""
@@ -74,6 +76,14 @@ class Progressive:
 class MappedChannel:
     """Represent a mapped channel item for "channel-map" in ChannelMap."""
 
+    __slots__ = (
+        "channel",
+        "revision",
+        "architecture",
+        "expiration_date",
+        "progressive",
+    )
+
     @classmethod
     def unmarshal(cls, payload: Dict[str, Any]) -> "MappedChannel":
         """Unmarshal payload into a MappedChannel."""
@@ -125,6 +135,8 @@ class MappedChannel:
 class Revision:
     """Represent a revision item for "revisions" in ChannelMap."""
 
+    __slots__ = ("revision", "version", "architectures")
+
     @classmethod
     def unmarshal(cls, payload: Dict[str, Any]) -> "Revision":
         """Unmarshal payload into a Revision."""
@@ -163,6 +175,8 @@ class Revision:
 class SnapChannel:
     """Represent a channel item in "channels" in Snap."""
 
+    __slots__ = ("name", "track", "risk", "branch", "fallback")
+
     @classmethod
     def unmarshal(cls, payload: Dict[str, Any]) -> "SnapChannel":
         """Unmarshal payload into a SnapChannel."""
@@ -213,6 +227,8 @@ class SnapChannel:
 class SnapTrack:
     """Represent a track item in "tracks" in Snap."""
 
+    __slots__ = ("name", "status", "creation_date", "version_pattern")
+
     @classmethod
     def unmarshal(cls, payload: Dict[str, Any]) -> "SnapTrack":
         """Unmarshal payload into a SnapTrack."""
@@ -293,6 +309,36 @@ class Snap:
         self.tracks = tracks
 
 
+class _ChannelMapIndex:
+    """Lookup tables for a ChannelMap."""
+
+    __slots__ = ("mapped_channels", "revisions", "channels", "architectures")
+
+    def __init__(
+        self,
+        *,
+        channel_map: List[MappedChannel],
+        revisions: List[Revision],
+        channels: List[SnapChannel],
+    ) -> None:
+        self.mapped_channels: Dict[Tuple[str, str], List[MappedChannel]] = {}
+        self.revisions: Dict[int, Revision] = {}
+        self.channels: Dict[str, SnapChannel] = {}
+        self.architectures: Set[str] = set()
+
+        # Mapped channels are grouped by (channel, architecture) only, the
+        # progressive state is matched on lookup as it can be changed in place.
+        for mapped_channel in channel_map:
+            self.mapped_channels.setdefault(
+                (mapped_channel.channel, mapped_channel.architecture), []
+            ).append(mapped_channel)
+        for revision_item in revisions:
+            self.revisions.setdefault(revision_item.revision, revision_item)
+            self.architectures.update(revision_item.architectures)
+        for snap_channel in channels:
+            self.channels.setdefault(snap_channel.name, snap_channel)
+
+
 class ChannelMap:
     """Represent the data returned from the channel-map Snap Store endpoint."""
 
@@ -337,56 +383,57 @@ class ChannelMap:
         self.channel_map = channel_map
         self.revisions = revisions
         self.snap = snap
+        self.reindex()
+
+    def reindex(self) -> None:
+        """Rebuild the lookup index.
+
+        This must be called after channel_map, revisions or the snap channels
+        are modified.
+        """
+        self._index = _ChannelMapIndex(
+            channel_map=self.channel_map,
+            revisions=self.revisions,
+            channels=self.snap.channels,
+        )
 
     def get_mapped_channel(
         self, *, channel_name: str, architecture: str, progressive: bool
     ) -> MappedChannel:
         """Return the channel for the corresponding attributes."""
-        channels_with_name = (
-            cm for cm in self.channel_map if cm.channel == channel_name
-        )
-        channels_with_arch = (
-            cm for cm in channels_with_name if cm.architecture == architecture
+        mapped_channels = self._index.mapped_channels.get(
+            (channel_name, architecture), []
         )
+        for mapped_channel in mapped_channels:
+            if (mapped_channel.progressive.percentage is not None) == progressive:
+                return mapped_channel
 
-        if progressive:
-            channels = [
-                cm for cm in channels_with_arch if cm.progressive.percentage is not None
-            ]
-        else:
-            channels = [
-                cm for cm in channels_with_arch if cm.progressive.percentage is None
-            ]
-
-        try:
-            return channels[0]
-        except IndexError as index_error:
-            raise ValueError(
-                f"No channel mapped to {channel_name!r} for architecture {architecture!r} "
-                f"when progressive is {progressive!r}"
-            ) from index_error
+        raise ValueError(
+            f"No channel mapped to {channel_name!r} for architecture {architecture!r} "
+            f"when progressive is {progressive!r}"
+        )
 
     def get_channel_info(self, channel_name: str) -> SnapChannel:
         """Return a SnapChannel for channel_name."""
-        for snap_channel in self.snap.channels:
-            if snap_channel.name == channel_name:
-                return snap_channel
-        raise ValueError(f"No channel information for {channel_name!r}")
+        try:
+            return self._index.channels[channel_name]
+        except KeyError as key_error:
+            raise ValueError(
+                f"No channel information for {channel_name!r}"
+            ) from key_error
 
     def get_revision(self, revision_number: int) -> Revision:
         """Return a Revision for revision_number."""
-        for revision_item in self.revisions:
-            if revision_item.revision == revision_number:
-                return revision_item
-        raise ValueError(f"No revision information for {revision_number!r}")
+        try:
+            return self._index.revisions[revision_number]
+        except KeyError as key_error:
+            raise ValueError(
+                f"No revision information for {revision_number!r}"
+            ) from key_error
 
     def get_existing_architectures(self) -> Set[str]:
         """Return a list of the existing architectures for this map."""
-        architectures: List[str] = []
-        for revision_item in self.revisions:
-            architectures.extend(revision_item.architectures)
-
-        return set(architectures)
+        return set(self._index.architectures)
 
 
 CHANNEL_MAP_JSONSCHEMA: Dict[str, Any] = {
@@ -28,6 +28,7 @@ from craft_cli import emit
 from overrides import overrides
 
 from snapcraft import __version__, errors, utils
+from snapcraft_legacy.storeapi import share_session
 from snapcraft_legacy.storeapi.v2.releases import Releases as Revisions
 
 from . import channel_map, constants
@@ -169,7 +170,8 @@ def get_client(ephemeral: bool) -> craft_store.BaseClient:
             ephemeral=ephemeral,
         )
 
-    return client
+    # Share connections with every other store client in this process.
+    return share_session(client)
 
 
 class LegacyStoreClientCLI:
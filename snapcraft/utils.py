@@ -192,6 +192,11 @@ def get_managed_environment_project_path():
     return get_managed_environment_home_path() / "project"
 
 
+def get_managed_environment_shared_cache_path():
+    """Path for the shared cache when running in managed environment."""
+    return get_managed_environment_home_path() / ".cache" / "snapcraft-shared"
+
+
 def get_managed_environment_log_path():
     """Path for log when running in managed environment."""
     return pathlib.Path(
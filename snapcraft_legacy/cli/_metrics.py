@@ -14,8 +14,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import csv
+import json
 import logging
-from typing import List, Union
+from typing import List, TextIO, Union
 
 from packaging import version
 
@@ -94,3 +96,18 @@ def convert_metrics_to_table(
         rows = list(zip(*rows))  # type: ignore
 
     return rows
+
+
+def write_metrics_columns(
+    columns: metrics_module.MetricsColumns, *, format: str, stream: TextIO
+) -> None:
+    """Write columns to stream as csv or ndjson, one data point per row."""
+    if format == "csv":
+        writer = csv.writer(stream, lineterminator="\n")
+        writer.writerow(columns.COLUMNS)
+        writer.writerows(columns.rows())
+    elif format == "ndjson":
+        for row in columns.rows():
+            stream.write(json.dumps(dict(zip(columns.COLUMNS, row))) + "\n")
+    else:
+        raise ValueError(f"Unsupported metrics export format: {format!r}")
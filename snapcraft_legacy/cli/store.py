@@ -30,7 +30,7 @@ from snapcraft_legacy._store import StoreClientCLI
 from snapcraft_legacy.storeapi import metrics as metrics_module
 
 from . import echo
-from ._metrics import convert_metrics_to_table
+from ._metrics import convert_metrics_to_table, write_metrics_columns
 
 
 @click.group()
@@ -225,12 +225,14 @@ _YESTERDAY = str(date.today() - timedelta(days=1))
 
 
 @storecli.command()
-@click.argument("snap-name", metavar="<snap-name>", required=True)
+@click.argument("snap-names", metavar="<snap-name>...", nargs=-1, required=True)
 @click.option(
     "--name",
+    "names",
     metavar="<metric name>",
-    help="Metric name",
+    help="Metric name, can be repeated when exporting",
     type=click.Choice([x.value for x in metrics_module.MetricsNames]),
+    multiple=True,
     required=True,
 )
 @click.option(
@@ -250,24 +252,48 @@ _YESTERDAY = str(date.today() - timedelta(days=1))
 @click.option(
     "--format",
     metavar="<format>",
-    help="Format for output",
-    type=click.Choice(["table", "json"]),
+    help="Format for output, csv and ndjson export one row per data point",
+    type=click.Choice(["table", "json", "csv", "ndjson"]),
     required=True,
 )
-def metrics(snap_name: str, name: str, start: str, end: str, format: str):
-    """Get metrics for <snap-name>."""
+def metrics(snap_names: List[str], names: List[str], start: str, end: str, format: str):
+    """Get metrics for <snap-name>.
+
+    With the csv or ndjson formats, metrics for several snaps and metric
+    names can be exported at once.
+    """
     store = storeapi.StoreClient()
     account_info = store.get_account_information()
 
-    try:
-        snap_id = account_info["snaps"][storeapi.constants.DEFAULT_SERIES][snap_name][
-            "snap-id"
-        ]
-    except KeyError:
+    snap_ids: Dict[str, str] = {}
+    for snap_name in snap_names:
+        try:
+            snap_ids[snap_name] = account_info["snaps"][
+                storeapi.constants.DEFAULT_SERIES
+            ][snap_name]["snap-id"]
+        except KeyError:
+            echo.exit_error(
+                brief=f"No permissions for snap {snap_name!r}.",
+                resolution="Ensure the snap name and credentials are correct.is correct and that the correct credentials are used.",
+            )
+
+    if format in ("csv", "ndjson"):
+        columns = store.export_metrics(
+            snap_ids=snap_ids, metric_names=names, start=start, end=end
+        )
+        write_metrics_columns(
+            columns, format=format, stream=click.get_text_stream("stdout")
+        )
+        return
+
+    if len(snap_names) != 1 or len(names) != 1:
         echo.exit_error(
-            brief="No permissions for snap.",
-            resolution="Ensure the snap name and credentials are correct.is correct and that the correct credentials are used.",
+            brief=f"Only one snap and metric name are supported with {format!r}.",
+            resolution="Use the csv or ndjson formats to export several metrics.",
         )
+    snap_name = snap_names[0]
+    snap_id = snap_ids[snap_name]
+    name = names[0]
 
     mf = metrics_module.MetricsFilter(
         snap_id=snap_id, metric_name=name, start=start, end=end
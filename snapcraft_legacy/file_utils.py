@@ -24,13 +24,24 @@ import shutil
 import stat
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager, suppress
-from typing import Callable, Generator, List, Optional, Pattern, Set
+from typing import Callable, Generator, List, Optional, Pattern, Sequence, Set, Tuple
 
 from snapcraft_legacy.internal import common, errors
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
 logger = logging.getLogger(__name__)
 
+# ioctl to share the extents of a file on filesystems that support it, from
+# linux/fs.h.
+_FICLONE = 0x40049409
+_COPY_CHUNK_SIZE = 2**30
+
 
 def replace_in_file(
     directory: str, file_pattern: Pattern, search_pattern: Pattern, replacement: str
@@ -141,7 +152,8 @@ def copy(source: str, destination: str, *, follow_symlinks: bool = False) -> Non
     """Copy source and destination files.
 
     This function overwrites the destination if it already exists, and also
-    tries to copy ownership information.
+    tries to copy ownership information. Regular files are cloned where the
+    filesystem supports it, and copied in the kernel otherwise.
 
     :param str source: The source to be copied to destination.
     :param str destination: Where to put the copy.
@@ -155,13 +167,20 @@ def copy(source: str, destination: str, *, follow_symlinks: bool = False) -> Non
         os.unlink(destination)
 
     try:
-        shutil.copy2(source, destination, follow_symlinks=follow_symlinks)
+        source_stat = os.stat(source, follow_symlinks=follow_symlinks)
+        if stat.S_ISREG(source_stat.st_mode) and _clone_file(source, destination):
+            shutil.copystat(source, destination, follow_symlinks=follow_symlinks)
+        else:
+            shutil.copy2(source, destination, follow_symlinks=follow_symlinks)
     except FileNotFoundError:
         raise errors.SnapcraftCopyFileNotFoundError(source)
-    uid = os.stat(source, follow_symlinks=follow_symlinks).st_uid
-    gid = os.stat(source, follow_symlinks=follow_symlinks).st_gid
     try:
-        os.chown(destination, uid, gid, follow_symlinks=follow_symlinks)
+        os.chown(
+            destination,
+            source_stat.st_uid,
+            source_stat.st_gid,
+            follow_symlinks=follow_symlinks,
+        )
     except PermissionError as e:
         logger.debug(
             "Unable to chown {destination}: {error}".format(
@@ -170,6 +189,97 @@ def copy(source: str, destination: str, *, follow_symlinks: bool = False) -> Non
         )
 
 
+def _clone_file(source: str, destination: str) -> bool:
+    """Clone or copy the contents of source in the kernel.
+
+    :return: False if the filesystems support neither, in which case the
+             contents have to be copied by other means.
+    """
+    with open(source, "rb") as source_file, open(destination, "wb") as dest_file:
+        if fcntl is not None:
+            with suppress(OSError):
+                fcntl.ioctl(dest_file.fileno(), _FICLONE, source_file.fileno())
+                return True
+
+        if hasattr(os, "copy_file_range"):
+            with suppress(OSError):
+                while os.copy_file_range(
+                    source_file.fileno(), dest_file.fileno(), _COPY_CHUNK_SIZE
+                ):
+                    pass
+                return True
+
+    return False
+
+
+def link_or_copy_files(
+    files: Sequence[Tuple[str, str]], *, follow_symlinks: bool = False
+) -> None:
+    """Hard-link a list of source files to their destinations.
+
+    Files that cannot be linked are copied by a pool of threads. The
+    destination directories are expected to exist.
+
+    :param files: The (source, destination) pairs to link.
+    :param bool follow_symlinks: Whether or not symlinks should be followed.
+
+    :raises SnapcraftCopyFileNotFoundError: If a source doesn't exist.
+    """
+    _link_or_copy_files(
+        [
+            (source, destination, not follow_symlinks and os.path.islink(source))
+            for source, destination in files
+        ],
+        follow_symlinks=follow_symlinks,
+    )
+
+
+def _link_or_copy_files(
+    files: Sequence[Tuple[str, str, bool]], *, follow_symlinks: bool
+) -> None:
+    # Links are cheap, make them here and leave the copies to the workers.
+    copies: List[Tuple[str, str]] = []
+    for source, destination, copy_only in files:
+        if copy_only or not _try_link(source, destination, follow_symlinks):
+            copies.append((source, destination))
+
+    _copy_files(copies, follow_symlinks=follow_symlinks)
+
+
+def _copy_files(files: Sequence[Tuple[str, str]], *, follow_symlinks: bool) -> None:
+    if not files:
+        return
+
+    def _copy(source_and_destination: Tuple[str, str]) -> None:
+        copy(*source_and_destination, follow_symlinks=follow_symlinks)
+
+    with ThreadPoolExecutor() as executor:
+        # Consume the results to raise the first error.
+        for _ in executor.map(_copy, files):
+            pass
+
+
+def _try_link(source: str, destination: str, follow_symlinks: bool) -> bool:
+    source_path = os.path.realpath(source) if follow_symlinks else source
+    try:
+        os.link(source_path, destination, follow_symlinks=False)
+    except FileExistsError:
+        if os.path.isdir(destination):
+            return False
+        os.remove(destination)
+        return _try_link(source, destination, follow_symlinks)
+    except FileNotFoundError:
+        if not os.path.lexists(source_path):
+            raise errors.SnapcraftCopyFileNotFoundError(source)
+        create_similar_directory(
+            os.path.dirname(source_path), os.path.dirname(destination)
+        )
+        return _try_link(source, destination, follow_symlinks)
+    except OSError:
+        return False
+    return True
+
+
 def link_or_copy_tree(
     source_tree: str,
     destination_tree: str,
@@ -203,45 +313,64 @@ def link_or_copy_tree(
 
     create_similar_directory(source_tree, destination_tree)
 
+    files = _create_similar_tree(source_tree, destination_tree, ignore)
+
+    if copy_function is link_or_copy:
+        _link_or_copy_files(files, follow_symlinks=False)
+    elif copy_function is copy:
+        _copy_files(
+            [(source, dest) for source, dest, _ in files], follow_symlinks=False
+        )
+    else:
+        for source, destination, _ in files:
+            copy_function(source, destination)
+
+
+def _create_similar_tree(
+    source_tree: str,
+    destination_tree: str,
+    ignore: Optional[Callable[[str, List[str]], List[str]]],
+) -> List[Tuple[str, str, bool]]:
+    """Create the directories of source_tree in destination_tree.
+
+    :return: The files to copy, with whether the source is a symlink.
+    """
     destination_basename = os.path.basename(destination_tree)
+    files: List[Tuple[str, str, bool]] = []
+
+    # Walk the tree with scandir, which has the type of each entry without
+    # extra system calls. Directories are created as they are found, so all
+    # of them exist before any file is linked.
+    pending = [(source_tree, destination_tree)]
+    while pending:
+        root, destination_root = pending.pop()
+        with os.scandir(root) as scanned:
+            entries = list(scanned)
 
-    for root, directories, files in os.walk(source_tree, topdown=True):
         ignored: Set[str] = set()
         if ignore is not None:
-            ignored = set(ignore(root, directories + files))
+            ignored = set(ignore(root, [entry.name for entry in entries]))
 
         # Don't recurse into destination tree if it's a subdirectory of the
         # source tree.
         if os.path.relpath(destination_tree, root) == destination_basename:
             ignored.add(destination_basename)
 
-        if ignored:
-            # Prune our search appropriately given an ignore list, i.e. don't
-            # walk into directories that are ignored.
-            directories[:] = [d for d in directories if d not in ignored]
-
-        for directory in directories:
-            source = os.path.join(root, directory)
-            # os.walk doesn't by default follow symlinks (which is good), but
-            # it includes symlinks that are pointing to directories in the
-            # directories list. We want to treat it as a file, here.
-            if os.path.islink(source):
-                files.append(directory)
+        for entry in entries:
+            if entry.name in ignored:
                 continue
 
-            destination = os.path.join(
-                destination_tree, os.path.relpath(source, source_tree)
-            )
+            destination = os.path.join(destination_root, entry.name)
+            # Symlinks to directories are treated as files.
+            if entry.is_dir(follow_symlinks=False):
+                _create_similar_directory(
+                    entry.path, destination, entry.stat(follow_symlinks=False)
+                )
+                pending.append((entry.path, destination))
+            else:
+                files.append((entry.path, destination, entry.is_symlink()))
 
-            create_similar_directory(source, destination)
-
-        for file_name in set(files) - ignored:
-            source = os.path.join(root, file_name)
-            destination = os.path.join(
-                destination_tree, os.path.relpath(source, source_tree)
-            )
-
-            copy_function(source, destination)
+    return files
 
 
 def create_similar_directory(source: str, destination: str) -> None:
@@ -253,9 +382,14 @@ def create_similar_directory(source: str, destination: str) -> None:
                            information will be copied.
     """
 
-    stat = os.stat(source, follow_symlinks=False)
-    uid = stat.st_uid
-    gid = stat.st_gid
+    _create_similar_directory(
+        source, destination, os.stat(source, follow_symlinks=False)
+    )
+
+
+def _create_similar_directory(
+    source: str, destination: str, source_stat: os.stat_result
+) -> None:
     os.makedirs(destination, exist_ok=True)
 
     # Windows does not have "os.chown" implementation and copystat
@@ -264,7 +398,9 @@ def create_similar_directory(source: str, destination: str) -> None:
         return
 
     try:
-        os.chown(destination, uid, gid, follow_symlinks=False)
+        os.chown(
+            destination, source_stat.st_uid, source_stat.st_gid, follow_symlinks=False
+        )
     except PermissionError as exception:
         logger.debug("Unable to chown {}: {}".format(destination, exception))
 
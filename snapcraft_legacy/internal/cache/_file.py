@@ -15,58 +15,118 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import logging
 import os
-import shutil
-from typing import Optional
+import tempfile
+import time
+from contextlib import suppress
+from typing import List, Optional, Tuple
 
-from snapcraft_legacy.file_utils import calculate_hash
+from snapcraft_legacy.file_utils import calculate_hash, copy
+from snapcraft_legacy.internal import errors
 
 from ._cache import SnapcraftCache
 
 logger = logging.getLogger(__name__)
 
+# In MiB.
+_DEFAULT_MAX_SIZE = 10 * 1024
+
+
+def get_max_size() -> int:
+    """Return the size in bytes the file cache is trimmed to.
+
+    It is set in MiB with SNAPCRAFT_FILE_CACHE_MAX_SIZE, 10 GiB by default.
+    """
+    value = os.getenv("SNAPCRAFT_FILE_CACHE_MAX_SIZE", str(_DEFAULT_MAX_SIZE))
+    try:
+        return max(int(value), 0) * 1024 * 1024
+    except ValueError:
+        logger.warning(
+            f"Ignoring invalid value {value!r} for SNAPCRAFT_FILE_CACHE_MAX_SIZE."
+        )
+        return _DEFAULT_MAX_SIZE * 1024 * 1024
+
 
 class FileCache(SnapcraftCache):
-    """Generic file cache."""
+    """Generic file cache.
 
-    def __init__(self, *, namespace: str = "files") -> None:
+    Files are stored by the hash of their contents. The access time of the
+    files records when they were last used, and the least recently used
+    files are evicted when the cache grows over its maximum size.
+    """
+
+    def __init__(
+        self, *, namespace: str = "files", max_size: Optional[int] = None
+    ) -> None:
         """Create a FileCache under namespace.
 
         :param str namespace: set the namespace for the cache
                               (default: "files").
+        :param int max_size: the size in bytes to trim the cache to
+                             (default: get_max_size()).
         """
         super().__init__()
         self.file_cache = os.path.join(self.cache_root, namespace)
+        self.max_size = get_max_size() if max_size is None else max_size
 
-    def cache(self, *, filename: str, algorithm: str, hash: str) -> Optional[str]:
+    def cache(
+        self, *, filename: str, algorithm: str, hash: str, verify: bool = True
+    ) -> Optional[str]:
         """Cache a file revision with hash in XDG cache, unless it already exists.
         :param str filename: path to the file to cache.
         :param str algorithm: algorithm used to calculate the hash as
                               understood by hashlib.
         :param str hash: hash for filename calculated with algorithm.
+        :param bool verify: whether to check the hash of filename, which can
+                            be skipped if it was computed while downloading.
         :returns: path to cached file.
         """
         # First we verify
-        calculated_hash = calculate_hash(filename, algorithm=algorithm)
-        if calculated_hash != hash:
-            logger.warning(
-                "Skipping caching of {!r} as the expected "
-                "hash does not match the one "
-                "provided".format(filename)
-            )
-            return None
+        if verify:
+            calculated_hash = calculate_hash(filename, algorithm=algorithm)
+            if calculated_hash != hash:
+                logger.warning(
+                    "Skipping caching of {!r} as the expected "
+                    "hash does not match the one "
+                    "provided".format(filename)
+                )
+                return None
         cached_file_path = os.path.join(self.file_cache, algorithm, hash)
         os.makedirs(os.path.dirname(cached_file_path), exist_ok=True)
         try:
             if not os.path.isfile(cached_file_path):
-                # this must not be hard-linked, as rebuilding a snap
-                # with changes should invalidate the cache, hence avoids
-                # using fileutils.link_or_copy.
-                shutil.copyfile(filename, cached_file_path)
+                self._add(filename, cached_file_path)
+            self._touch(cached_file_path)
         except OSError:
             logger.warning("Unable to cache file {}.".format(cached_file_path))
             return None
+
+        self.trim(keep=cached_file_path)
         return cached_file_path
 
+    def _add(self, filename: str, cached_file_path: str) -> None:
+        # this must not be hard-linked, as rebuilding a snap
+        # with changes should invalidate the cache, hence avoids
+        # using fileutils.link_or_copy.
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(cached_file_path), prefix="."
+        )
+        os.close(fd)
+        try:
+            copy(filename, temp_path)
+            # Cached files are read-only, they are never modified in place.
+            os.chmod(temp_path, 0o444)
+            os.replace(temp_path, cached_file_path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.unlink(temp_path)
+            raise
+
+    def _touch(self, cached_file_path: str) -> None:
+        os.utime(
+            cached_file_path,
+            ns=(time.time_ns(), os.stat(cached_file_path).st_mtime_ns),
+        )
+
     def get(self, *, algorithm: str, hash: str):
         """Get the filepath which matches the hash calculated with algorithm.
 
@@ -76,8 +136,76 @@ class FileCache(SnapcraftCache):
         :returns: path to cached file.
         """
         cached_file_path = os.path.join(self.file_cache, algorithm, hash)
-        if os.path.exists(cached_file_path):
-            logger.debug("Cache hit for hash {!r}".format(hash))
-            return cached_file_path
-        else:
+        try:
+            self._touch(cached_file_path)
+        except FileNotFoundError:
             return None
+        logger.debug("Cache hit for hash {!r}".format(hash))
+        return cached_file_path
+
+    def materialize(self, *, algorithm: str, hash: str, destination: str) -> bool:
+        """Create destination from the file which matches the hash.
+
+        The cached file is cloned where the filesystem supports it, and
+        copied otherwise. It is never hard-linked, as the destination can be
+        modified. The copy is verified, and a cached file which no longer
+        matches its hash is evicted.
+
+        :param str algorithm: algorithm used to calculate the hash as
+                              understood by hashlib.
+        :param str hash: hash for filename calculated with algorithm.
+        :param str destination: the path to create.
+        :returns: False if no file matches the hash.
+        """
+        cached_file_path = self.get(algorithm=algorithm, hash=hash)
+        if cached_file_path is None:
+            return False
+
+        try:
+            copy(cached_file_path, destination)
+        except errors.SnapcraftCopyFileNotFoundError:
+            # Evicted since it was found.
+            return False
+
+        if calculate_hash(destination, algorithm=algorithm) != hash:
+            logger.warning(
+                "Evicting {!r} from the cache as it does not match its "
+                "hash".format(cached_file_path)
+            )
+            with suppress(FileNotFoundError):
+                os.unlink(cached_file_path)
+            os.unlink(destination)
+            return False
+        os.chmod(destination, 0o644)
+        return True
+
+    def trim(self, *, keep: Optional[str] = None) -> None:
+        """Evict the least recently used files until under the maximum size.
+
+        :param str keep: the path to a cached file never to evict.
+        """
+        entries: List[Tuple[int, int, str]] = []
+        total_size = 0
+        with suppress(FileNotFoundError):
+            for algorithm_entry in os.scandir(self.file_cache):
+                if not algorithm_entry.is_dir(follow_symlinks=False):
+                    continue
+                for entry in os.scandir(algorithm_entry.path):
+                    # Skip files being added.
+                    if entry.name.startswith("."):
+                        continue
+                    entry_stat = entry.stat(follow_symlinks=False)
+                    entries.append(
+                        (entry_stat.st_atime_ns, entry_stat.st_size, entry.path)
+                    )
+                    total_size += entry_stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            if path == keep:
+                continue
+            logger.debug("Evicting {!r} from the cache".format(path))
+            with suppress(FileNotFoundError):
+                os.unlink(path)
+            total_size -= size
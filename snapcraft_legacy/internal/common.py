@@ -25,10 +25,11 @@ import shutil
 import subprocess
 import sys
 import tempfile
+import threading
 import urllib
-from contextlib import suppress
+from contextlib import contextmanager, suppress
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Union
+from typing import IO, Callable, Dict, Iterator, List, Optional, Union
 
 from snaphelpers import SnapConfigOptions, SnapCtlError
 
@@ -53,6 +54,8 @@ env = []  # type: List[str]
 
 logger = logging.getLogger(__name__)
 
+_step_output = threading.local()
+
 
 def assemble_env():
     return "\n".join(["export " + e for e in env])
@@ -262,6 +265,25 @@ def reset_env():
     env = []
 
 
+def get_step_output() -> Optional[IO]:
+    """Return the file the current thread's step output is redirected to.
+
+    Commands run for a part step should send their stdout and stderr here,
+    None means the output is not redirected.
+    """
+    return getattr(_step_output, "file", None)
+
+
+@contextmanager
+def redirect_step_output(output_file: IO) -> Iterator[None]:
+    """Redirect the output of steps run by the current thread to output_file."""
+    _step_output.file = output_file
+    try:
+        yield
+    finally:
+        _step_output.file = None
+
+
 def get_terminal_width(max_width=MAX_CHARACTERS_WRAP):
     if os.isatty(1):
         width = shutil.get_terminal_size().columns
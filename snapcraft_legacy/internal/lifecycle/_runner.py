@@ -32,6 +32,7 @@ from snapcraft_legacy.internal.pluginhandler._part_environment import (
     get_snapcraft_part_directory_environment,
 )
 
+from ._scheduler import Scheduler, get_parallel_parts
 from ._status_cache import StatusCache
 
 logger = logging.getLogger(__name__)
@@ -183,6 +184,8 @@ class _Executor:
         self.steps_were_run = False
 
         self._cache = StatusCache(project_config)
+        self._parallel_parts = get_parallel_parts()
+        self._scheduler_running = False
 
     def run(self, step: steps.Step, part_names=None):
         if part_names:
@@ -196,6 +199,13 @@ class _Executor:
             processed_part_names = self.config.part_names
 
         with config.CLIConfig() as cli_config:
+            # Dependencies run by the scheduler are already done when a part
+            # needs them, anything else is left to the serial lifecycle.
+            if self._parallel_parts > 1 and not self._scheduler_running:
+                self._run_scheduled(part_names, parts, step, cli_config)
+                self._create_meta(step, processed_part_names)
+                return
+
             for current_step in step.previous_steps() + [step]:
                 if current_step == steps.STAGE:
                     # XXX check only for collisions on the parts that have
@@ -206,6 +216,17 @@ class _Executor:
 
         self._create_meta(step, processed_part_names)
 
+    def _run_scheduled(self, part_names, parts, step, cli_config) -> None:
+        def run_node(part, current_step):
+            self._handle_step(part_names, part, step, current_step, cli_config)
+
+        scheduler = Scheduler(self.config, run_node=run_node, jobs=self._parallel_parts)
+        self._scheduler_running = True
+        try:
+            scheduler.run(parts, step)
+        finally:
+            self._scheduler_running = False
+
     def _handle_step(
         self,
         requested_part_names: Sequence[str],
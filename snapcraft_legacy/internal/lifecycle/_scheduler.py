@@ -0,0 +1,256 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Run the steps of independent parts concurrently.
+
+The lifecycle of the parts is a graph of (part, step) nodes: each step of a
+part comes after the previous step of the part, and after the prerequisite
+step of the parts it is declared to be after. Pull and build nodes run in a
+pool of workers as soon as the nodes they depend on are done. Stage and prime
+nodes write to directories shared by all parts, so they run one at a time
+while no worker is busy, and stage nodes are preceded by the collision check.
+
+The output of each node is collected and written with the part name as a
+prefix once the nodes before it, in the order the serial lifecycle would
+run them, have been written.
+"""
+
+import logging
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import IO, TYPE_CHECKING, Callable, Dict, Iterable, List, NamedTuple, Set
+
+from snapcraft_legacy.internal import common, pluginhandler, steps
+
+if TYPE_CHECKING:
+    from snapcraft_legacy.internal.project_loader._config import Config
+
+logger = logging.getLogger(__name__)
+
+_PARALLEL_STEPS = (steps.PULL, steps.BUILD)
+
+
+class _Node(NamedTuple):
+    part: pluginhandler.PluginHandler
+    step: steps.Step
+
+
+class _StepOutputHandler(logging.Handler):
+    """Write log records from threads with redirected output to that output."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        output = common.get_step_output()
+        if output is None:
+            return
+        try:
+            os.write(output.fileno(), (self.format(record) + "\n").encode())
+        except Exception:  # pylint: disable=broad-except
+            self.handleError(record)
+
+
+class _NotRedirectedFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        return common.get_step_output() is None
+
+
+def get_parallel_parts() -> int:
+    """Return the number of parts to process concurrently.
+
+    It is set with SNAPCRAFT_PARALLEL_PARTS, parts are processed one at a time
+    by default.
+    """
+    value = os.getenv("SNAPCRAFT_PARALLEL_PARTS", "1")
+    try:
+        return max(int(value), 1)
+    except ValueError:
+        logger.warning(
+            f"Ignoring invalid value {value!r} for SNAPCRAFT_PARALLEL_PARTS."
+        )
+        return 1
+
+
+class Scheduler:
+    """Run the steps of a set of parts, concurrently where possible.
+
+    :param config: The project configuration.
+    :param run_node: Function running a step of a part.
+    :param jobs: The maximum number of nodes to run at the same time.
+    """
+
+    def __init__(
+        self,
+        config: "Config",
+        *,
+        run_node: Callable[[pluginhandler.PluginHandler, steps.Step], None],
+        jobs: int,
+    ) -> None:
+        self._config = config
+        self._run_node = run_node
+        self._jobs = jobs
+        self._nodes: List[_Node] = []
+        self._dependencies: Dict[_Node, Set[_Node]] = {}
+        self._outputs: Dict[_Node, IO] = {}
+        self._failures: Dict[_Node, BaseException] = {}
+        self._done: Set[_Node] = set()
+        self._running: Dict[Future, _Node] = {}
+        self._flushed = 0
+        # collisions only need to be checked again after a part is built
+        self._check_collisions = True
+
+    def run(self, parts: List[pluginhandler.PluginHandler], step: steps.Step) -> None:
+        """Run the lifecycle of parts until step.
+
+        Dependencies of the parts that are not in parts are run until the
+        step required by the parts.
+
+        :param parts: The parts to process, in lifecycle order.
+        :param step: The last step to run.
+        """
+        self._add_nodes(parts, step)
+
+        handler = _StepOutputHandler()
+        handler.setFormatter(logging.Formatter(style="{"))
+        not_redirected = _NotRedirectedFilter()
+        root_logger = logging.getLogger()
+        for root_handler in root_logger.handlers:
+            root_handler.addFilter(not_redirected)
+        root_logger.addHandler(handler)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self._jobs) as executor:
+                try:
+                    self._schedule(executor)
+                finally:
+                    # Let the running nodes finish before reporting errors.
+                    self._collect(list(self._running))
+        finally:
+            root_logger.removeHandler(handler)
+            for root_handler in root_logger.handlers:
+                root_handler.removeFilter(not_redirected)
+            self._flush(force=True)
+            for output in self._outputs.values():
+                output.close()
+
+        if self._failures:
+            # report the error the serial lifecycle would have hit first
+            first_failed = next(n for n in self._nodes if n in self._failures)
+            raise self._failures[first_failed]
+
+    def _schedule(self, executor: ThreadPoolExecutor) -> None:
+        while not self._failures:
+            ready = [
+                node
+                for node in self._nodes
+                if node not in self._outputs and self._dependencies[node] <= self._done
+            ]
+            for node in ready:
+                if node.step in _PARALLEL_STEPS:
+                    self._outputs[node] = tempfile.TemporaryFile()
+                    future = executor.submit(
+                        self._run_redirected, node, self._outputs[node]
+                    )
+                    self._running[future] = node
+
+            if self._running:
+                finished, _ = wait(self._running, return_when=FIRST_COMPLETED)
+                self._collect(finished)
+            elif ready:
+                # Stage and prime nodes only run while the workers are idle.
+                self._run_serial(ready[0])
+            else:
+                break
+
+            self._flush()
+
+    def _run_serial(self, node: _Node) -> None:
+        self._outputs[node] = tempfile.TemporaryFile()
+        try:
+            if node.step == steps.STAGE and self._check_collisions:
+                pluginhandler.check_for_collisions(self._config.all_parts)
+                self._check_collisions = False
+            self._run_redirected(node, self._outputs[node])
+        except Exception as error:  # pylint: disable=broad-except
+            self._failures[node] = error
+        self._done.add(node)
+
+    def _collect(self, finished: Iterable[Future]) -> None:
+        for future in finished:
+            node = self._running.pop(future)
+            error = future.exception()
+            if error is not None:
+                self._failures[node] = error
+            self._done.add(node)
+            if node.step == steps.BUILD:
+                self._check_collisions = True
+
+    def _add_nodes(self, parts: List[pluginhandler.PluginHandler], step: steps.Step):
+        pending = [(part, step) for part in parts]
+        while pending:
+            part, last_step = pending.pop(0)
+            for current_step in last_step.previous_steps() + [last_step]:
+                node = _Node(part, current_step)
+                if node in self._dependencies:
+                    continue
+                self._nodes.append(node)
+                self._dependencies[node] = set()
+
+                previous_step = current_step.previous_step()
+                if previous_step:
+                    self._dependencies[node].add(_Node(part, previous_step))
+
+                for dependency, prerequisite_step in self._get_dependencies(
+                    part, current_step
+                ):
+                    self._dependencies[node].add(_Node(dependency, prerequisite_step))
+                    pending.append((dependency, prerequisite_step))
+
+        # Keep the order of the serial lifecycle: step by step, then by part
+        # in the order of the project.
+        part_order = {part.name: i for i, part in enumerate(self._config.all_parts)}
+        self._nodes.sort(key=lambda n: (n.step, part_order[n.part.name]))
+
+    def _get_dependencies(self, part: pluginhandler.PluginHandler, step: steps.Step):
+        # Mirror _Executor._handle_part_dependencies
+        if part._build_attributes.core22_step_dependencies() and step == steps.PULL:
+            return []
+
+        prerequisite_step = steps.get_dependency_prerequisite_step(step)
+        return [
+            (dependency, prerequisite_step)
+            for dependency in self._config.parts.get_dependencies(part.name)
+        ]
+
+    def _run_redirected(self, node: _Node, output: IO) -> None:
+        with common.redirect_step_output(output):
+            self._run_node(node.part, node.step)
+
+    def _flush(self, *, force: bool = False) -> None:
+        """Write the output of done nodes in the order of the nodes."""
+        while self._flushed < len(self._nodes):
+            node = self._nodes[self._flushed]
+            if node not in self._done:
+                if not force:
+                    break
+            elif node in self._outputs:
+                _write_prefixed(node.part.name, self._outputs[node])
+            self._flushed += 1
+
+
+def _write_prefixed(part_name: str, output: IO) -> None:
+    output.seek(0)
+    for line in output.read().decode(errors="replace").splitlines():
+        logger.info(f"[{part_name}] {line}")
@@ -14,9 +14,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import logging
+import os
 import re
 import subprocess
-from typing import FrozenSet
+from concurrent.futures import ThreadPoolExecutor
+from typing import FrozenSet, Iterator, Optional
 
 from snapcraft_legacy import file_utils
 from snapcraft_legacy.internal import elf
@@ -24,21 +26,49 @@ from snapcraft_legacy.internal import elf
 logger = logging.getLogger(__name__)
 
 
+# The kernel truncates shebangs well before this, a longer first line is not
+# an interpreter line worth rewriting.
+_MAX_SHEBANG_LENGTH = 4096
+
+_ARGLESS_SHEBANG_PATTERN = re.compile(r"#!.*(python\S*)$")
+_SHEBANG_WITH_ARGS_PATTERN = re.compile(r"#!.*(python\S*)[ \t\f\v]+(\S+)$")
+
+
 def rewrite_python_shebangs(root_dir):
     """Recursively change #!/usr/bin/pythonX shebangs to #!/usr/bin/env pythonX
 
+    The tree is walked once and only the first line of files starting with
+    #! is read, scripts that need rewriting are rewritten concurrently.
+
     :param str root_dir: Directory that will be crawled for shebangs.
     """
+    with ThreadPoolExecutor() as executor:
+        # Consume the results to raise the first error.
+        for _ in executor.map(_rewrite_python_shebang, _walk_files(root_dir)):
+            pass
 
-    file_pattern = re.compile(r"")
-    argless_shebang_pattern = re.compile(r"\A#!.*(python\S*)$", re.MULTILINE)
-    shebang_pattern_with_args = re.compile(
-        r"\A#!.*(python\S*)[ \t\f\v]+(\S+)$", re.MULTILINE
-    )
 
-    file_utils.replace_in_file(
-        root_dir, file_pattern, argless_shebang_pattern, r"#!/usr/bin/env \1"
-    )
+def _walk_files(root_dir: str) -> Iterator[str]:
+    directories = [root_dir]
+    while directories:
+        try:
+            entries = os.scandir(directories.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                # Don't bother trying to rewrite a symlink. It's either
+                # invalid or the linked file will be rewritten on its own.
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path
+
+
+def _get_python_shebang(shebang: str) -> Optional[str]:
+    match = _ARGLESS_SHEBANG_PATTERN.match(shebang)
+    if match:
+        return match.expand(r"#!/usr/bin/env \1")
 
     # The above rewrite will barf if the shebang includes any args to python.
     # For example, if the shebang was `#!/usr/bin/python3 -Es`, just replacing
@@ -49,12 +79,56 @@ def rewrite_python_shebangs(root_dir):
     # then exec the original shebang with included arguments. This requires
     # some quoting hacks to ensure the file can be interpreted by both sh as
     # well as python, but it's better than shipping our own `env`.
-    file_utils.replace_in_file(
-        root_dir,
-        file_pattern,
-        shebang_pattern_with_args,
-        r"""#!/bin/sh\n''''exec \1 \2 -- "$0" "$@" # '''""",
-    )
+    match = _SHEBANG_WITH_ARGS_PATTERN.match(shebang)
+    if match:
+        return match.expand(r"""#!/bin/sh\n''''exec \1 \2 -- "$0" "$@" # '''""")
+
+    return None
+
+
+def _rewrite_python_shebang(file_path: str) -> None:
+    try:
+        with open(file_path, "rb") as f:
+            if f.read(2) != b"#!":
+                return
+            first_line = b"#!" + f.readline(_MAX_SHEBANG_LENGTH)
+            # A truncated first line is too long to be a shebang.
+            if not first_line.endswith(b"\n") and f.read(1):
+                return
+    except PermissionError as e:
+        logger.warning(
+            "Unable to open {path} for reading: {error}".format(path=file_path, error=e)
+        )
+        return
+
+    line_ending = b""
+    for ending in (b"\r\n", b"\n"):
+        if first_line.endswith(ending):
+            line_ending = ending
+            break
+    shebang_length = len(first_line)
+
+    try:
+        shebang = first_line[: shebang_length - len(line_ending)].decode()
+    except UnicodeDecodeError:
+        # This was probably a binary file. Skip it.
+        return
+
+    new_shebang = _get_python_shebang(shebang)
+    if new_shebang is None:
+        return
+
+    try:
+        with open(file_path, "r+b") as f:
+            f.seek(shebang_length)
+            contents = f.read()
+            f.seek(0)
+            f.truncate()
+            f.write(new_shebang.encode() + line_ending + contents)
+    except PermissionError as e:
+        logger.warning(
+            "Unable to open {path} for writing: {error}".format(path=file_path, error=e)
+        )
 
 
 def clear_execstack(*, elf_files: FrozenSet[elf.ElfFile]) -> None:
@@ -17,14 +17,15 @@
 import collections
 import contextlib
 import copy
-import filecmp
 import io
 import logging
 import os
 import pathlib
 import shutil
+import stat
 import subprocess
 import sys
+import threading
 from glob import iglob
 from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Set, cast
 
@@ -43,6 +44,7 @@ from snapcraft_legacy.internal import (
 from snapcraft_legacy.internal.mangling import clear_execstack
 
 from ._build_attributes import BuildAttributes
+from ._collisions import check_for_collisions  # noqa: F401
 from ._dependencies import MissingDependencyResolver
 from ._dirty_report import Dependency, DirtyReport  # noqa
 from ._metadata_extraction import extract_metadata
@@ -57,6 +59,10 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# The stage packages cache is shared by all parts and can only be used by
+# one part at a time.
+_stage_packages_lock = threading.Lock()
+
 
 class PluginHandler:
     @property
@@ -430,11 +436,13 @@ class PluginHandler:
 
         with open(states.get_step_state_file(self.part_state_dir, step), "w") as f:
             f.write(yaml_utils.dump(state))
+        states.forget_state(self.part_state_dir, step)
 
     def mark_cleaned(self, step):
         state_file = states.get_step_state_file(self.part_state_dir, step)
         if os.path.exists(state_file):
             os.remove(state_file)
+        states.forget_state(self.part_state_dir, step)
 
         if os.path.isdir(self.part_state_dir) and not os.listdir(self.part_state_dir):
             os.rmdir(self.part_state_dir)
@@ -465,12 +473,15 @@ class PluginHandler:
         stage_packages = self._grammar_processor.get_stage_packages()
         if stage_packages:
             try:
-                self.stage_packages = self._stage_packages_repo.fetch_stage_packages(
-                    package_names=stage_packages,
-                    base=self._project._get_build_base(),
-                    stage_packages_path=self.stage_packages_path,
-                    target_arch=self._project._get_stage_packages_target_arch(),
-                )
+                with _stage_packages_lock:
+                    self.stage_packages = (
+                        self._stage_packages_repo.fetch_stage_packages(
+                            package_names=stage_packages,
+                            base=self._project._get_build_base(),
+                            stage_packages_path=self.stage_packages_path,
+                            target_arch=self._project._get_stage_packages_target_arch(),
+                        )
+                    )
             except repo.errors.PackageNotFoundError as e:
                 raise errors.StagePackageDownloadError(self.name, e.message)
 
@@ -675,8 +686,13 @@ class PluginHandler:
         build_script_path.chmod(0o755)
 
         try:
+            output = common.get_step_output()
             subprocess.run(
-                [build_script_path], check=True, cwd=self.part_build_work_dir
+                [build_script_path],
+                check=True,
+                cwd=self.part_build_work_dir,
+                stdout=output,
+                stderr=output,
             )
         except subprocess.CalledProcessError as process_error:
             raise errors.SnapcraftPluginBuildError(
@@ -1035,8 +1051,9 @@ class PluginHandler:
         self.mark_cleaned(steps.PRIME)
 
     def _clean_shared_area(self, shared_directory, part_state, project_state):
-        primed_files = part_state.files
-        primed_directories = part_state.directories
+        # Copy the sets, loaded states are shared.
+        primed_files = set(part_state.files)
+        primed_directories = set(part_state.directories)
 
         # We want to make sure we don't remove a file or directory that's
         # being used by another part. So we'll examine the state for all parts
@@ -1249,6 +1266,8 @@ def _migrate_files(
 
         snapcraft_legacy.file_utils.create_similar_directory(src, dst)
 
+    migrated = []
+    links = []
     for snap_file in sorted(snap_files):
         src = os.path.join(srcdir, snap_file)
         dst = os.path.join(dstdir, snap_file)
@@ -1256,19 +1275,28 @@ def _migrate_files(
         if missing_ok and not os.path.exists(src):
             continue
 
+        try:
+            dst_mode: Optional[int] = os.lstat(dst).st_mode
+        except FileNotFoundError:
+            dst_mode = None
+
         # If the file is already here and it's a symlink, leave it alone.
-        if os.path.islink(dst):
+        if dst_mode is not None and stat.S_ISLNK(dst_mode):
             continue
 
         # Otherwise, remove and re-link it.
-        if os.path.exists(dst):
+        if dst_mode is not None:
             os.remove(dst)
 
         if src.endswith(".pc"):
             shutil.copy2(src, dst, follow_symlinks=follow_symlinks)
         else:
-            file_utils.link_or_copy(src, dst, follow_symlinks=follow_symlinks)
+            links.append((src, dst))
+        migrated.append(dst)
 
+    file_utils.link_or_copy_files(links, follow_symlinks=follow_symlinks)
+
+    for dst in migrated:
         fixup_func(dst)
 
 
@@ -1421,92 +1449,6 @@ def _validate_relative_paths(files):
             raise errors.PluginError('path "{}" must be relative'.format(d))
 
 
-def _file_collides(file_this, file_other):
-    if not file_this.endswith(".pc"):
-        return not filecmp.cmp(file_this, file_other, shallow=False)
-
-    pc_file_1 = open(file_this)
-    pc_file_2 = open(file_other)
-
-    try:
-        for lines in zip(pc_file_1, pc_file_2):
-            for line in zip(lines[0].split("\n"), lines[1].split("\n")):
-                if line[0].startswith("prefix="):
-                    continue
-                if line[0] != line[1]:
-                    return True
-    except Exception as e:
-        raise e from e
-    finally:
-        pc_file_1.close()
-        pc_file_2.close()
-    return False
-
-
-def check_for_collisions(parts):
-    """Raises a SnapcraftPartConflictError if conflicts are found."""
-    parts_files = {}
-    for part in parts:
-        # Gather our own files up
-        part_files, part_directories = part.migratable_fileset_for(steps.STAGE)
-        part_contents = part_files | part_directories
-
-        # Scan previous parts for collisions
-        for other_part_name in parts_files:
-            common = part_contents & parts_files[other_part_name]["files"]
-            conflict_files = []
-            for f in common:
-                this = os.path.join(part.part_install_dir, f)
-                other = os.path.join(parts_files[other_part_name]["installdir"], f)
-
-                if _paths_collide(this, other):
-                    conflict_files.append(f)
-
-            if conflict_files:
-                raise errors.SnapcraftPartConflictError(
-                    other_part_name=other_part_name,
-                    part_name=part.name,
-                    conflict_files=conflict_files,
-                )
-
-        # And add our files to the list
-        parts_files[part.name] = {
-            "files": part_contents,
-            "installdir": part.part_install_dir,
-        }
-
-
-def _paths_collide(path1: str, path2: str) -> bool:
-    if not (os.path.lexists(path1) and os.path.lexists(path2)):
-        return False
-
-    path1_is_dir = os.path.isdir(path1)
-    path2_is_dir = os.path.isdir(path2)
-    path1_is_link = os.path.islink(path1)
-    path2_is_link = os.path.islink(path2)
-
-    # Paths collide if they're both symlinks, but pointing to different places
-    if path1_is_link and path2_is_link:
-        return os.readlink(path1) != os.readlink(path2)
-
-    # Paths collide if one is a symlink, but not the other
-    elif path1_is_link or path2_is_link:
-        return True
-
-    # Paths collide if one is a directory, but not the other
-    elif path1_is_dir != path2_is_dir:
-        return True
-
-    # Paths collide if neither path is a directory, and the files have
-    # different contents
-    elif not (path1_is_dir and path2_is_dir) and _file_collides(path1, path2):
-        return True
-
-    # Otherwise, paths do not conflict
-    else:
-        return False
-
-
 def _get_includes(fileset):
     return [x for x in fileset if x[0] != "-"]
 
@@ -0,0 +1,196 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Set, Tuple
+
+from snapcraft_legacy import file_utils
+from snapcraft_legacy.internal import errors, steps
+
+if TYPE_CHECKING:
+    from . import PluginHandler
+
+# Digests of the files compared so far, keyed by path and the stat fields
+# that change when the file is rewritten.
+_DigestKey = Tuple[str, int, int, int, int]
+_digests: Dict[_DigestKey, str] = {}
+
+
+def _digest_key(path: str, path_stat: os.stat_result) -> _DigestKey:
+    return (
+        path,
+        path_stat.st_dev,
+        path_stat.st_ino,
+        path_stat.st_size,
+        path_stat.st_mtime_ns,
+    )
+
+
+def _get_digest(path: str) -> str:
+    return file_utils.calculate_hash(path, algorithm="sha256")
+
+
+def _pc_file_collides(file_this: str, file_other: str) -> bool:
+    with open(file_this) as pc_file_1, open(file_other) as pc_file_2:
+        for line_1, line_2 in zip(pc_file_1, pc_file_2):
+            if line_1.startswith("prefix="):
+                continue
+            if line_1.rstrip("\n") != line_2.rstrip("\n"):
+                return True
+    return False
+
+
+class _CollisionDetector:
+    """Find the staged paths that differ between parts.
+
+    All the parts are indexed in a single pass, only paths staged by more
+    than one part are compared. Files are compared by type, size and inode
+    first, contents are only compared by digest, and the digests needed are
+    computed in parallel.
+    """
+
+    def __init__(self, parts: Sequence["PluginHandler"]) -> None:
+        self._parts = parts
+        self._stats: Dict[str, Optional[os.stat_result]] = {}
+        # the parts staging each path, by index in parts
+        self._owners: Dict[str, List[int]] = {}
+
+    def check(self) -> None:
+        """Raise a SnapcraftPartConflictError if conflicts are found."""
+        for index, part in enumerate(self._parts):
+            part_files, part_directories = part.migratable_fileset_for(steps.STAGE)
+            for path in part_files | part_directories:
+                self._owners.setdefault(path, []).append(index)
+
+        shared = {
+            path: owners for path, owners in self._owners.items() if len(owners) > 1
+        }
+        self._compute_digests(shared)
+
+        # Report the first pair of parts, in the order of parts, with
+        # conflicting files.
+        conflicts: Dict[Tuple[int, int], List[str]] = {}
+        for path, owners in shared.items():
+            for i, index in enumerate(owners):
+                for other_index in owners[:i]:
+                    if self._paths_collide(path, index, other_index):
+                        conflicts.setdefault((index, other_index), []).append(path)
+
+        if conflicts:
+            index, other_index = min(conflicts)
+            raise errors.SnapcraftPartConflictError(
+                other_part_name=self._parts[other_index].name,
+                part_name=self._parts[index].name,
+                conflict_files=conflicts[(index, other_index)],
+            )
+
+    def _full_path(self, path: str, index: int) -> str:
+        return os.path.join(self._parts[index].part_install_dir, path)
+
+    def _lstat(self, full_path: str) -> Optional[os.stat_result]:
+        if full_path not in self._stats:
+            try:
+                self._stats[full_path] = os.lstat(full_path)
+            except FileNotFoundError:
+                self._stats[full_path] = None
+        return self._stats[full_path]
+
+    def _needs_digest(self, path: str, stat_1: os.stat_result, stat_2: os.stat_result):
+        return (
+            not path.endswith(".pc")
+            and stat.S_ISREG(stat_1.st_mode)
+            and stat.S_ISREG(stat_2.st_mode)
+            and stat_1.st_size == stat_2.st_size
+            and (stat_1.st_dev, stat_1.st_ino) != (stat_2.st_dev, stat_2.st_ino)
+        )
+
+    def _compute_digests(self, shared: Dict[str, List[int]]) -> None:
+        pending: Set[Tuple[str, _DigestKey]] = set()
+        for path, owners in shared.items():
+            full_paths = [self._full_path(path, index) for index in owners]
+            stats = [self._lstat(full_path) for full_path in full_paths]
+            for i, (full_path, path_stat) in enumerate(zip(full_paths, stats)):
+                if path_stat is None:
+                    continue
+                if not any(
+                    other_stat is not None
+                    and self._needs_digest(path, path_stat, other_stat)
+                    for j, other_stat in enumerate(stats)
+                    if j != i
+                ):
+                    continue
+                key = _digest_key(full_path, path_stat)
+                if key not in _digests:
+                    pending.add((full_path, key))
+
+        if not pending:
+            return
+
+        pending_list = list(pending)
+        with ThreadPoolExecutor() as executor:
+            digests = executor.map(_get_digest, [p for p, _ in pending_list])
+            for (_, key), digest in zip(pending_list, digests):
+                _digests[key] = digest
+
+    def _paths_collide(self, path: str, index: int, other_index: int) -> bool:
+        full_path_1 = self._full_path(path, index)
+        full_path_2 = self._full_path(path, other_index)
+        stat_1 = self._lstat(full_path_1)
+        stat_2 = self._lstat(full_path_2)
+        if stat_1 is None or stat_2 is None:
+            return False
+
+        path_1_is_link = stat.S_ISLNK(stat_1.st_mode)
+        path_2_is_link = stat.S_ISLNK(stat_2.st_mode)
+
+        # Paths collide if they're both symlinks, but pointing to different
+        # places, or if one is a symlink, but not the other.
+        if path_1_is_link and path_2_is_link:
+            return os.readlink(full_path_1) != os.readlink(full_path_2)
+        elif path_1_is_link or path_2_is_link:
+            return True
+
+        # Paths collide if one is a directory, but not the other.
+        path_1_is_dir = stat.S_ISDIR(stat_1.st_mode)
+        path_2_is_dir = stat.S_ISDIR(stat_2.st_mode)
+        if path_1_is_dir != path_2_is_dir:
+            return True
+        elif path_1_is_dir:
+            return False
+
+        # Files collide if they have different contents.
+        if path.endswith(".pc"):
+            return _pc_file_collides(full_path_1, full_path_2)
+        if (stat_1.st_dev, stat_1.st_ino) == (stat_2.st_dev, stat_2.st_ino):
+            return False
+        if stat_1.st_size != stat_2.st_size:
+            return True
+        if not (stat.S_ISREG(stat_1.st_mode) and stat.S_ISREG(stat_2.st_mode)):
+            return (
+                stat.S_IFMT(stat_1.st_mode) != stat.S_IFMT(stat_2.st_mode)
+                or stat_1.st_rdev != stat_2.st_rdev
+            )
+        return (
+            _digests[_digest_key(full_path_1, stat_1)]
+            != _digests[_digest_key(full_path_2, stat_2)]
+        )
+
+
+def check_for_collisions(parts: Sequence["PluginHandler"]) -> None:
+    """Raises a SnapcraftPartConflictError if conflicts are found."""
+    _CollisionDetector(parts).check()
@@ -162,8 +162,13 @@ class Runner:
                 script_file.flush()
                 script_file.seek(0)
 
+                output = common.get_step_output()
                 process = subprocess.Popen(
-                    [self._shell], stdin=script_file, cwd=workdir
+                    [self._shell],
+                    stdin=script_file,
+                    stdout=output,
+                    stderr=output,
+                    cwd=workdir,
                 )
 
             status = None
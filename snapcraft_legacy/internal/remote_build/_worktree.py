@@ -14,13 +14,16 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
 import logging
 import os
 import pathlib
 import shutil
 import subprocess
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
+from typing import Optional
 
 import snapcraft_legacy
 import snapcraft_legacy.internal.sources
@@ -37,7 +40,11 @@ class WorkTree:
     """Manages tree for remote-build project."""
 
     def __init__(
-        self, worktree_dir: str, project: Project, package_all_sources=False
+        self,
+        worktree_dir: str,
+        project: Project,
+        package_all_sources=False,
+        jobs: Optional[int] = None,
     ) -> None:
         """Create remote-build WorkTree.
 
@@ -45,9 +52,12 @@ class WorkTree:
         :param Project project: Snapcraft project.
         :param bool package_all_sources: Package all sources instead of
                the default of local-only sources.
+        :param int jobs: Number of parts to pull and archive concurrently,
+               defaults to the project's parallel build count.
         """
         self._project = project
         self._package_all_sources = package_all_sources
+        self._jobs = jobs if jobs else project.parallel_build_count
 
         # Get snapcraft yaml (as OrderedDict).
         self._snapcraft_config = (
@@ -144,13 +154,81 @@ class WorkTree:
         logger.debug("creating source archive: {}".format(archive_path))
 
         os.makedirs(os.path.split(archive_path)[0], exist_ok=True)
-        command = ["tar", "czf", archive_path, "-C", source_path, "."]
-        subprocess.check_call(command)
+        # Use a multi-threaded gzip if available.
+        if shutil.which("pigz"):
+            command = ["tar", "-I", "pigz", "-cf", archive_path]
+        else:
+            command = ["tar", "czf", archive_path]
+        subprocess.check_call(command + ["-C", source_path, "."])
+
+        return self._get_repo_relpath(archive_path)
+
+    def _get_repo_relpath(self, archive_path: str) -> str:
         relpath = os.path.relpath(archive_path, self._repo_dir)
 
         # Ensure Linux path formatting is used.
         return pathlib.Path(relpath).as_posix()
 
+    def _get_git_revision(self, source_handler) -> Optional[str]:
+        """Get the commit a git source resolves to without cloning it.
+
+        :return: The commit, or None if it could not be determined.
+        """
+        if source_handler.source_commit:
+            return source_handler.source_commit
+
+        if source_handler.source_tag:
+            tag = "refs/tags/" + source_handler.source_tag
+            # Annotated tags are peeled to the commit with ^{}.
+            refs = [tag + "^{}", tag]
+        elif source_handler.source_branch:
+            refs = ["refs/heads/" + source_handler.source_branch]
+        else:
+            refs = ["HEAD"]
+
+        try:
+            output = subprocess.check_output(
+                ["git", "ls-remote", source_handler.source] + refs,
+                stderr=subprocess.DEVNULL,
+                universal_newlines=True,
+            )
+        except (OSError, subprocess.CalledProcessError) as error:
+            logger.debug(f"cannot resolve {source_handler.source!r}: {error}")
+            return None
+
+        resolved_refs = {}
+        for line in output.splitlines():
+            commit, _, ref = line.partition("\t")
+            resolved_refs[ref] = commit
+        for ref in refs:
+            if ref in resolved_refs:
+                return resolved_refs[ref]
+        return None
+
+    def _get_source_stamp(self, source_handler) -> Optional[str]:
+        """Get a stamp identifying the revision of a source.
+
+        Only git sources can be identified without pulling them.
+
+        :return: The stamp, or None if the source has to be pulled.
+        """
+        if not isinstance(source_handler, snapcraft_legacy.internal.sources.Git):
+            return None
+
+        revision = self._get_git_revision(source_handler)
+        if revision is None:
+            return None
+
+        return json.dumps(
+            {
+                "source": source_handler.source,
+                "source-depth": source_handler.source_depth,
+                "source-submodules": source_handler.source_submodules,
+                "revision": revision,
+            },
+            sort_keys=True,
+        )
+
     def _pull_source(self, part_name: str, source: str, selector=None) -> str:
         """Pull source_url for part to source_dir. Returns source.
 
@@ -179,11 +257,30 @@ class WorkTree:
             logger.debug("passing through source for {}: {}".format(print_name, source))
             return source
 
+        # The archive of the last pull is kept next to the cache directory,
+        # reuse it if the source revision did not change.
+        stamp = self._get_source_stamp(source_handler)
+        stamp_path = download_dir + ".stamp"
+        cached_archive_path = download_dir + ".tar.gz"
+        if (
+            stamp is not None
+            and os.path.exists(cached_archive_path)
+            and _read_file(stamp_path) == stamp
+        ):
+            logger.info("Reusing packaged sources for {}...".format(print_name))
+            archive_path = self._get_part_tarball_path(part_name, selector)
+            os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+            shutil.copyfile(cached_archive_path, archive_path)
+            return self._get_repo_relpath(archive_path)
+
         logger.info("Packaging sources for {}...".format(print_name))
 
         # Remove existing cache directory (if exists)
         if os.path.exists(download_dir):
             rmtree(download_dir)
+        for path in (stamp_path, cached_archive_path):
+            if os.path.exists(path):
+                os.unlink(path)
 
         # Pull sources, but create directory first if part
         # is configured to use the `dump` plugin.
@@ -193,7 +290,15 @@ class WorkTree:
         source_handler.pull()
 
         # Create source archive.
-        return self._archive_part_sources(part_name, selector)
+        relpath = self._archive_part_sources(part_name, selector)
+
+        if stamp is not None:
+            archive_path = self._get_part_tarball_path(part_name, selector)
+            shutil.copyfile(archive_path, cached_archive_path)
+            with open(stamp_path, "w") as stamp_file:
+                stamp_file.write(stamp)
+
+        return relpath
 
     def _process_part_sources(
         self, part_name: str, part_config: OrderedDict
@@ -321,10 +426,14 @@ class WorkTree:
         # Create sources directory for source archives.
         os.makedirs(self._repo_sources_dir, exist_ok=True)
 
-        # Process each part with sources.
-        for part_name, part_config in self._snapcraft_config["parts"].items():
-            part_config = self._process_part_sources(part_name, part_config)
-            self._prepared_snapcraft_config["parts"][part_name] = part_config
+        # Process each part with sources, parts are independent of each other.
+        parts = self._snapcraft_config["parts"]
+        with ThreadPoolExecutor(max_workers=self._jobs) as executor:
+            prepared_parts = executor.map(
+                self._process_part_sources, parts.keys(), parts.values()
+            )
+            for part_name, part_config in zip(list(parts.keys()), prepared_parts):
+                self._prepared_snapcraft_config["parts"][part_name] = part_config
 
         # Set version.
         self._set_prepared_project_version()
@@ -335,3 +444,11 @@ class WorkTree:
             yaml_utils.dump(self._prepared_snapcraft_config, stream=f)
 
         return self._repo_dir
+
+
+def _read_file(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
@@ -14,8 +14,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import contextlib
 import fileinput
-import functools
 import logging
 import os
 import pathlib
@@ -23,6 +23,8 @@ import re
 import subprocess
 import sys
 import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Sequence, Set, Tuple  # noqa: F401
 
 from xdg import BaseDirectory
@@ -30,8 +32,9 @@ from xdg import BaseDirectory
 from snapcraft_legacy import file_utils
 from snapcraft_legacy.internal.indicators import is_dumb_terminal
 
-from . import errors
+from . import dpkg_db, errors
 from ._base import BaseRepo, get_pkg_name_parts
+from ._deb_extractor import DebFile, parse_control
 from .deb_package import DebPackage
 
 if sys.platform == "linux":
@@ -46,6 +49,11 @@ _DEB_CACHE_DIR: pathlib.Path = pathlib.Path(
 _STAGE_CACHE_DIR: pathlib.Path = pathlib.Path(
     BaseDirectory.save_cache_path("snapcraft", "stage-packages")
 )
+_EXTRACTED_DEB_CACHE_DIR: pathlib.Path = pathlib.Path(
+    BaseDirectory.save_cache_path("snapcraft", "extracted-debs")
+)
+# Extracted packages not used for this long, in seconds, are evicted.
+_EXTRACTED_DEB_MAX_AGE = 30 * 24 * 60 * 60
 
 _HASHSUM_MISMATCH_PATTERN = re.compile(r"(E:Failed to fetch.+Hash Sum mismatch)+")
 _DEFAULT_FILTERED_STAGE_PACKAGES: List[str] = [
@@ -207,39 +215,12 @@ IGNORE_FILTERS: Dict[str, Set[str]] = {
 }
 
 
-@functools.lru_cache(maxsize=256)
-def _run_dpkg_query_search(file_path: pathlib.Path) -> str:
-    try:
-        output = (
-            subprocess.check_output(
-                ["dpkg-query", "-S", file_path],
-                stderr=subprocess.STDOUT,
-                env=dict(LANG="C.UTF-8"),
-            )
-            .decode()
-            .strip()
-        )
-    except subprocess.CalledProcessError as call_error:
-        logger.debug(f"Error finding package for {file_path}: {call_error}")
-        raise errors.FileProviderNotFound(file_path=file_path) from call_error
-
-    # Remove diversions
-    provides_output = [p for p in output.splitlines() if not p.startswith("diversion")][
-        0
-    ]
-    return provides_output.split(":")[0]
-
-
-@functools.lru_cache(maxsize=256)
-def _run_dpkg_query_list_files(package_name: str) -> Set[str]:
-    output = (
-        subprocess.check_output(["dpkg", "-L", package_name])
-        .decode(sys.getfilesystemencoding())
-        .strip()
-        .split()
-    )
-
-    return {i for i in output if ("lib" in i and os.path.isfile(i))}
+def _get_package_for_path(file_path: pathlib.Path) -> str:
+    package_name = dpkg_db.get_database().get_package_for_path(str(file_path))
+    if package_name is None:
+        logger.debug(f"Error finding package for {file_path}")
+        raise errors.FileProviderNotFound(file_path=file_path)
+    return package_name
 
 
 def _get_dpkg_list_path(base: str) -> pathlib.Path:
@@ -280,23 +261,46 @@ def get_packages_in_base(*, base: str) -> List[DebPackage]:
     return package_list
 
 
+def _evict_extracted_debs() -> None:
+    """Remove the extracted packages that were not used recently."""
+    oldest = time.time() - _EXTRACTED_DEB_MAX_AGE
+    with os.scandir(_EXTRACTED_DEB_CACHE_DIR) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.stat(follow_symlinks=False).st_mtime >= oldest:
+                continue
+            logger.debug(f"Evicting extracted package {entry.name!r}")
+            # Renamed first, so that a concurrent build never uses it partially
+            # removed.
+            evicted_path = os.path.join(
+                _EXTRACTED_DEB_CACHE_DIR, f".evict-{entry.name}-{os.getpid()}"
+            )
+            try:
+                os.rename(entry.path, evicted_path)
+                file_utils.rmtree(evicted_path)
+            except OSError as error:
+                logger.debug(f"Unable to evict {entry.path!r}: {error}")
+
+
 class Ubuntu(BaseRepo):
     @classmethod
     def get_package_libraries(cls, package_name: str) -> Set[str]:
-        return _run_dpkg_query_list_files(package_name)
+        package_files = dpkg_db.get_database().get_package_files(package_name)
+        return {i for i in package_files if ("lib" in i and os.path.isfile(i))}
 
     @classmethod
     def get_package_for_file(cls, file_path: str) -> str:
         try:
             absolute_file_path = pathlib.Path(os.path.sep, file_path)
             logger.debug(f"searching for {absolute_file_path}")
-            return _run_dpkg_query_search(absolute_file_path)
+            return _get_package_for_path(absolute_file_path)
         except errors.FileProviderNotFound:
             # follow symlinks to custom library paths
             # or to libraries moved by usrmerge
             real_file_path = pathlib.Path(os.path.sep, file_path).resolve()
             logger.debug(f"searching for {real_file_path}")
-            return _run_dpkg_query_search(real_file_path)
+            return _get_package_for_path(real_file_path)
 
     @classmethod
     def get_packages_for_source_type(cls, source_type):
@@ -329,6 +333,9 @@ class Ubuntu(BaseRepo):
             raise errors.CacheUpdateFailedError(
                 "failed to run apt update"
             ) from call_error
+        finally:
+            # The package lists may have changed.
+            AptCache.close_sessions()
 
     @classmethod
     def _check_if_all_packages_installed(cls, package_names: List[str]) -> bool:
@@ -457,6 +464,9 @@ class Ubuntu(BaseRepo):
             subprocess.check_call(apt_command + package_names, env=env)
         except subprocess.CalledProcessError:
             raise errors.BuildPackagesNotInstalledError(packages=package_names)
+        finally:
+            # The installed packages may have changed.
+            AptCache.close_sessions()
 
         versionless_names = [get_pkg_name_parts(p)[0] for p in package_names]
         try:
@@ -511,20 +521,25 @@ class Ubuntu(BaseRepo):
     def unpack_stage_packages(
         cls, *, stage_packages_path: pathlib.Path, install_path: pathlib.Path
     ) -> None:
-        pkg_path = None
-
-        for pkg_path in stage_packages_path.glob("*.deb"):
-            with tempfile.TemporaryDirectory(suffix="deb-extract") as extract_dir:
-                # Extract deb package.
-                cls._extract_deb(pkg_path, extract_dir)
-                # Mark source of files.
-                marked_name = cls._extract_deb_name_version(pkg_path)
-                cls._mark_origin_stage_package(extract_dir, marked_name)
-                # Stage files to install_dir.
-                file_utils.link_or_copy_tree(extract_dir, install_path.as_posix())
-
-        if pkg_path:
+        deb_paths = list(stage_packages_path.glob("*.deb"))
+
+        # Extract packages concurrently, but stage them in order as files from
+        # a package replace the files from the packages before it.
+        with ThreadPoolExecutor() as executor:
+            extract_dirs = list(executor.map(cls._get_extracted_deb, deb_paths))
+
+        for extract_dir in extract_dirs:
+            # Extracted packages are shared, so they are cloned or copied
+            # rather than hard-linked: the files in the install directory
+            # are modified in place when normalized or by scriptlets. Hard
+            # links within a package end up as separate copies.
+            file_utils.link_or_copy_tree(
+                str(extract_dir), install_path.as_posix(), copy_function=file_utils.copy
+            )
+
+        if deb_paths:
             cls.normalize(str(install_path))
+            _evict_extracted_debs()
 
     @classmethod
     def build_package_is_valid(cls, package_name) -> bool:
@@ -545,15 +560,61 @@ class Ubuntu(BaseRepo):
             ]
 
     @classmethod
-    def _extract_deb_name_version(cls, deb_path: pathlib.Path) -> str:
+    def _get_deb_control(cls, deb_file: DebFile) -> Dict[str, str]:
+        control = deb_file.get_control()
+        if control is not None:
+            return control
+
         try:
             output = subprocess.check_output(
-                ["dpkg-deb", "--show", "--showformat=${Package}=${Version}", deb_path]
+                [
+                    "dpkg-deb",
+                    "--field",
+                    deb_file.deb_path,
+                    "Package",
+                    "Version",
+                    "Architecture",
+                ]
             )
         except subprocess.CalledProcessError:
+            raise errors.UnpackError(deb_file.deb_path)
+
+        return parse_control(output.decode())
+
+    @classmethod
+    def _get_extracted_deb(cls, deb_path: pathlib.Path) -> pathlib.Path:
+        """Return the directory with the files of deb_path, marked with their origin.
+
+        Packages are extracted once for each name, version and architecture,
+        and kept in a cache shared by all projects.
+        """
+        deb_file = DebFile(deb_path)
+        control = cls._get_deb_control(deb_file)
+        try:
+            name_version = "{Package}={Version}".format(**control)
+            cache_key = "{Package}_{Version}_{Architecture}".format(**control)
+        except KeyError:
             raise errors.UnpackError(deb_path)
 
-        return output.decode().strip()
+        extract_dir = _EXTRACTED_DEB_CACHE_DIR / cache_key.replace(":", "%3a")
+        with contextlib.suppress(FileNotFoundError):
+            # Record the use, for eviction.
+            os.utime(extract_dir)
+            return extract_dir
+
+        with tempfile.TemporaryDirectory(
+            dir=_EXTRACTED_DEB_CACHE_DIR, prefix=".extract-"
+        ) as temp_dir:
+            temp_extract_dir = os.path.join(temp_dir, "files")
+            os.mkdir(temp_extract_dir)
+            if not deb_file.extract(temp_extract_dir, stage_package=name_version):
+                cls._extract_deb(deb_path, temp_extract_dir)
+                cls._mark_origin_stage_package(temp_extract_dir, name_version)
+            # Another build may have cached the same package in the meantime.
+            with contextlib.suppress(OSError):
+                os.rename(temp_extract_dir, extract_dir)
+
+        return extract_dir
 
     @classmethod
     def _extract_deb(cls, deb_path: pathlib.Path, extract_dir: str) -> None:
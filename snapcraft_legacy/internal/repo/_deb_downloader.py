@@ -0,0 +1,152 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Download Debian packages from their archives concurrently.
+
+Packages are kept in a cache addressed by the SHA256 listed in the package
+index, which can be shared by projects and architectures. Hashes are
+verified as packages are downloaded.
+"""
+
+import contextlib
+import hashlib
+import http.client
+import logging
+import os
+import pathlib
+import tempfile
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from . import errors
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 1024 * 1024
+_SUPPORTED_SCHEMES = ("http", "https", "file")
+# In seconds, for connecting and for each read.
+_TIMEOUT = 60
+
+
+class DebArchive(NamedTuple):
+    """A package to download, as listed in the package index."""
+
+    uri: str
+    sha256: str
+    file_name: str
+
+
+class DebDownloader:
+    """Download packages into a content addressed cache.
+
+    :param cache_dir: The directory to keep downloaded packages in.
+    :param downloads_per_host: The number of concurrent downloads per host.
+    :param proxies: The proxy to use by URL scheme, the environment is used
+                    if None.
+    """
+
+    def __init__(
+        self,
+        cache_dir: pathlib.Path,
+        *,
+        downloads_per_host: int,
+        proxies: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self._cache_dir = cache_dir
+        self._downloads_per_host = downloads_per_host
+        self._opener = urllib.request.build_opener(urllib.request.ProxyHandler(proxies))
+
+    def get_cache_path(self, archive: DebArchive) -> pathlib.Path:
+        return self._cache_dir / "sha256" / archive.sha256 / archive.file_name
+
+    def download(self, archives: Sequence[DebArchive]) -> List[Optional[pathlib.Path]]:
+        """Download archives not in the cache yet.
+
+        :return: the path in the cache of each archive, or None if it could
+                 not be downloaded (no hash, unsupported URI or request
+                 error), for it to be fetched otherwise.
+        :raises PackageFetchError: If an archive does not match its hash.
+        """
+        paths: List[Optional[pathlib.Path]] = [None] * len(archives)
+        host_archives: Dict[str, List[int]] = {}
+        for index, archive in enumerate(archives):
+            if not archive.sha256:
+                continue
+            cache_path = self.get_cache_path(archive)
+            if cache_path.exists():
+                logger.debug(f"Using cached {archive.file_name}")
+                paths[index] = cache_path
+                continue
+            scheme, netloc = urllib.parse.urlsplit(archive.uri)[:2]
+            if scheme in _SUPPORTED_SCHEMES:
+                host_archives.setdefault(f"{scheme}://{netloc}", []).append(index)
+
+        if not host_archives:
+            return paths
+
+        host_slots = {
+            host: threading.BoundedSemaphore(self._downloads_per_host)
+            for host in host_archives
+        }
+
+        def download_from_host(host: str, archive: DebArchive):
+            with host_slots[host]:
+                return self._download(archive)
+
+        with ThreadPoolExecutor(
+            max_workers=self._downloads_per_host * len(host_archives)
+        ) as executor:
+            futures = {
+                index: executor.submit(download_from_host, host, archives[index])
+                for host, indexes in host_archives.items()
+                for index in indexes
+            }
+        for index, future in futures.items():
+            paths[index] = future.result()
+        return paths
+
+    def _download(self, archive: DebArchive) -> Optional[pathlib.Path]:
+        cache_path = self.get_cache_path(archive)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        logger.debug(f"Downloading {archive.uri}")
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=cache_path.parent, prefix=".download-")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                try:
+                    with self._opener.open(archive.uri, timeout=_TIMEOUT) as response:
+                        for chunk in iter(lambda: response.read(_CHUNK_SIZE), b""):
+                            digest.update(chunk)
+                            temp_file.write(chunk)
+                except (OSError, http.client.HTTPException) as error:
+                    logger.debug(f"Cannot download {archive.uri}: {error}")
+                    return None
+
+            if digest.hexdigest() != archive.sha256:
+                raise errors.PackageFetchError(f"Hash Sum mismatch for {archive.uri}")
+
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, cache_path)
+        finally:
+            # Gone once moved to the cache.
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(temp_path)
+        return cache_path
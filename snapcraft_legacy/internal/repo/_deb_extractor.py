@@ -0,0 +1,223 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Read Debian packages without running dpkg-deb.
+
+A .deb is an ar archive with a control tarball, with the package metadata,
+and a data tarball, with the files to install. Tarballs compressed with
+gzip, bzip2 or xz are read in-process, other compressions (zstd) are left to
+dpkg-deb.
+"""
+
+import io
+import os
+import pathlib
+import tarfile
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from snapcraft_legacy.internal import xattrs
+
+from . import errors
+
+_AR_MAGIC = b"!<arch>\n"
+_AR_HEADER_SIZE = 60
+
+_SUPPORTED_TARBALLS = ("tar", "tar.gz", "tar.bz2", "tar.xz")
+
+_TAR_FILTER = {"filter": "fully_trusted"} if hasattr(tarfile, "data_filter") else {}
+
+
+class _ArMember(io.RawIOBase):
+    """A member of an ar archive, read from the open archive."""
+
+    def __init__(self, archive: IO[bytes], size: int) -> None:
+        super().__init__()
+        self._archive = archive
+        self._remaining = size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._archive.read(min(len(buffer), self._remaining))
+        buffer[: len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+def _iter_ar_members(archive: IO[bytes]) -> Iterator[Tuple[str, int]]:
+    """Yield the name and size of each member, positioned at its data."""
+    if archive.read(len(_AR_MAGIC)) != _AR_MAGIC:
+        raise ValueError("not an ar archive")
+
+    offset = len(_AR_MAGIC)
+    while True:
+        archive.seek(offset)
+        header = archive.read(_AR_HEADER_SIZE)
+        if len(header) < _AR_HEADER_SIZE:
+            return
+        name = header[0:16].decode().strip().rstrip("/")
+        size = int(header[48:58].decode().strip())
+        yield name, size
+        # Members are aligned to an even offset.
+        offset += _AR_HEADER_SIZE + size + size % 2
+
+
+class DebFile:
+    """A Debian package file.
+
+    :param deb_path: The path to the .deb.
+    """
+
+    def __init__(self, deb_path: pathlib.Path) -> None:
+        self.deb_path = deb_path
+        self._control: Optional[Dict[str, str]] = None
+
+    def _open_tarball(self, archive: IO[bytes], prefix: str) -> Optional[IO[bytes]]:
+        """Return a reader for the tarball member starting with prefix.
+
+        :return: None if the tarball is not compressed in a supported format.
+        """
+        try:
+            for name, size in _iter_ar_members(archive):
+                if not name.startswith(prefix):
+                    continue
+                if name[len(prefix) :] not in _SUPPORTED_TARBALLS:
+                    return None
+                return io.BufferedReader(_ArMember(archive, size))
+        except ValueError as error:
+            raise errors.UnpackError(self.deb_path) from error
+
+        raise errors.UnpackError(self.deb_path)
+
+    def get_control(self) -> Optional[Dict[str, str]]:
+        """Return the fields of the control file.
+
+        :return: None if the control tarball cannot be read in-process.
+        :raises UnpackError: If the package is not valid.
+        """
+        if self._control is not None:
+            return self._control
+
+        with open(self.deb_path, "rb") as archive:
+            tarball = self._open_tarball(archive, "control.")
+            if tarball is None:
+                return None
+            try:
+                with tarfile.open(fileobj=tarball, mode="r|*") as tar:
+                    control_file = next(
+                        (
+                            tar.extractfile(member)
+                            for member in tar
+                            if os.path.normpath(member.name) == "control"
+                        ),
+                        None,
+                    )
+                    if control_file is None:
+                        raise errors.UnpackError(self.deb_path)
+                    self._control = parse_control(control_file.read().decode())
+            except tarfile.TarError as error:
+                raise errors.UnpackError(self.deb_path) from error
+
+        return self._control
+
+    def extract(self, extract_dir: str, *, stage_package: str) -> bool:
+        """Extract the files of the package to extract_dir.
+
+        The origin of the files is marked once they are all extracted.
+
+        :param extract_dir: The directory to extract to.
+        :param stage_package: The origin to mark the files with.
+
+        :return: False if the data tarball cannot be read in-process.
+        :raises UnpackError: If the package is not valid or cannot be extracted.
+        """
+        file_names: List[str] = []
+        with open(self.deb_path, "rb") as archive:
+            tarball = self._open_tarball(archive, "data.")
+            if tarball is None:
+                return False
+            try:
+                with tarfile.open(fileobj=tarball, mode="r|*") as tar:
+                    # extractall creates directories writable and applies their
+                    # modes last, so read-only directories can be filled in.
+                    tar.extractall(
+                        extract_dir,
+                        members=self._iter_members(tar, extract_dir, file_names),
+                        numeric_owner=True,
+                        **_TAR_FILTER,
+                    )
+            except (tarfile.TarError, OSError) as error:
+                raise errors.UnpackError(self.deb_path) from error
+
+        for name in file_names:
+            xattrs.write_origin_stage_package(
+                os.path.join(extract_dir, name), stage_package
+            )
+        return True
+
+    def _iter_members(
+        self, tar: tarfile.TarFile, extract_dir: str, file_names: List[str]
+    ) -> Iterator[tarfile.TarInfo]:
+        """Yield the members of the data tarball, collecting the file names.
+
+        Symbolic links are yielded last, as dpkg does, so that no member is
+        extracted through a link pointing outside of extract_dir.
+
+        :raises UnpackError: If a member would be extracted outside of
+            extract_dir.
+        """
+        symlinks: List[tarfile.TarInfo] = []
+        for member in tar:
+            self._check_member(member, extract_dir)
+            if member.issym():
+                symlinks.append(member)
+                continue
+            if member.isfile() or member.islnk():
+                file_names.append(os.path.normpath(member.name))
+            yield member
+
+        for member in symlinks:
+            # Links created before can lead anywhere.
+            self._check_member(member, extract_dir)
+            yield member
+
+    def _check_member(self, member: tarfile.TarInfo, extract_dir: str) -> None:
+        """Check that member and its hard link target are in extract_dir."""
+        paths = [member.name]
+        if member.islnk():
+            paths.append(member.linkname)
+
+        root = os.path.realpath(extract_dir)
+        for path in paths:
+            name = os.path.normpath(path)
+            if name.startswith(("/", "..")):
+                raise errors.UnpackError(self.deb_path)
+            parent = os.path.realpath(os.path.join(root, os.path.dirname(name)))
+            if os.path.commonpath([root, parent]) != root:
+                raise errors.UnpackError(self.deb_path)
+
+
+def parse_control(control: str) -> Dict[str, str]:
+    """Return the fields of a Debian control file."""
+    fields: Dict[str, str] = {}
+    for line in control.splitlines():
+        # Continuation lines of multiline fields are not needed.
+        if not line or line[0].isspace() or ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        fields[key] = value.strip()
+    return fields
@@ -14,19 +14,21 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
 import logging
 import os
 import re
 import shutil
+import threading
 from contextlib import ContextDecorator
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import ClassVar, Dict, List, Optional, Set, Tuple
 
 import apt
 
 from snapcraft_legacy.internal import common
 from snapcraft_legacy.internal.indicators import is_dumb_terminal
-from snapcraft_legacy.internal.repo import errors
+from snapcraft_legacy.internal.repo import _deb_downloader, errors
 from snapcraft_legacy.internal.repo._base import get_pkg_name_parts
 
 logger = logging.getLogger(__name__)
@@ -34,9 +36,38 @@ logger = logging.getLogger(__name__)
 
 _HASHSUM_MISMATCH_PATTERN = re.compile(r"(E:Failed to fetch.+Hash Sum mismatch)+")
 
+# The number of concurrent downloads per host when fetching archives.
+_DOWNLOADS_PER_HOST = 4
+
+_SessionKey = Tuple[Optional[Path], Optional[str]]
+
+
+def _get_apt_config_digest(etc_apt_path: Path, arch: Optional[str]) -> str:
+    """Return a digest of the apt configuration in etc_apt_path.
+
+    Symlinks are followed, as they are when the configuration is copied.
+    """
+    digest = hashlib.sha256(f"{arch}\0".encode())
+    for root, directories, files in os.walk(etc_apt_path, followlinks=True):
+        directories.sort()
+        for file_name in sorted(files):
+            file_path = Path(root, file_name)
+            digest.update(f"{file_path.relative_to(etc_apt_path)}\0".encode())
+            digest.update(f"{file_path.stat().st_mode}\0".encode())
+            digest.update(file_path.read_bytes())
+    return digest.hexdigest()
+
 
 class AptCache(ContextDecorator):
-    """Transient cache for use with stage-packages, or read-only host-mode for build-packages."""
+    """Transient cache for use with stage-packages, or read-only host-mode for build-packages.
+
+    The underlying apt cache is opened once per configuration and shared by
+    every AptCache entered with it, until close_sessions() is called. Only
+    one AptCache per configuration can be entered at a time.
+    """
+
+    _sessions: ClassVar[Dict[_SessionKey, apt.Cache]] = dict()
+    _sessions_lock: ClassVar[threading.RLock] = threading.RLock()
 
     def __init__(
         self,
@@ -48,18 +79,49 @@ class AptCache(ContextDecorator):
         self.stage_cache_arch = stage_cache_arch
 
     def __enter__(self) -> "AptCache":
+        self._sessions_lock.acquire()
+        try:
+            self.cache = self._open_session()
+        except BaseException:
+            self._sessions_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._sessions_lock.release()
+
+    def _open_session(self) -> apt.Cache:
+        key = (self.stage_cache, self.stage_cache_arch)
+        cache = self._sessions.get(key)
+        if cache is not None:
+            if self.stage_cache is not None:
+                self._configure_apt()
+            # Drop the changes marked by the previous user.
+            cache.clear()
+            return cache
+
         if self.stage_cache is not None:
             self._configure_apt()
             self._populate_stage_cache_dir()
-            self.cache = apt.Cache(rootdir=str(self.stage_cache), memonly=True)
+            cache = apt.Cache(rootdir=str(self.stage_cache), memonly=True)
         else:
             # There appears to be a slowdown when using `rootdir` = '/' with
             # apt.Cache().  Do not set it for the host cache.
-            self.cache = apt.Cache()
-        return self
+            cache = apt.Cache()
+        self._sessions[key] = cache
+        return cache
 
-    def __exit__(self, *exc) -> None:
-        self.cache.close()
+    @classmethod
+    def close_sessions(cls) -> None:
+        """Close the shared apt caches.
+
+        This must be called when the package lists or installed packages
+        change, so the next AptCache reads them again.
+        """
+        with cls._sessions_lock:
+            for cache in cls._sessions.values():
+                cache.close()
+            cls._sessions.clear()
 
     def _configure_apt(self):
         # Do not install recommends.
@@ -100,11 +162,12 @@ class AptCache(ContextDecorator):
     def _populate_stage_cache_dir(self) -> None:
         """Create/refresh cache configuration.
 
-        (1) Delete old-style symlink cache, if symlink.
-        (2) Delete current-style (copied) tree.
-        (3) Copy current host apt configuration.
-        (4) Configure primary arch to target arch.
-        (5) Install dpkg into cache directory to support multi-arch.
+        (1) Skip to (6) if the host apt configuration is unchanged.
+        (2) Delete old-style symlink cache, if symlink.
+        (3) Delete current-style (copied) tree.
+        (4) Copy current host apt configuration.
+        (5) Configure primary arch to target arch.
+        (6) Install dpkg into cache directory to support multi-arch.
         """
         if self.stage_cache is None:
             return
@@ -112,7 +175,39 @@ class AptCache(ContextDecorator):
         # Copy apt configuration from host.
         etc_apt_path = Path("/etc/apt")
         cache_etc_apt_path = Path(self.stage_cache, "etc", "apt")
+        digest_path = Path(self.stage_cache, "etc", "apt.sha256")
+
+        try:
+            digest = _get_apt_config_digest(etc_apt_path, self.stage_cache_arch)
+        except OSError as error:
+            raise errors.PopulateCacheDirError(
+                [(etc_apt_path, cache_etc_apt_path, error)]
+            ) from error
+
+        if (
+            cache_etc_apt_path.is_dir()
+            and not cache_etc_apt_path.is_symlink()
+            and digest_path.exists()
+            and digest_path.read_text() == digest
+        ):
+            logger.debug("Reusing the stage cache apt configuration")
+        else:
+            self._copy_apt_config(etc_apt_path, cache_etc_apt_path)
+            digest_path.write_text(digest)
 
+        # dpkg also needs to be in the rootdir in order to support multiarch
+        # (apt calls dpkg --print-foreign-architectures).
+        dpkg_path = shutil.which("dpkg")
+        if dpkg_path:
+            # Symlink it into place
+            destination = Path(self.stage_cache, dpkg_path[1:])
+            if not destination.exists():
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                os.symlink(dpkg_path, destination)
+        else:
+            logger.warning("Cannot find 'dpkg' command needed to support multiarch")
+
+    def _copy_apt_config(self, etc_apt_path: Path, cache_etc_apt_path: Path) -> None:
         # Delete potentially outdated cache configuration.
         if cache_etc_apt_path.is_symlink():
             cache_etc_apt_path.unlink()
@@ -142,18 +237,6 @@ class AptCache(ContextDecorator):
             arch_conf_path = cache_etc_apt_path / "apt.conf.d" / "00default-arch"
             arch_conf_path.write_text(f'APT::Architecture "{self.stage_cache_arch}";\n')
 
-        # dpkg also needs to be in the rootdir in order to support multiarch
-        # (apt calls dpkg --print-foreign-architectures).
-        dpkg_path = shutil.which("dpkg")
-        if dpkg_path:
-            # Symlink it into place
-            destination = Path(self.stage_cache, dpkg_path[1:])
-            if not destination.exists():
-                destination.parent.mkdir(parents=True, exist_ok=True)
-                os.symlink(dpkg_path, destination)
-        else:
-            logger.warning("Cannot find 'dpkg' command needed to support multiarch")
-
     def _autokeep_packages(self) -> None:
         # If the package has been installed automatically as a dependency
         # of another package, and if no packages depend on it anymore,
@@ -205,21 +288,65 @@ class AptCache(ContextDecorator):
                 package_version = self.cache[package_name].installed.version  # type: ignore
         return package_version
 
-    def fetch_archives(self, download_path: Path) -> List[Tuple[str, str, Path]]:
-        """Fetches archives, list of (<package-name>, <package-version>, <dl-path>)."""
-        downloaded = list()
-        for package in self.cache.get_changes():
-            try:
-                dl_path = package.candidate.fetch_binary(str(download_path))  # type: ignore
-            except apt.package.FetchError as e:
-                raise errors.PackageFetchError(str(e))
+    def fetch_archives(
+        self, download_path: Path, *, downloads_per_host: int = _DOWNLOADS_PER_HOST
+    ) -> List[Tuple[str, str, Path]]:
+        """Fetches archives, list of (<package-name>, <package-version>, <dl-path>).
+
+        Archives are downloaded concurrently into a cache in download_path
+        addressed by their SHA256, archives that cannot be downloaded that way
+        are fetched by apt.
 
+        :param download_path: The directory to download archives to.
+        :param downloads_per_host: The number of concurrent downloads per
+                                   host, 0 to only fetch with apt.
+        """
+        packages = list(self.cache.get_changes())
+        for package in packages:
             if package.candidate is None:
                 raise errors.PackageNotFoundError(package.name)
 
-            downloaded.append((package.name, package.candidate.version, Path(dl_path)))
+        if downloads_per_host > 0:
+            downloader = _deb_downloader.DebDownloader(
+                download_path,
+                downloads_per_host=downloads_per_host,
+                proxies=self._get_proxies(),
+            )
+            dl_paths = downloader.download(
+                [
+                    _deb_downloader.DebArchive(
+                        uri=package.candidate.uri or "",  # type: ignore
+                        sha256=package.candidate.sha256 or "",  # type: ignore
+                        file_name=os.path.basename(
+                            package.candidate.filename  # type: ignore
+                        ),
+                    )
+                    for package in packages
+                ]
+            )
+        else:
+            dl_paths = [None] * len(packages)
+
+        downloaded = list()
+        for package, dl_path in zip(packages, dl_paths):
+            candidate = package.candidate
+            if dl_path is None:
+                try:
+                    dl_path = Path(candidate.fetch_binary(str(download_path)))  # type: ignore
+                except apt.package.FetchError as e:
+                    raise errors.PackageFetchError(str(e))
+
+            downloaded.append((package.name, candidate.version, dl_path))  # type: ignore
         return downloaded
 
+    def _get_proxies(self) -> Optional[Dict[str, str]]:
+        proxies = dict()
+        for scheme in ("http", "https"):
+            proxy = apt.apt_pkg.config.find(f"Acquire::{scheme}::Proxy")
+            if proxy and proxy != "DIRECT":
+                proxies[scheme] = proxy
+        return proxies or None
+
     def get_installed_packages(self) -> Dict[str, str]:
         installed: Dict[str, str] = dict()
         for package in self.cache:
@@ -0,0 +1,153 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Look up the files owned by installed Debian packages.
+
+This answers the same questions as ``dpkg -S`` and ``dpkg -L`` from an
+index of the dpkg database, built once and rebuilt only when the set of
+installed packages changes.
+
+This module only depends on the standard library, so that it can be used
+from outside of snapcraft_legacy.
+"""
+
+import logging
+import os
+import pathlib
+import sys
+import threading
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_ADMIN_DIR = pathlib.Path("/var/lib/dpkg")
+
+
+class DpkgDatabase:
+    """An index of the files owned by installed packages.
+
+    :param admin_dir: The dpkg administrative directory to read.
+    """
+
+    def __init__(self, admin_dir: pathlib.Path) -> None:
+        self._path_owners: Dict[str, List[str]] = {}
+        self._package_files: Dict[str, List[str]] = {}
+        # divert-to path -> (divert-from path, diverting package)
+        self._diverted_to: Dict[str, Tuple[str, str]] = {}
+        # divert-from path -> diverting package
+        self._diverted_from: Dict[str, str] = {}
+
+        self._load_lists(admin_dir / "info")
+        self._load_diversions(admin_dir / "diversions")
+
+    def _load_lists(self, info_dir: pathlib.Path) -> None:
+        try:
+            entries = sorted(os.scandir(info_dir), key=lambda entry: entry.name)
+        except FileNotFoundError:
+            return
+
+        for entry in entries:
+            if not entry.name.endswith(".list"):
+                continue
+            # Multi-arch packages are listed as <package>:<arch>.list
+            package_name = entry.name[: -len(".list")].split(":")[0]
+            files = self._package_files.setdefault(package_name, [])
+            for path in _read_lines(entry.path):
+                if path == "/.":
+                    continue
+                files.append(path)
+                self._path_owners.setdefault(path, []).append(package_name)
+
+    def _load_diversions(self, diversions_path: pathlib.Path) -> None:
+        lines = _read_lines(str(diversions_path))
+        # Each diversion is recorded as three lines: the diverted path, the
+        # path it was diverted to and the diverting package (or ":" for a
+        # local diversion).
+        for from_path, to_path, package_name in zip(*[iter(lines)] * 3):
+            self._diverted_to[to_path] = (from_path, package_name)
+            self._diverted_from[from_path] = package_name
+
+    def get_package_for_path(self, path: str) -> Optional[str]:
+        """Return the name of the package providing path, if any.
+
+        Diversions are taken into account, the package providing a diverted
+        path is the diverting package, and the package providing the path it
+        was diverted to is the package that originally shipped it.
+
+        :param path: The absolute path to look up.
+        """
+        path = os.path.normpath(path)
+
+        if path in self._diverted_to:
+            from_path, diverter = self._diverted_to[path]
+            for package_name in self._path_owners.get(from_path, []):
+                if package_name != diverter:
+                    return package_name
+            return None
+
+        owners = self._path_owners.get(path, [])
+        diverter = self._diverted_from.get(path)
+        if diverter in owners:
+            return diverter
+        return owners[0] if owners else None
+
+    def get_package_files(self, package_name: str) -> FrozenSet[str]:
+        """Return the paths listed for package_name.
+
+        :param package_name: The name of the package, without architecture.
+        """
+        return frozenset(self._package_files.get(package_name, []))
+
+
+def _read_lines(path: str) -> List[str]:
+    try:
+        with open(
+            path, encoding=sys.getfilesystemencoding(), errors="surrogateescape"
+        ) as lines_file:
+            return lines_file.read().splitlines()
+    except FileNotFoundError:
+        return []
+
+
+def _get_mtime_ns(path: pathlib.Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+_lock = threading.Lock()
+_databases: Dict[pathlib.Path, Tuple[Tuple[Optional[int], ...], DpkgDatabase]] = {}
+
+
+def get_database() -> DpkgDatabase:
+    """Return the index of the dpkg database of this host.
+
+    The index is shared within the process, it is rebuilt when dpkg updates
+    its status or diversions.
+    """
+    admin_dir = _ADMIN_DIR
+    key = (
+        _get_mtime_ns(admin_dir / "status"),
+        _get_mtime_ns(admin_dir / "diversions"),
+    )
+    with _lock:
+        cached = _databases.get(admin_dir)
+        if cached is None or cached[0] != key:
+            logger.debug(f"Indexing the dpkg database in {admin_dir}")
+            cached = (key, DpkgDatabase(admin_dir))
+            _databases[admin_dir] = cached
+        return cached[1]
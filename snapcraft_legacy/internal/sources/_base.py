@@ -13,6 +13,7 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import hashlib
 import os
 import shutil
 import subprocess
@@ -87,6 +88,10 @@ class Base:
         raise errors.SourceUpdateUnsupportedError(self)
 
     def _run(self, command, **kwargs):
+        output = snapcraft_legacy.internal.common.get_step_output()
+        if output is not None:
+            kwargs.setdefault("stdout", output)
+            kwargs.setdefault("stderr", output)
         try:
             subprocess.check_call(command, **kwargs)
         except subprocess.CalledProcessError as e:
@@ -122,8 +127,9 @@ class FileBase(Base):
             except FileNotFoundError as exc:
                 raise errors.SnapcraftSourceNotFoundError(self.source) from exc
 
-        # Verify before provisioning
-        if self.source_checksum:
+        # Verify before provisioning, downloads are verified as they are
+        # downloaded.
+        if self.source_checksum and not is_source_url:
             verify_checksum(self.source_checksum, source_file)
 
         # We finally provision, but we don't clean the target so override-pull
@@ -138,18 +144,21 @@ class FileBase(Base):
 
         # First check if we already have the source file cached.
         file_cache = FileCache()
+        digest = None
         if self.source_checksum:
             algorithm, hash = split_checksum(self.source_checksum)
-            cache_file = file_cache.get(algorithm=algorithm, hash=hash)
-            if cache_file:
-                # We make this copy as the provisioning logic can delete
-                # this file and we don't want that.
-                shutil.copy2(cache_file, self.file)
+            # A copy is made as the provisioning logic can delete this file
+            # and we don't want that.
+            if file_cache.materialize(
+                algorithm=algorithm, hash=hash, destination=self.file
+            ):
                 return self.file
+            digest = getattr(hashlib, algorithm)()
 
         # If not we download and store
         if snapcraft_legacy.internal.common.get_url_scheme(self.source) == "ftp":
             download_urllib_source(self.source, self.file)
+            digest = None
         else:
             try:
                 request = requests.get(self.source, stream=True, allow_redirects=True)
@@ -157,11 +166,16 @@ class FileBase(Base):
             except requests.exceptions.RequestException as e:
                 raise errors.SnapcraftRequestError(message=e)
 
-            download_requests_stream(request, self.file)
+            download_requests_stream(request, self.file, digest=digest)
 
         # We verify the file if source_checksum is defined
         # and we cache the file for future reuse.
         if self.source_checksum:
-            algorithm, digest = verify_checksum(self.source_checksum, self.file)
-            file_cache.cache(filename=self.file, algorithm=algorithm, hash=hash)
+            if digest is None:
+                verify_checksum(self.source_checksum, self.file)
+            elif digest.hexdigest() != hash:
+                raise errors.DigestDoesNotMatchError(hash, digest.hexdigest())
+            file_cache.cache(
+                filename=self.file, algorithm=algorithm, hash=hash, verify=False
+            )
         return self.file
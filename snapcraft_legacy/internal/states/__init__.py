@@ -20,5 +20,6 @@ from snapcraft_legacy.internal.states._prime_state import PrimeState  # noqa
 from snapcraft_legacy.internal.states._pull_state import PullState  # noqa
 from snapcraft_legacy.internal.states._stage_state import StageState  # noqa
 from snapcraft_legacy.internal.states._state import PartState  # noqa
+from snapcraft_legacy.internal.states._state import forget_state  # noqa
 from snapcraft_legacy.internal.states._state import get_state  # noqa
 from snapcraft_legacy.internal.states._state import get_step_state_file  # noqa
@@ -15,10 +15,16 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+from typing import Any, Dict, Tuple
 
 from snapcraft_legacy import yaml_utils
 from snapcraft_legacy.internal import steps
 
+# States already loaded, by state file, along with the stat fields that tell
+# if the file was written since.
+_StatKey = Tuple[int, int, int, int]
+_state_cache: Dict[str, Tuple[_StatKey, Any]] = {}
+
 
 class State(yaml_utils.SnapcraftYAMLObject):
     def __repr__(self):
@@ -89,14 +95,42 @@ def _get_differing_keys(dict1, dict2):
 
 
 def get_state(state_dir: str, step: steps.Step):
+    """Return the state of step, or None if the step has not run.
+
+    State files are only loaded again if they were written since they were
+    last loaded. The state returned is shared and must not be modified.
+    """
+    state_file = os.path.abspath(get_step_state_file(state_dir, step))
+    try:
+        file_stat = os.stat(state_file)
+    except OSError:
+        _state_cache.pop(state_file, None)
+        return None
+
+    key = (
+        file_stat.st_dev,
+        file_stat.st_ino,
+        file_stat.st_size,
+        file_stat.st_mtime_ns,
+    )
+    cached = _state_cache.get(state_file)
+    if cached and cached[0] == key:
+        return cached[1]
+
     state = None
-    state_file = get_step_state_file(state_dir, step)
     if os.path.isfile(state_file):
         with open(state_file, "r") as f:
             state = yaml_utils.load(f)
+        _state_cache[state_file] = (key, state)
 
     return state
 
 
+def forget_state(state_dir: str, step: steps.Step) -> None:
+    """Drop the loaded state of step, to be called when its file is written."""
+    state_file = os.path.abspath(get_step_state_file(state_dir, step))
+    _state_cache.pop(state_file, None)
+
+
 def get_step_state_file(state_dir: str, step: steps.Step) -> str:
     return os.path.join(state_dir, step.name)
@@ -15,14 +15,79 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
 import json
+import logging
 import os
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional, Set, Tuple
 
 import jsonschema
 
 import snapcraft_legacy.yaml_utils.errors
 from snapcraft_legacy.internal import common
 
+logger = logging.getLogger(__name__)
+
+
+class _CompiledSchema(NamedTuple):
+    schema: Dict[str, Any]
+    validator_class: Any
+    # Digests of the documents that passed validation against this schema.
+    validated: Set[str]
+
+
+_lock = threading.Lock()
+_compiled_schemas: Dict[str, Tuple[Tuple[int, int], _CompiledSchema]] = {}
+
+
+def _get_compiled_schema(schema_file: str) -> _CompiledSchema:
+    """Return the schema in schema_file, loaded and checked once per process.
+
+    The schema is loaded again if the file changes.
+    """
+    try:
+        stat = os.stat(schema_file)
+        key = (stat.st_mtime_ns, stat.st_size)
+        with _lock:
+            return _load_compiled_schema(schema_file, key)
+    except FileNotFoundError:
+        raise snapcraft_legacy.yaml_utils.errors.YamlValidationError(
+            "snapcraft validation file is missing from installation path"
+        )
+
+
+def _load_compiled_schema(schema_file: str, key: Tuple[int, int]) -> _CompiledSchema:
+    cached = _compiled_schemas.get(schema_file)
+    if cached is None or cached[0] != key:
+        with open(schema_file) as fp:
+            schema = json.load(fp)
+        validator_class = jsonschema.validators.validator_for(schema)
+        validator_class.check_schema(schema)
+        cached = (key, _CompiledSchema(schema, validator_class, set()))
+        _compiled_schemas[schema_file] = cached
+    return cached[1]
+
+
+def _get_document_digest(
+    document: Any, format_checker: jsonschema.FormatChecker
+) -> Optional[str]:
+    """Return a digest of document and the formats it is checked with.
+
+    None is returned for documents that cannot be represented as JSON,
+    which are always validated.
+    """
+    try:
+        dumped_document = json.dumps(document, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+
+    digest = hashlib.sha256(dumped_document.encode())
+    for name, checker in sorted(format_checker.checkers.items()):
+        digest.update(f"\0{name}:{checker!r}".encode())
+    return digest.hexdigest()
+
 
 class Validator:
     def __init__(self, snapcraft_yaml=None):
@@ -54,21 +119,35 @@ class Validator:
         schema_file = os.path.abspath(
             os.path.join(common.get_schemadir(), "snapcraft.json")
         )
-        try:
-            with open(schema_file) as fp:
-                self._schema = json.load(fp)
-        except FileNotFoundError:
-            raise snapcraft_legacy.yaml_utils.errors.YamlValidationError(
-                "snapcraft validation file is missing from installation path"
-            )
+        self._compiled_schema = _get_compiled_schema(schema_file)
+        self._schema = self._compiled_schema.schema
 
     def validate(self, *, source="snapcraft.yaml"):
+        """Validate snapcraft_yaml against the schema.
+
+        Validating a document identical to one that was already found valid
+        in this process is skipped.
+        """
+        start_time = time.monotonic()
         format_check = jsonschema.FormatChecker()
+        digest = _get_document_digest(self._snapcraft, format_check)
+        if digest is not None and digest in self._compiled_schema.validated:
+            logger.debug(f"Skipping validation of {source}, already validated.")
+            return
+
+        validator = self._compiled_schema.validator_class(
+            self._schema, format_checker=format_check
+        )
         try:
-            jsonschema.validate(
-                self._snapcraft, self._schema, format_checker=format_check
-            )
+            validator.validate(self._snapcraft)
         except jsonschema.ValidationError as e:
             raise snapcraft_legacy.yaml_utils.errors.YamlValidationError.from_validation_error(
                 e, source=source
             )
+
+        if digest is not None:
+            with _lock:
+                self._compiled_schema.validated.add(digest)
+        logger.debug(
+            f"Validated {source} in {time.monotonic() - start_time:.3f} seconds."
+        )
@@ -24,6 +24,13 @@ from . import status  # isort:skip
 logger = logging.getLogger(__name__)
 
 
+from ._downloader import Downloader  # noqa
+from ._session import (  # noqa
+    SharedHTTPClient,
+    get_session,
+    get_session_stats,
+    share_session,
+)
 from ._snap_api import SnapAPI  # noqa
 from ._store_client import StoreClient  # noqa
 
@@ -32,6 +39,11 @@ __all__ = [
     "channels",
     "constants",
     "status",
+    "Downloader",
+    "SharedHTTPClient",
+    "get_session",
+    "get_session_stats",
+    "share_session",
     "SnapAPI",
     "StoreClient",
 ]
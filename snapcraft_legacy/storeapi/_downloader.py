@@ -0,0 +1,458 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Resumable, segmented downloads with on the fly hashing.
+
+Files are fetched with HTTP Range requests split in segments that are
+downloaded in parallel, as long as the server advertises ``Accept-Ranges``.
+Progress is recorded in a ``<destination>.progress`` file so interrupted
+downloads can be resumed from any server. The sha3-384 digest is computed
+while the data is being written instead of re-reading the result.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import craft_store
+import requests
+
+from snapcraft_legacy.internal.indicators import _init_progress_bar, is_dumb_terminal
+
+from . import agent, errors
+from ._session import SharedHTTPClient
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 64 * 1024
+# Save the download progress at most this often, in seconds.
+_PROGRESS_SAVE_INTERVAL = 1.0
+
+_RETRIABLE_ERRORS = (
+    requests.exceptions.RequestException,
+    craft_store.errors.NetworkError,
+    errors.DownloadIncompleteError,
+)
+
+
+class _RangeIgnoredError(Exception):
+    """The server replied with the whole file to a range request."""
+
+
+class _Segment:
+    """A byte range of the download and how much of it is on disk."""
+
+    __slots__ = ("start", "end", "written")
+
+    def __init__(self, *, start: int, end: int, written: int = 0) -> None:
+        self.start = start
+        # end is exclusive.
+        self.end = end
+        self.written = written
+
+    @property
+    def position(self) -> int:
+        return self.start + self.written
+
+    @property
+    def done(self) -> bool:
+        return self.position >= self.end
+
+
+class _OrderedHasher:
+    """Hash data in file order while it is written out of order.
+
+    Data written at the current hashing position is hashed straight from
+    memory, ranges written ahead of it are read back from the file once the
+    position reaches them.
+    """
+
+    def __init__(self, *, algorithm: str, path: str) -> None:
+        self._hasher = hashlib.new(algorithm)
+        self._path = path
+        self._position = 0
+        # offset -> length of data on disk that has not been hashed yet.
+        self._pending: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def add_written(self, offset: int, length: int) -> None:
+        """Register data already on disk at offset."""
+        if length:
+            with self._lock:
+                self._pending[offset] = length
+                self._catch_up()
+
+    def update(self, offset: int, data: bytes) -> None:
+        """Register data written at offset."""
+        with self._lock:
+            if offset == self._position:
+                self._hasher.update(data)
+                self._position += len(data)
+                self._catch_up()
+            else:
+                self._pending[offset] = len(data)
+
+    def hexdigest(self) -> str:
+        with self._lock:
+            self._catch_up()
+            if self._pending:
+                raise RuntimeError("Cannot compute digest of incomplete download")
+            return self._hasher.hexdigest()
+
+    def _catch_up(self) -> None:
+        if self._position not in self._pending:
+            return
+
+        with open(self._path, "rb") as data_file:
+            while self._position in self._pending:
+                length = self._pending.pop(self._position)
+                data_file.seek(self._position)
+                remaining = length
+                while remaining:
+                    data = data_file.read(min(remaining, _CHUNK_SIZE * 16))
+                    if not data:
+                        raise RuntimeError(
+                            f"Unexpected end of file while hashing {self._path!r}"
+                        )
+                    self._hasher.update(data)
+                    remaining -= len(data)
+                self._position += length
+
+
+class Downloader:
+    """Download files in parallel segments, resuming partial downloads.
+
+    :param segments: maximum number of segments to download in parallel.
+    :param min_segment_size: files smaller than this are not split.
+    :param max_retries: attempts per segment before giving up.
+    :param backoff: base for the exponential delay between retries, in seconds.
+    :param client_factory: callable returning the HTTP client used for each
+        segment, defaults to a client on the shared store session.
+    """
+
+    def __init__(
+        self,
+        *,
+        segments: int = 4,
+        min_segment_size: int = 8 * 1024 * 1024,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        client_factory: Optional[Callable[[], craft_store.HTTPClient]] = None,
+    ) -> None:
+        if client_factory is None:
+            client_factory = _get_http_client
+
+        self._segments = max(segments, 1)
+        self._min_segment_size = min_segment_size
+        self._max_retries = max(max_retries, 1)
+        self._backoff = backoff
+        self._client_factory = client_factory
+        self._progress_lock = threading.Lock()
+
+    def download(
+        self,
+        url: str,
+        download_path: str,
+        *,
+        size: Optional[int] = None,
+        sha3_384: Optional[str] = None,
+        message: Optional[str] = None,
+    ) -> str:
+        """Download url into download_path and return its sha3-384.
+
+        :raises errors.SHAMismatchError: if sha3_384 is set and does not match,
+            the downloaded file is removed.
+        """
+        probe = self._probe(url)
+        if probe is None:
+            download_url = url
+            accept_ranges = False
+        else:
+            download_url = probe.url or url
+            if size is None and probe.headers.get("Content-Length"):
+                size = int(probe.headers["Content-Length"])
+            accept_ranges = (
+                probe.headers.get("Accept-Ranges", "none").lower() == "bytes"
+            )
+
+        if download_url != url:
+            logger.debug(f"Redirected download for {url!r} to {download_url!r}")
+
+        calculated_hash = None
+        if accept_ranges and size:
+            try:
+                calculated_hash = self._download_ranges(
+                    download_url, download_path, size=size, message=message
+                )
+            except _RangeIgnoredError:
+                # The advertised ranges are not honoured, the partial data
+                # cannot be trusted to line up with what is served.
+                logger.debug(
+                    f"Range requests ignored for {download_url!r}, "
+                    "restarting the download"
+                )
+                _remove_progress(download_path)
+        if calculated_hash is None:
+            calculated_hash = self._download_stream(
+                download_url, download_path, message=message
+            )
+
+        if sha3_384 is not None and calculated_hash != sha3_384:
+            os.unlink(download_path)
+            raise errors.SHAMismatchError(
+                path=download_path, expected=sha3_384, calculated=calculated_hash
+            )
+
+        return calculated_hash
+
+    def _probe(self, url: str) -> Optional[requests.Response]:
+        """Return the response to a HEAD request, None if not supported."""
+        for attempt in range(1, self._max_retries + 1):
+            try:
+                return self._client_factory().request("HEAD", url, allow_redirects=True)
+            except craft_store.errors.StoreServerError as error:
+                # Not every server implements HEAD, a plain download still works.
+                logger.debug(f"Could not probe {url!r}: {error!s}")
+                return None
+            except _RETRIABLE_ERRORS as error:
+                self._retry_or_raise(error, attempt)
+
+        # Unreachable, _retry_or_raise raises on the last attempt.
+        raise RuntimeError(f"Could not probe {url!r}")
+
+    def _download_stream(
+        self, url: str, download_path: str, *, message: Optional[str]
+    ) -> str:
+        """Download url in one stream, restarting from scratch on failure."""
+        for attempt in range(1, self._max_retries + 1):
+            hasher = hashlib.sha3_384()
+            total_read = 0
+            try:
+                response = self._client_factory().request("GET", url, stream=True)
+                total_length = int(response.headers.get("Content-Length", "0"))
+                progress_bar = _init_progress_bar(total_length, download_path, message)
+                progress_bar.start()
+                with open(download_path, "wb") as download_file:
+                    for data in response.iter_content(_CHUNK_SIZE):
+                        download_file.write(data)
+                        hasher.update(data)
+                        total_read += len(data)
+                        if not is_dumb_terminal():
+                            progress_bar.update(
+                                min(total_read, total_length)
+                                if total_length
+                                else total_read
+                            )
+            except _RETRIABLE_ERRORS as error:
+                self._retry_or_raise(error, attempt)
+                continue
+            progress_bar.finish()
+            return hasher.hexdigest()
+
+        # Unreachable, _retry_or_raise raises on the last attempt.
+        raise RuntimeError(f"Could not download {url!r}")
+
+    def _download_ranges(
+        self, url: str, download_path: str, *, size: int, message: Optional[str]
+    ) -> str:
+        segments = self._load_progress(url, download_path, size=size)
+        if segments is None:
+            segments = self._plan_segments(download_path, size=size)
+
+        # Preallocate so segments can be written at their offsets.
+        with open(download_path, "ab") as download_file:
+            download_file.truncate(size)
+
+        hasher = _OrderedHasher(algorithm="sha3_384", path=download_path)
+        for segment in segments:
+            hasher.add_written(segment.start, segment.written)
+        self._save_progress(url, download_path, size=size, segments=segments)
+
+        progress_bar = _init_progress_bar(size, download_path, message)
+        progress_bar.start()
+        downloaded = sum(s.written for s in segments)
+        last_save = time.monotonic()
+
+        def _on_data(length: int) -> None:
+            nonlocal downloaded, last_save
+            with self._progress_lock:
+                downloaded += length
+                if not is_dumb_terminal():
+                    progress_bar.update(min(downloaded, size))
+                if time.monotonic() - last_save > _PROGRESS_SAVE_INTERVAL:
+                    self._save_progress(
+                        url, download_path, size=size, segments=segments
+                    )
+                    last_save = time.monotonic()
+
+        pending = [s for s in segments if not s.done]
+        if pending:
+            with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                futures = [
+                    executor.submit(
+                        self._download_segment,
+                        url,
+                        download_path,
+                        segment=segment,
+                        hasher=hasher,
+                        on_data=_on_data,
+                    )
+                    for segment in pending
+                ]
+                try:
+                    for future in futures:
+                        future.result()
+                finally:
+                    with self._progress_lock:
+                        self._save_progress(
+                            url, download_path, size=size, segments=segments
+                        )
+
+        progress_bar.finish()
+        os.unlink(_get_progress_path(download_path))
+        return hasher.hexdigest()
+
+    def _plan_segments(self, download_path: str, *, size: int) -> List[_Segment]:
+        # A partial file without progress information was written sequentially,
+        # keep it as already downloaded data of the first segment.
+        try:
+            existing_size = os.path.getsize(download_path)
+        except FileNotFoundError:
+            existing_size = 0
+        if existing_size >= size:
+            os.unlink(download_path)
+            existing_size = 0
+
+        remaining = size - existing_size
+        count = max(1, min(self._segments, remaining // self._min_segment_size))
+        segment_size = -(-remaining // count)
+
+        segments = []
+        start = existing_size
+        for index in range(count):
+            end = min(start + segment_size, size)
+            segments.append(
+                _Segment(
+                    start=0 if index == 0 else start,
+                    end=end,
+                    written=existing_size if index == 0 else 0,
+                )
+            )
+            start = end
+        return segments
+
+    def _download_segment(
+        self,
+        url: str,
+        download_path: str,
+        *,
+        segment: _Segment,
+        hasher: _OrderedHasher,
+        on_data: Callable[[int], None],
+    ) -> None:
+        client = self._client_factory()
+        attempt = 0
+        while not segment.done:
+            attempt += 1
+            headers = {"Range": f"bytes={segment.position}-{segment.end - 1}"}
+            try:
+                response = client.request("GET", url, headers=headers, stream=True)
+                if response.status_code == 200:
+                    raise _RangeIgnoredError()
+                if response.status_code != 206:
+                    raise errors.DownloadRangeNotSatisfiedError(url=url)
+                with open(download_path, "r+b") as download_file:
+                    download_file.seek(segment.position)
+                    for data in response.iter_content(_CHUNK_SIZE):
+                        data = data[: segment.end - segment.position]
+                        if not data:
+                            break
+                        download_file.write(data)
+                        # Flush before the hasher may read this range back.
+                        download_file.flush()
+                        hasher.update(segment.position, data)
+                        segment.written += len(data)
+                        on_data(len(data))
+                if not segment.done:
+                    raise errors.DownloadIncompleteError(url=url)
+            except _RETRIABLE_ERRORS as error:
+                self._retry_or_raise(error, attempt)
+
+    def _retry_or_raise(self, error: Exception, attempt: int) -> None:
+        if attempt >= self._max_retries:
+            raise error
+        delay = self._backoff * 2 ** (attempt - 1)
+        logger.debug(
+            f"Error while downloading: {error!r}. "
+            f"Retrying in {delay}s ({self._max_retries - attempt} retries left)."
+        )
+        time.sleep(delay)
+
+    @staticmethod
+    def _load_progress(
+        url: str, download_path: str, *, size: int
+    ) -> Optional[List[_Segment]]:
+        progress_path = _get_progress_path(download_path)
+        try:
+            with open(progress_path) as progress_file:
+                progress = json.load(progress_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # The download url usually changes (signed CDN urls), the size is
+        # what identifies a partial download of the same file.
+        if progress.get("size") != size or not os.path.exists(download_path):
+            logger.debug(f"Discarding stale download progress for {download_path!r}")
+            os.unlink(progress_path)
+            return None
+
+        logger.debug(f"Resuming download of {url!r} into {download_path!r}")
+        return [
+            _Segment(start=start, end=end, written=written)
+            for start, end, written in progress["segments"]
+        ]
+
+    @staticmethod
+    def _save_progress(
+        url: str, download_path: str, *, size: int, segments: List[_Segment]
+    ) -> None:
+        progress = {
+            "url": url,
+            "size": size,
+            "segments": [[s.start, s.end, s.written] for s in segments],
+        }
+        with open(_get_progress_path(download_path), "w") as progress_file:
+            json.dump(progress, progress_file)
+
+
+def _get_progress_path(download_path: str) -> str:
+    return download_path + ".progress"
+
+
+def _remove_progress(download_path: str) -> None:
+    try:
+        os.unlink(_get_progress_path(download_path))
+    except FileNotFoundError:
+        pass
+
+
+def _get_http_client() -> craft_store.HTTPClient:
+    return SharedHTTPClient(user_agent=agent.get_user_agent())
@@ -0,0 +1,154 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Process wide HTTP session shared by all store clients.
+
+Sharing one keep-alive session lets requests from the different store
+layers reuse connections instead of repeating TLS handshakes. The session
+can be tuned with the following environment variables:
+
+- SNAPCRAFT_STORE_POOL_SIZE: connections kept alive per host (default 10).
+- SNAPCRAFT_STORE_TIMEOUT: seconds to wait for a connection or a response
+  (default 60).
+- CRAFT_STORE_RETRIES and CRAFT_STORE_BACKOFF: as used by craft-store.
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Optional, TypeVar
+
+import craft_store
+import requests
+from craft_store.http_client import REQUEST_BACKOFF, REQUEST_TOTAL_RETRIES
+from requests.adapters import HTTPAdapter, Retry
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_POOL_SIZE = 10
+_DEFAULT_TIMEOUT = 60.0
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _get_env_value(environment_var: str, default_value: float) -> float:
+    environment_value = os.getenv(environment_var)
+    if environment_value is None:
+        return default_value
+
+    try:
+        return float(environment_value)
+    except ValueError:
+        logger.debug(
+            f"{environment_var!r} set to invalid value {environment_value!r}, "
+            f"setting to {default_value!r}."
+        )
+        return default_value
+
+
+class _PooledHTTPAdapter(HTTPAdapter):
+    """An HTTPAdapter with a default timeout that logs connection reuse."""
+
+    def __init__(self, *, timeout: float, **kwargs) -> None:
+        self._timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self._timeout
+
+        response = super().send(request, **kwargs)
+
+        stats = get_session_stats()
+        logger.debug(
+            f"HTTP connection reuse: {stats['requests']} requests over "
+            f"{stats['connections']} connections"
+        )
+        return response
+
+
+def get_session() -> requests.Session:
+    """Return the process wide session, creating it on first use."""
+    global _session  # pylint: disable=global-statement
+
+    with _session_lock:
+        if _session is None:
+            pool_size = int(
+                _get_env_value("SNAPCRAFT_STORE_POOL_SIZE", _DEFAULT_POOL_SIZE)
+            )
+            retries = Retry(
+                total=int(_get_env_value("CRAFT_STORE_RETRIES", REQUEST_TOTAL_RETRIES)),
+                backoff_factor=_get_env_value("CRAFT_STORE_BACKOFF", REQUEST_BACKOFF),
+                status_forcelist=[500, 502, 503, 504],
+            )
+            adapter = _PooledHTTPAdapter(
+                timeout=_get_env_value("SNAPCRAFT_STORE_TIMEOUT", _DEFAULT_TIMEOUT),
+                pool_connections=pool_size,
+                pool_maxsize=pool_size,
+                max_retries=retries,
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+
+        return _session
+
+
+def reset_session() -> None:
+    """Close the process wide session, a new one is created on next use."""
+    global _session  # pylint: disable=global-statement
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get_session_stats() -> Dict[str, int]:
+    """Return the number of requests and connections made by the session."""
+    stats = {"requests": 0, "connections": 0}
+    if _session is None:
+        return stats
+
+    for adapter in set(_session.adapters.values()):
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            stats["requests"] += pool.num_requests
+            stats["connections"] += pool.num_connections
+    return stats
+
+
+class SharedHTTPClient(craft_store.HTTPClient):
+    """A craft-store HTTPClient backed by the process wide session."""
+
+    def __init__(self, *, user_agent: str) -> None:
+        super().__init__(user_agent=user_agent)
+        # Replace the session created for this instance, it has not been used.
+        self._session.close()
+        self._session = get_session()
+
+
+_BaseClientT = TypeVar("_BaseClientT", bound=craft_store.BaseClient)
+
+
+def share_session(client: _BaseClientT) -> _BaseClientT:
+    """Make a craft-store client use the process wide session."""
+    client.http_client = SharedHTTPClient(user_agent=client.http_client.user_agent)
+    return client
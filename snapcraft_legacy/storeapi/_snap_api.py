@@ -24,6 +24,7 @@ import requests
 
 from . import agent, constants, errors
 from ._requests import Requests
+from ._session import SharedHTTPClient
 from .info import SnapInfo
 
 logger = logging.getLogger(__name__)
@@ -38,7 +39,7 @@ class SnapAPI(Requests):
 
     def __init__(self, client: Optional[craft_store.HTTPClient] = None):
         if client is None:
-            client = craft_store.HTTPClient(user_agent=agent.get_user_agent())
+            client = SharedHTTPClient(user_agent=agent.get_user_agent())
         self._client = client
         self._root_url = os.environ.get("STORE_API_URL", constants.STORE_API_URL)
 
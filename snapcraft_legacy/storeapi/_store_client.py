@@ -17,16 +17,15 @@
 import logging
 import os
 import platform
-from time import sleep
-from typing import Any, Dict, List, Optional, Sequence, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 import craft_store
-import requests
-
-from snapcraft_legacy.internal.indicators import download_requests_stream
 
 from . import agent, constants, errors, metrics
 from ._dashboard_api import DashboardAPI
+from ._downloader import Downloader
+from ._session import SharedHTTPClient, share_session
 from ._snap_api import SnapAPI
 from .constants import DEFAULT_SERIES
 from .v2 import validation_sets, whoami
@@ -51,28 +50,34 @@ class StoreClient:
         self._root_url = os.getenv("STORE_DASHBOARD_URL", constants.STORE_DASHBOARD_URL)
         storage_base_url = os.getenv("STORE_UPLOAD_URL", constants.STORE_UPLOAD_URL)
 
-        self.client = craft_store.HTTPClient(user_agent=user_agent)
+        self.client = SharedHTTPClient(user_agent=user_agent)
 
         if self.use_candid() is True:
-            self.auth_client = craft_store.StoreClient(
-                application_name="snapcraft",
-                base_url=self._root_url,
-                storage_base_url=storage_base_url,
-                endpoints=craft_store.endpoints.SNAP_STORE,
-                user_agent=user_agent,
-                environment_auth=constants.ENVIRONMENT_STORE_CREDENTIALS,
-                ephemeral=ephemeral,
+            self.auth_client = share_session(
+                craft_store.StoreClient(
+                    application_name="snapcraft",
+                    base_url=self._root_url,
+                    storage_base_url=storage_base_url,
+                    endpoints=craft_store.endpoints.SNAP_STORE,
+                    user_agent=user_agent,
+                    environment_auth=constants.ENVIRONMENT_STORE_CREDENTIALS,
+                    ephemeral=ephemeral,
+                )
             )
         else:
-            self.auth_client = craft_store.UbuntuOneStoreClient(
-                application_name="snapcraft",
-                base_url=self._root_url,
-                storage_base_url=storage_base_url,
-                auth_url=os.getenv("UBUNTU_ONE_SSO_URL", constants.UBUNTU_ONE_SSO_URL),
-                endpoints=craft_store.endpoints.U1_SNAP_STORE,
-                user_agent=user_agent,
-                environment_auth=constants.ENVIRONMENT_STORE_CREDENTIALS,
-                ephemeral=ephemeral,
+            self.auth_client = share_session(
+                craft_store.UbuntuOneStoreClient(
+                    application_name="snapcraft",
+                    base_url=self._root_url,
+                    storage_base_url=storage_base_url,
+                    auth_url=os.getenv(
+                        "UBUNTU_ONE_SSO_URL", constants.UBUNTU_ONE_SSO_URL
+                    ),
+                    endpoints=craft_store.endpoints.U1_SNAP_STORE,
+                    user_agent=user_agent,
+                    environment_auth=constants.ENVIRONMENT_STORE_CREDENTIALS,
+                    ephemeral=ephemeral,
+                )
             )
 
         self.snap = SnapAPI(self.client)
@@ -201,6 +206,64 @@ class StoreClient:
     ) -> metrics.MetricsResults:
         return self.dashboard.get_metrics(filters=filters, snap_name=snap_name)
 
+    def export_metrics(
+        self,
+        *,
+        snap_ids: Dict[str, str],
+        metric_names: Sequence[str],
+        start: str,
+        end: str,
+        chunk_days: int = 90,
+        max_workers: int = 8,
+    ) -> metrics.MetricsColumns:
+        """Fetch metric_names for all snap_ids concurrently.
+
+        Long date ranges are split in requests of chunk_days, all metric names
+        for a snap are fetched in the same request.
+
+        :param snap_ids: mapping of snap names to snap ids.
+        """
+        queries = [
+            (snap_name, snap_id, chunk_start, chunk_end)
+            for snap_name, snap_id in snap_ids.items()
+            for chunk_start, chunk_end in metrics.get_date_ranges(
+                start, end, days=chunk_days
+            )
+        ]
+
+        def _fetch(query: Tuple[str, str, str, str]) -> metrics.MetricsColumns:
+            snap_name, snap_id, chunk_start, chunk_end = query
+            filters = [
+                metrics.MetricsFilter(
+                    snap_id=snap_id,
+                    metric_name=metric_name,
+                    start=chunk_start,
+                    end=chunk_end,
+                )
+                for metric_name in metric_names
+            ]
+            results = self.get_metrics(filters=filters, snap_name=snap_name)
+
+            columns = metrics.MetricsColumns()
+            for metric_results in results.metrics:
+                if metric_results.status == metrics.MetricsStatus["FAIL"]:
+                    logger.warning(
+                        f"No {metric_results.metric_name!r} data available for "
+                        f"{snap_name!r} from {chunk_start} to {chunk_end} due to "
+                        "Snap Store internal failure."
+                    )
+                elif metric_results.status == metrics.MetricsStatus["OK"]:
+                    columns.extend(snap_name=snap_name, results=metric_results)
+            return columns
+
+        exported = metrics.MetricsColumns()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # map preserves the order of the queries.
+            for columns in executor.map(_fetch, queries):
+                exported.merge(columns)
+
+        return exported
+
     def post_validation_sets_build_assertion(
         self, *, validation_sets: Dict[str, Any]
     ) -> validation_sets.BuildAssertion:
@@ -237,57 +300,15 @@ class StoreClient:
         try:
             channel_mapping.download.verify(download_path)
         except errors.StoreDownloadError:
-            cls._download_snap(channel_mapping.download, download_path)
+            # The digest is verified while downloading.
+            Downloader().download(
+                channel_mapping.download.url,
+                download_path,
+                sha3_384=channel_mapping.download.sha3_384,
+            )
 
-        channel_mapping.download.verify(download_path)
         return channel_mapping.download.sha3_384
 
-    @classmethod
-    def _download_snap(cls, download_details, download_path):
-        # we only resume when redirected to our CDN since we use internap's
-        # special sauce.
-        total_read = 0
-        probe_url = requests.head(download_details.url)
-        if probe_url.is_redirect and "internap" in probe_url.headers["Location"]:
-            download_url = probe_url.headers["Location"]
-            resume_possible = True
-        else:
-            download_url = download_details.url
-            resume_possible = False
-
-        # HttpAdapter cannot help here as this is a stream.
-        # LP: #1617765
-        not_downloaded = True
-        retry_count = 5
-        while not_downloaded and retry_count:
-            headers = {}
-            if resume_possible and os.path.exists(download_path):
-                total_read = os.path.getsize(download_path)
-                headers["Range"] = "bytes={}-".format(total_read)
-            request = craft_store.HTTPClient(user_agent=agent.get_user_agent()).request(
-                "GET", download_url, headers=headers, stream=True
-            )
-            request.raise_for_status()
-            redirections = [h.headers["Location"] for h in request.history]
-            if redirections:
-                logger.debug(
-                    "Redirections for {!r}: {}".format(
-                        download_url, ", ".join(redirections)
-                    )
-                )
-            try:
-                download_requests_stream(request, download_path, total_read=total_read)
-                not_downloaded = False
-            except requests.exceptions.ChunkedEncodingError as e:
-                logger.debug(
-                    "Error while downloading: {!r}. "
-                    "Retries left to download: {!r}.".format(e, retry_count)
-                )
-                retry_count -= 1
-                if not retry_count:
-                    raise e
-                sleep(1)
-
     def push_assertion(self, snap_id, assertion, endpoint, force=False):
         return self.dashboard.push_assertion(snap_id, assertion, endpoint, force)
 
@@ -189,6 +189,22 @@ class SHAMismatchError(StoreDownloadError):
         super().__init__(path=path, expected=expected, calculated=calculated)
 
 
+class DownloadRangeNotSatisfiedError(StoreDownloadError):
+
+    fmt = "The server did not honour the range request for {url!r}."
+
+    def __init__(self, *, url: str) -> None:
+        super().__init__(url=url)
+
+
+class DownloadIncompleteError(StoreDownloadError):
+
+    fmt = "The connection was closed before {url!r} was fully downloaded."
+
+    def __init__(self, *, url: str) -> None:
+        super().__init__(url=url)
+
+
 class DeveloperAgreementSignError(StoreError):
 
     fmt = (
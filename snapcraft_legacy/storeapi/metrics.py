@@ -14,8 +14,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import datetime
 import enum
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 import attr
 
@@ -168,3 +169,76 @@ class MetricsResults:
             raise ValueError(f"Invalid metrics: {metrics!r}")
 
         return cls(metrics=[MetricResults.unmarshal(m) for m in metrics])
+
+
+@attr.s(auto_attribs=True)
+class MetricsColumns:
+    """Metrics data points kept as flat columns.
+
+    There is one entry in each column per snap, metric, series and date,
+    this is the layout used when exporting metrics.
+    """
+
+    snap_names: List[str] = attr.Factory(list)
+    metric_names: List[str] = attr.Factory(list)
+    series: List[str] = attr.Factory(list)
+    dates: List[str] = attr.Factory(list)
+    values: List[Optional[int]] = attr.Factory(list)
+
+    COLUMNS = ("snap_name", "metric_name", "series", "date", "value")
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def extend(self, *, snap_name: str, results: MetricResults) -> None:
+        """Add the data points from results for snap_name.
+
+        :raises ValueError: If a series does not have a value for each bucket.
+        """
+        bucket_count = len(results.buckets)
+        for series in results.series:
+            if len(series.values) != bucket_count:
+                raise ValueError(
+                    f"Invalid metric series {series.name!r}: "
+                    f"{len(series.values)} values for {bucket_count} buckets"
+                )
+
+        for series in results.series:
+            self.snap_names.extend([snap_name] * bucket_count)
+            self.metric_names.extend([results.metric_name] * bucket_count)
+            self.series.extend([series.name] * bucket_count)
+            self.dates.extend(results.buckets)
+            self.values.extend(series.values)  # type: ignore
+
+    def merge(self, other: "MetricsColumns") -> None:
+        """Append the columns from other."""
+        self.snap_names.extend(other.snap_names)
+        self.metric_names.extend(other.metric_names)
+        self.series.extend(other.series)
+        self.dates.extend(other.dates)
+        self.values.extend(other.values)
+
+    def rows(self) -> Iterator[Tuple[str, str, str, str, Optional[int]]]:
+        """Iterate over the data points in the order of COLUMNS."""
+        return zip(
+            self.snap_names, self.metric_names, self.series, self.dates, self.values
+        )
+
+
+def get_date_ranges(start: str, end: str, *, days: int) -> List[Tuple[str, str]]:
+    """Split the inclusive range from start to end in ranges of days.
+
+    Dates are in the YYYY-MM-DD format used by the metrics API.
+    """
+    start_date = datetime.date.fromisoformat(start)
+    end_date = datetime.date.fromisoformat(end)
+    if end_date < start_date:
+        raise ValueError(f"Invalid date range: {start!r} is after {end!r}")
+
+    ranges: List[Tuple[str, str]] = []
+    while start_date <= end_date:
+        range_end = min(start_date + datetime.timedelta(days=days - 1), end_date)
+        ranges.append((start_date.isoformat(), range_end.isoformat()))
+        start_date = range_end + datetime.timedelta(days=1)
+
+    return ranges
@@ -14,10 +14,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
 import os
-import shutil
+from unittest import mock
+
+import pytest
 
 from snapcraft_legacy.file_utils import calculate_hash
+from snapcraft_legacy.internal import cache
+from snapcraft_legacy.internal.cache import _file
 
 
 class TestFileCache:
@@ -64,10 +69,118 @@ class TestFileCache:
         def fake_copy(*args, **kwargs):
             raise OSError()
 
-        monkeypatch.setattr(shutil, "copyfile", fake_copy)
+        monkeypatch.setattr(_file, "copy", fake_copy)
 
         cached_file = file_cache.cache(
             filename=random_data_file, algorithm=algo, hash=calculated_hash
         )
 
         assert cached_file is None
+
+
+def _cache_data(file_cache, tmp_path, data):
+    data_path = tmp_path / "data"
+    data_path.write_bytes(data)
+    return file_cache.cache(
+        filename=str(data_path),
+        algorithm="sha256",
+        hash=hashlib.sha256(data).hexdigest(),
+    )
+
+
+def test_materialize(xdg_dirs, tmp_path):
+    file_cache = cache.FileCache()
+    cached_file = _cache_data(file_cache, tmp_path, b"data")
+    destination = tmp_path / "destination"
+    destination.write_bytes(b"old data")
+
+    assert file_cache.materialize(
+        algorithm="sha256",
+        hash=hashlib.sha256(b"data").hexdigest(),
+        destination=str(destination),
+    )
+
+    assert destination.read_bytes() == b"data"
+    assert os.stat(cached_file).st_mode & 0o777 == 0o444
+    # The destination is never linked to the cached file.
+    assert os.stat(destination).st_ino != os.stat(cached_file).st_ino
+    destination.write_bytes(b"modified")
+    with open(cached_file, "rb") as cached:
+        assert cached.read() == b"data"
+
+
+def test_materialize_not_cached(xdg_dirs, tmp_path):
+    destination = tmp_path / "destination"
+
+    assert not cache.FileCache().materialize(
+        algorithm="sha256", hash="1", destination=str(destination)
+    )
+    assert not destination.exists()
+
+
+def test_materialize_corrupted(xdg_dirs, tmp_path):
+    file_cache = cache.FileCache()
+    cached_file = _cache_data(file_cache, tmp_path, b"data")
+    os.chmod(cached_file, 0o644)
+    with open(cached_file, "wb") as cached:
+        cached.write(b"corrupted")
+    destination = tmp_path / "destination"
+
+    assert not file_cache.materialize(
+        algorithm="sha256",
+        hash=hashlib.sha256(b"data").hexdigest(),
+        destination=str(destination),
+    )
+    assert not destination.exists()
+    assert not os.path.exists(cached_file)
+
+
+def test_cache_without_verify(xdg_dirs, tmp_path, monkeypatch):
+    calculate_hash_mock = mock.Mock(return_value=hashlib.sha256(b"data").hexdigest())
+    monkeypatch.setattr(_file, "calculate_hash", calculate_hash_mock)
+
+    assert _cache_data(cache.FileCache(), tmp_path, b"data") is not None
+    calculate_hash_mock.assert_called_once()
+
+    data_path = tmp_path / "other"
+    data_path.write_bytes(b"other")
+    assert (
+        cache.FileCache()
+        .cache(filename=str(data_path), algorithm="sha256", hash="1", verify=False)
+        .endswith("sha256/1")
+    )
+    calculate_hash_mock.assert_called_once()
+
+
+def test_evict_least_recently_used(xdg_dirs, tmp_path):
+    file_cache = cache.FileCache(max_size=10)
+    first = _cache_data(file_cache, tmp_path, b"first")
+    second = _cache_data(file_cache, tmp_path, b"12345")
+    # Make first the most recently used.
+    os.utime(second, ns=(1, 1))
+    assert file_cache.get(algorithm="sha256", hash=os.path.basename(first))
+
+    third = _cache_data(file_cache, tmp_path, b"third")
+
+    assert os.path.exists(first)
+    assert not os.path.exists(second)
+    assert os.path.exists(third)
+
+
+def test_never_evict_added_file(xdg_dirs, tmp_path):
+    cached_file = _cache_data(cache.FileCache(max_size=1), tmp_path, b"data")
+
+    assert os.path.exists(cached_file)
+
+
+@pytest.mark.parametrize(
+    "value,max_size",
+    [(None, 10 * 1024**3), ("5", 5 * 1024**2), ("nan", 10 * 1024**3)],
+)
+def test_get_max_size(monkeypatch, value, max_size):
+    if value is None:
+        monkeypatch.delenv("SNAPCRAFT_FILE_CACHE_MAX_SIZE", raising=False)
+    else:
+        monkeypatch.setenv("SNAPCRAFT_FILE_CACHE_MAX_SIZE", value)
+
+    assert _file.get_max_size() == max_size
@@ -139,3 +139,81 @@ class MetricsCommandTestCase(FakeStoreCommandsBaseTestCase):
             """
         )
         assert result.exit_code == 0
+
+    def test_metrics_export_csv(self):
+        result = self.run_command(
+            [
+                "metrics",
+                "snap-test",
+                "--name",
+                "daily_device_change",
+                "--format",
+                "csv",
+            ]
+        )
+
+        assert result.output == dedent(
+            """\
+            snap_name,metric_name,series,date,value
+            snap-test,daily_device_change,continued,2021-01-01,10
+            snap-test,daily_device_change,continued,2021-01-02,11
+            snap-test,daily_device_change,continued,2021-01-03,12
+            snap-test,daily_device_change,lost,2021-01-01,1
+            snap-test,daily_device_change,lost,2021-01-02,2
+            snap-test,daily_device_change,lost,2021-01-03,3
+            snap-test,daily_device_change,new,2021-01-01,2
+            snap-test,daily_device_change,new,2021-01-02,3
+            snap-test,daily_device_change,new,2021-01-03,4
+            """
+        )
+        assert result.exit_code == 0
+
+    def test_metrics_export_ndjson_chunks_date_range(self):
+        result = self.run_command(
+            [
+                "metrics",
+                "snap-test",
+                "--name",
+                "daily_device_change",
+                "--name",
+                "installed_base_by_version",
+                "--start",
+                "2021-01-01",
+                "--end",
+                "2021-06-30",
+                "--format",
+                "ndjson",
+            ]
+        )
+
+        assert result.exit_code == 0
+        # One request per 90 day chunk, for all metric names at once.
+        assert self.fake_store_get_metrics.mock.call_count == 3
+        filters = self.fake_store_get_metrics.mock.mock_calls[0][2]["filters"]
+        assert [(f.metric_name, f.start, f.end) for f in filters] == [
+            ("daily_device_change", "2021-01-01", "2021-03-31"),
+            ("installed_base_by_version", "2021-01-01", "2021-03-31"),
+        ]
+        lines = result.output.splitlines()
+        assert len(lines) == 27
+        assert lines[0] == (
+            '{"snap_name": "snap-test", "metric_name": "daily_device_change", '
+            '"series": "continued", "date": "2021-01-01", "value": 10}'
+        )
+
+    def test_metrics_table_with_several_names_fails(self):
+        result = self.run_command(
+            [
+                "metrics",
+                "snap-test",
+                "--name",
+                "daily_device_change",
+                "--name",
+                "installed_base_by_version",
+                "--format",
+                "table",
+            ]
+        )
+
+        assert result.exit_code == 2
+        assert "Only one snap and metric name are supported" in result.output
@@ -0,0 +1,192 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import textwrap
+from unittest import mock
+
+import fixtures
+from testtools.matchers import Contains, Equals, FileExists, Not
+
+from snapcraft_legacy.internal import errors, lifecycle, steps
+from snapcraft_legacy.internal.lifecycle._scheduler import get_parallel_parts
+
+from . import LifecycleTestBase
+
+# Waits for a file created by another part, which can only work if both
+# parts are pulled at the same time.
+_WAIT_FOR = (
+    "for i in $(seq 100); do [ -f ../../{0} ] && exit 0; sleep 0.1; done; exit 1"
+)
+
+
+@mock.patch("snapcraft_legacy.repo.snaps.install_snaps")
+class SchedulerTestCase(LifecycleTestBase):
+    def setUp(self):
+        super().setUp()
+        self.useFixture(fixtures.EnvironmentVariable("SNAPCRAFT_PARALLEL_PARTS", "4"))
+        self.useFixture(
+            fixtures.MockPatch(
+                "snapcraft_legacy.internal.lifecycle._runner._get_required_grade",
+                return_value="stable",
+            )
+        )
+
+    def test_independent_parts_run_concurrently(self, mock_install_build_snaps):
+        project_config = self.make_snapcraft_project(
+            textwrap.dedent(
+                f"""\
+                parts:
+                  part1:
+                    plugin: nil
+                    override-pull: |
+                      touch ../../part1-pulling
+                      {_WAIT_FOR.format("part2-pulling")}
+                  part2:
+                    plugin: nil
+                    override-pull: |
+                      touch ../../part2-pulling
+                      {_WAIT_FOR.format("part1-pulling")}
+                """
+            )
+        )
+
+        lifecycle.execute(steps.PRIME, project_config)
+
+        for part in ("part1", "part2"):
+            self.assertThat(f"parts/{part}/state/prime", FileExists())
+
+    def test_output_is_prefixed_in_order(self, mock_install_build_snaps):
+        project_config = self.make_snapcraft_project(
+            textwrap.dedent(
+                """\
+                parts:
+                  part1:
+                    plugin: nil
+                    override-pull: |
+                      sleep 0.5
+                      echo pulled part1
+                  part2:
+                    plugin: nil
+                    override-pull: echo pulled part2
+                """
+            )
+        )
+
+        lifecycle.execute(steps.PULL, project_config)
+
+        lines = [
+            line
+            for line in self.fake_logger.output.splitlines()
+            if line.startswith("[")
+        ]
+        self.assertThat(
+            lines,
+            Equals(
+                [
+                    "[part1] Pulling part1 ",
+                    "[part1] + sleep 0.5",
+                    "[part1] + echo pulled part1",
+                    "[part1] pulled part1",
+                    "[part2] Pulling part2 ",
+                    "[part2] + echo pulled part2",
+                    "[part2] pulled part2",
+                ]
+            ),
+        )
+
+    def test_dependency_is_staged_before_pull(self, mock_install_build_snaps):
+        project_config = self.make_snapcraft_project(
+            textwrap.dedent(
+                """\
+                parts:
+                  part1:
+                    plugin: nil
+                    override-build: touch $SNAPCRAFT_PART_INSTALL/part1-file
+                  part2:
+                    plugin: nil
+                    after: [part1]
+                    override-pull: test -f $SNAPCRAFT_STAGE/part1-file
+                """
+            )
+        )
+
+        lifecycle.execute(steps.PULL, project_config, part_names=["part2"])
+
+        self.assertThat("stage/part1-file", FileExists())
+        self.assertThat("parts/part2/state/pull", FileExists())
+        self.assertThat("parts/part2/state/build", Not(FileExists()))
+
+    def test_collisions_are_checked_before_stage(self, mock_install_build_snaps):
+        project_config = self.make_snapcraft_project(
+            textwrap.dedent(
+                """\
+                parts:
+                  part1:
+                    plugin: nil
+                    override-build: echo 1 > $SNAPCRAFT_PART_INSTALL/file
+                  part2:
+                    plugin: nil
+                    override-build: echo 2 > $SNAPCRAFT_PART_INSTALL/file
+                """
+            )
+        )
+
+        self.assertRaises(
+            errors.SnapcraftPartConflictError,
+            lifecycle.execute,
+            steps.STAGE,
+            project_config,
+        )
+
+        self.assertThat("stage/file", Not(FileExists()))
+
+    def test_first_error_is_raised(self, mock_install_build_snaps):
+        project_config = self.make_snapcraft_project(
+            textwrap.dedent(
+                """\
+                parts:
+                  part1:
+                    plugin: nil
+                    override-build: sleep 0.5; exit 1
+                  part2:
+                    plugin: nil
+                    override-build: exit 2
+                """
+            )
+        )
+
+        raised = self.assertRaises(
+            errors.ScriptletRunError, lifecycle.execute, steps.BUILD, project_config
+        )
+
+        self.assertThat(str(raised), Contains("Exit code was 1"))
+        # part2 was not stopped by the failure of part1
+        self.assertThat("parts/part2/state/pull", FileExists())
+
+
+class GetParallelPartsTestCase(LifecycleTestBase):
+    def test_default(self):
+        self.assertThat(get_parallel_parts(), Equals(1))
+
+    def test_from_environment(self):
+        self.useFixture(fixtures.EnvironmentVariable("SNAPCRAFT_PARALLEL_PARTS", "8"))
+
+        self.assertThat(get_parallel_parts(), Equals(8))
+
+    def test_invalid(self):
+        self.useFixture(fixtures.EnvironmentVariable("SNAPCRAFT_PARALLEL_PARTS", "x"))
+
+        self.assertThat(get_parallel_parts(), Equals(1))
@@ -1336,6 +1336,69 @@ class CollisionTestCase(unit.TestCase):
         # a part not built doesn't have the stage file in the installdir.
         pluginhandler.check_for_collisions([part_built, part_not_built])
 
+    def _make_part_with_file(self, name, contents):
+        part = self.load_part(name)
+        part.part_install_dir = os.path.join(self.path, name)
+        os.makedirs(part.part_install_dir)
+        with open(os.path.join(part.part_install_dir, "file"), mode="w") as f:
+            f.write(contents)
+        return part
+
+    def test_collisions_same_size_different_contents(self):
+        part_a = self._make_part_with_file("part-a", "aaa")
+        part_b = self._make_part_with_file("part-b", "bbb")
+
+        raised = self.assertRaises(
+            errors.SnapcraftPartConflictError,
+            pluginhandler.check_for_collisions,
+            [part_a, part_b],
+        )
+
+        self.assertThat(raised.file_paths, Equals("    file"))
+
+    @patch("snapcraft_legacy.internal.pluginhandler._collisions._get_digest")
+    def test_hard_linked_files_are_not_read(self, mock_get_digest):
+        part_a = self._make_part_with_file("part-a", "same")
+        part_b = self.load_part("part-b")
+        part_b.part_install_dir = os.path.join(self.path, "part-b")
+        os.makedirs(part_b.part_install_dir)
+        os.link(
+            os.path.join(part_a.part_install_dir, "file"),
+            os.path.join(part_b.part_install_dir, "file"),
+        )
+
+        pluginhandler.check_for_collisions([part_a, part_b])
+
+        mock_get_digest.assert_not_called()
+
+    @patch(
+        "snapcraft_legacy.internal.pluginhandler._collisions._get_digest",
+        wraps=pluginhandler._collisions._get_digest,
+    )
+    def test_digests_are_cached(self, mock_get_digest):
+        parts = [
+            self._make_part_with_file(f"part-{i}", "same contents") for i in range(3)
+        ]
+
+        pluginhandler.check_for_collisions(parts)
+        pluginhandler.check_for_collisions(parts)
+
+        self.assertThat(mock_get_digest.call_count, Equals(3))
+
+    def test_collisions_reports_first_pair_of_parts(self):
+        part_a = self._make_part_with_file("part-a", "a")
+        part_b = self._make_part_with_file("part-b", "a")
+        part_c = self._make_part_with_file("part-c", "c")
+
+        raised = self.assertRaises(
+            errors.SnapcraftPartConflictError,
+            pluginhandler.check_for_collisions,
+            [part_a, part_b, part_c],
+        )
+
+        self.assertThat(raised.other_part_name, Equals("part-a"))
+        self.assertThat(raised.part_name, Equals("part-c"))
+
 
 class StagePackagesTestCase(unit.TestCase):
     def test_missing_stage_package_raises_exception(self):
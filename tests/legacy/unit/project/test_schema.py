@@ -14,6 +14,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import logging
+import os
+import shutil
 from textwrap import dedent
 from unittest import mock
 
@@ -24,6 +27,8 @@ from testtools.matchers import Contains, Equals
 # required for schema format checkers
 import snapcraft_legacy.internal.project_loader._config  # noqa: F401
 import snapcraft_legacy.yaml_utils.errors
+from snapcraft_legacy.internal import common
+from snapcraft_legacy.project import _schema
 from snapcraft_legacy.project._schema import Validator
 
 from . import ProjectBaseTest
@@ -84,11 +89,9 @@ class ValidationTest(ValidationBaseTest):
         self.assertThat(raised.message, Equals(expected_message), message=self.data)
 
     def test_schema_file_not_found(self):
-        mock_the_open = mock.mock_open()
-        mock_the_open.side_effect = FileNotFoundError()
-
         with mock.patch(
-            "snapcraft_legacy.project._schema.open", mock_the_open, create=True
+            "snapcraft_legacy.internal.common.get_schemadir",
+            return_value="/does/not/exist",
         ):
             raised = self.assertRaises(
                 snapcraft_legacy.yaml_utils.errors.YamlValidationError,
@@ -1555,3 +1558,60 @@ def test_invalid_metadata_links(data, contact, donation, issues, source_code, we
 
     with pytest.raises(snapcraft_legacy.yaml_utils.errors.YamlValidationError):
         Validator(data).validate()
+
+
+@pytest.fixture
+def compiled_schemas(monkeypatch):
+    """Start with no schema loaded."""
+    compiled_schemas = {}
+    monkeypatch.setattr(_schema, "_compiled_schemas", compiled_schemas)
+    return compiled_schemas
+
+
+def test_schema_loaded_once(data, compiled_schemas, mocker):
+    json_load = mocker.spy(_schema.json, "load")
+
+    Validator(data).validate()
+    Validator(get_data()).validate()
+
+    assert json_load.call_count == 1
+
+
+def test_schema_reloaded_on_change(data, compiled_schemas, mocker, tmp_path):
+    schema_file = tmp_path / "snapcraft.json"
+    shutil.copy(os.path.join(common.get_schemadir(), "snapcraft.json"), schema_file)
+    mocker.patch(
+        "snapcraft_legacy.internal.common.get_schemadir", return_value=str(tmp_path)
+    )
+    json_load = mocker.spy(_schema.json, "load")
+
+    Validator(data).validate()
+    schema_stat = schema_file.stat()
+    os.utime(
+        schema_file,
+        ns=(schema_stat.st_atime_ns, schema_stat.st_mtime_ns + 1_000_000_000),
+    )
+    Validator(data).validate()
+
+    assert json_load.call_count == 2
+
+
+def test_identical_document_validated_once(data, compiled_schemas, caplog):
+    caplog.set_level(logging.DEBUG, logger="snapcraft_legacy.project._schema")
+
+    Validator(data).validate()
+    Validator(get_data()).validate(source="properties")
+
+    assert [r.message for r in caplog.records] == [
+        mock.ANY,
+        "Skipping validation of properties, already validated.",
+    ]
+    assert caplog.records[0].message.startswith("Validated snapcraft.yaml in ")
+
+
+def test_invalid_document_validated_every_time(data, compiled_schemas):
+    data["summary"] = "a" * 80
+
+    for _ in range(2):
+        with pytest.raises(snapcraft_legacy.yaml_utils.errors.YamlValidationError):
+            Validator(data).validate()
@@ -15,9 +15,11 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import subprocess
 import tarfile
 from collections import OrderedDict
 from pathlib import Path
+from unittest import mock
 
 from testtools.matchers import Equals
 
@@ -228,3 +230,92 @@ class WorkTreeTestCase(unit.TestCase):
                 )
             ),
         )
+
+    def test_parts_order_kept(self):
+        part_names = ["part-{}".format(i) for i in range(10)]
+        for part_name in part_names:
+            self._snapcraft_yaml.update_part(
+                part_name, {"plugin": "nil", "source": self._source.path}
+            )
+        self._project = Project(
+            snapcraft_yaml_file_path=self._snapcraft_yaml.snapcraft_yaml_file_path
+        )
+        self._project._project_dir = self._source.path
+        WorkTree(self._dest.path, self._project, jobs=4).prepare_repository()
+
+        config = yaml_utils.load_yaml_file(
+            str(Path(self._dest.path, "repo", "snap", "snapcraft.yaml"))
+        )
+        self.assertThat(list(config["parts"]), Equals(["my-part"] + part_names))
+        for part_name in part_names:
+            self.assertThat(
+                config["parts"][part_name]["source"],
+                Equals("sources/{0}/{0}.tar.gz".format(part_name)),
+            )
+
+    @mock.patch("shutil.which", return_value="/usr/bin/pigz")
+    @mock.patch("subprocess.check_call")
+    def test_archive_with_pigz(self, mock_check_call, mock_which):
+        self._wt.prepare_repository()
+
+        mock_check_call.assert_called_once_with(
+            [
+                "tar",
+                "-I",
+                "pigz",
+                "-cf",
+                self.archive_path("my-part"),
+                "-C",
+                os.path.join(self._dest.path, "cache", "my-part"),
+                ".",
+            ]
+        )
+
+    def _git(self, path, *args):
+        subprocess.check_call(
+            ["git", "-C", path, "-c", "user.name=test", "-c", "user.email=test@test"]
+            + list(args),
+            stdout=subprocess.DEVNULL,
+        )
+
+    def _load_git_part_worktree(self):
+        git_source = self.useFixture(TestDir())
+        git_source.create_file("foo")
+        self._git(git_source.path, "init", "-q")
+        self._git(git_source.path, "add", "foo")
+        self._git(git_source.path, "commit", "-q", "-m", "foo")
+        self._snapcraft_yaml.update_part(
+            "git-part",
+            {"plugin": "nil", "source": git_source.path, "source-type": "git"},
+        )
+        self.load_project_and_worktree()
+        return git_source
+
+    def test_git_source_unchanged_is_reused(self):
+        self._load_git_part_worktree()
+        WorkTree(
+            self._dest.path, self._project, package_all_sources=True
+        ).prepare_repository()
+
+        with mock.patch("snapcraft_legacy.internal.sources.Git.pull") as mock_pull:
+            WorkTree(
+                self._dest.path, self._project, package_all_sources=True
+            ).prepare_repository()
+
+        mock_pull.assert_not_called()
+        self.assertTrue(self.tarball_file_contains("git-part", None, "foo"))
+
+    def test_git_source_changed_is_pulled(self):
+        git_source = self._load_git_part_worktree()
+        WorkTree(
+            self._dest.path, self._project, package_all_sources=True
+        ).prepare_repository()
+
+        git_source.create_file("bar")
+        self._git(git_source.path, "add", "bar")
+        self._git(git_source.path, "commit", "-q", "-m", "bar")
+        WorkTree(
+            self._dest.path, self._project, package_all_sources=True
+        ).prepare_repository()
+
+        self.assertTrue(self.tarball_file_contains("git-part", None, "bar"))
@@ -14,11 +14,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
 import os
 import shutil
 import unittest
 from pathlib import Path
-from unittest.mock import call
+from unittest.mock import ANY, Mock, call
 
 import fixtures
 import pytest
@@ -28,6 +29,14 @@ from snapcraft_legacy.internal.repo.apt_cache import AptCache
 from snapcraft_legacy.internal.repo.errors import PopulateCacheDirError
 from tests.legacy import unit
 
+from .test_deb_extractor import make_deb
+
+
+@pytest.fixture(autouse=True)
+def close_sessions():
+    yield
+    AptCache.close_sessions()
+
 
 class TestAptStageCache(unit.TestCase):
     # This are expensive tests, but is much more valuable than using mocks.
@@ -75,6 +84,7 @@ class TestMockedApt(unit.TestCase):
 
         with AptCache(stage_cache=stage_cache):
             pass
+        AptCache.close_sessions()
 
         self.assertThat(
             self.fake_apt.mock_calls,
@@ -119,6 +129,7 @@ class TestMockedApt(unit.TestCase):
 
         with AptCache(stage_cache=stage_cache):
             pass
+        AptCache.close_sessions()
 
         self.assertThat(
             self.fake_apt.mock_calls,
@@ -165,6 +176,7 @@ class TestMockedApt(unit.TestCase):
 
         with AptCache() as _:
             pass
+        AptCache.close_sessions()
 
         self.assertThat(
             self.fake_apt.mock_calls, Equals([call.Cache(), call.Cache().close()])
@@ -253,3 +265,107 @@ def test_populate_stage_cache_dir_permission_error(mocker, tmp_path):
         f"Unable to copy {Path('/etc/apt')} to {tmp_path / 'etc/apt'}: "
         "[Errno 13] Permission denied: '/etc/apt\n"
     )
+
+
+def test_session_is_shared(mocker, tmp_path):
+    fake_apt = mocker.patch("snapcraft_legacy.internal.repo.apt_cache.apt")
+
+    with AptCache(stage_cache=tmp_path, stage_cache_arch="amd64") as apt_cache:
+        cache = apt_cache.cache
+    with AptCache(stage_cache=tmp_path, stage_cache_arch="amd64") as apt_cache:
+        assert apt_cache.cache is cache
+    with AptCache(stage_cache=tmp_path, stage_cache_arch="arm64") as apt_cache:
+        pass
+
+    assert fake_apt.Cache.mock_calls == [
+        call(rootdir=str(tmp_path), memonly=True),
+        call().clear(),
+        call(rootdir=str(tmp_path), memonly=True),
+    ]
+
+    AptCache.close_sessions()
+
+    with AptCache(stage_cache=tmp_path, stage_cache_arch="amd64") as apt_cache:
+        pass
+
+    assert fake_apt.Cache.mock_calls[-3:] == [
+        call().close(),
+        call().close(),
+        call(rootdir=str(tmp_path), memonly=True),
+    ]
+
+
+def test_populate_stage_cache_dir_reuses_config(mocker, tmp_path):
+    mocker.patch(
+        "snapcraft_legacy.internal.repo.apt_cache._get_apt_config_digest",
+        side_effect=["digest-1", "digest-1", "digest-2"],
+    )
+    mock_copytree = mocker.patch(
+        "snapcraft_legacy.internal.repo.apt_cache.shutil.copytree",
+        side_effect=lambda src, dst: dst.mkdir(),
+    )
+    apt_cache = AptCache(stage_cache=tmp_path)
+
+    apt_cache._populate_stage_cache_dir()
+    apt_cache._populate_stage_cache_dir()
+
+    assert mock_copytree.mock_calls == [call(Path("/etc/apt"), tmp_path / "etc/apt")]
+    assert (tmp_path / "etc" / "apt.sha256").read_text() == "digest-1"
+
+    apt_cache._populate_stage_cache_dir()
+
+    assert mock_copytree.mock_calls == [call(ANY, ANY), call(ANY, ANY)]
+    assert (tmp_path / "etc" / "apt.sha256").read_text() == "digest-2"
+
+
+def test_fetch_archives(mocker, tmp_path):
+    fake_apt = mocker.patch("snapcraft_legacy.internal.repo.apt_cache.apt")
+    fake_apt.apt_pkg.config.find.return_value = ""
+    deb_path = make_deb(tmp_path / "hello_1.0_amd64.deb")
+    hello = Mock()
+    hello.name = "hello"
+    hello.candidate.version = "1.0"
+    hello.candidate.uri = deb_path.as_uri()
+    hello.candidate.sha256 = hashlib.sha256(deb_path.read_bytes()).hexdigest()
+    hello.candidate.filename = "pool/main/h/hello/hello_1.0_amd64.deb"
+    # Packages from unsupported sources are fetched by apt.
+    other = Mock()
+    other.name = "other"
+    other.candidate.version = "2.0"
+    other.candidate.uri = "cdrom://other_2.0_amd64.deb"
+    other.candidate.sha256 = "0" * 64
+    other.candidate.filename = "other_2.0_amd64.deb"
+    other.candidate.fetch_binary.return_value = str(tmp_path / "other.deb")
+
+    with AptCache(stage_cache=tmp_path / "stage-cache") as apt_cache:
+        apt_cache.cache.get_changes.return_value = [hello, other]
+        fetched = apt_cache.fetch_archives(tmp_path / "debs")
+
+    assert fetched == [
+        (
+            "hello",
+            "1.0",
+            tmp_path
+            / "debs"
+            / "sha256"
+            / hello.candidate.sha256
+            / "hello_1.0_amd64.deb",
+        ),
+        ("other", "2.0", tmp_path / "other.deb"),
+    ]
+    hello.candidate.fetch_binary.assert_not_called()
+    other.candidate.fetch_binary.assert_called_once_with(str(tmp_path / "debs"))
+
+
+def test_fetch_archives_with_apt(mocker, tmp_path):
+    mocker.patch("snapcraft_legacy.internal.repo.apt_cache.apt")
+    hello = Mock()
+    hello.name = "hello"
+    hello.candidate.version = "1.0"
+    hello.candidate.fetch_binary.return_value = str(tmp_path / "hello.deb")
+
+    with AptCache(stage_cache=tmp_path / "stage-cache") as apt_cache:
+        apt_cache.cache.get_changes.return_value = [hello]
+        fetched = apt_cache.fetch_archives(tmp_path / "debs", downloads_per_host=0)
+
+    assert fetched == [("hello", "1.0", tmp_path / "hello.deb")]
@@ -15,6 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import contextlib
+import os
 import textwrap
 from pathlib import Path
 from subprocess import CalledProcessError
@@ -26,11 +27,14 @@ import pytest
 import testtools
 from testtools.matchers import Equals
 
-from snapcraft_legacy.internal import repo
+from snapcraft_legacy.internal import repo, xattrs
 from snapcraft_legacy.internal.repo import errors
 from snapcraft_legacy.internal.repo.deb_package import DebPackage
 from tests.legacy import unit
 
+from .test_deb_extractor import make_deb
+from .test_dpkg_db import make_admin_dir
+
 
 @pytest.fixture(autouse=True)
 def mock_env_copy():
@@ -575,32 +579,16 @@ class PackageForFileTest(unit.TestCase):
     def setUp(self):
         super().setUp()
 
-        def fake_dpkg_query(*args, **kwargs):
-            # dpkg-query -S file_path
-            if args[0][2].as_posix() == "/bin/bash":
-                return "bash: /bin/bash\n".encode()
-            elif args[0][2].as_posix() == "/bin/sh":
-                return (
-                    "diversion by dash from: /bin/sh\n"
-                    "diversion by dash to: /bin/sh.distrib\n"
-                    "dash: /bin/sh\n"
-                ).encode()
-            elif "symlink" in args[0][2].as_posix():
-                raise CalledProcessError(
-                    1,
-                    f"dpkg-query: no path found matching pattern {args[0][2]}",
-                )
-            elif "target" in args[0][2].as_posix():
-                return "coreutils: /usr/bin/dirname\n".encode()
-            else:
-                raise CalledProcessError(
-                    1,
-                    f"dpkg-query: no path found matching pattern {args[0][2]}",
-                )
-
-        self.useFixture(
-            fixtures.MockPatch("subprocess.check_output", side_effect=fake_dpkg_query)
+        admin_dir = make_admin_dir(
+            Path(self.useFixture(fixtures.TempDir()).path),
+            {
+                "bash": ["/bin/bash"],
+                "dash": ["/bin/sh"],
+                "coreutils": [str(Path.cwd().resolve() / "target")],
+            },
+            [("/bin/sh", "/bin/sh.distrib", "dash")],
         )
+        self.useFixture(fixtures.MockPatchObject(repo.dpkg_db, "_ADMIN_DIR", admin_dir))
 
     def test_get_package_for_file(self):
         self.assertThat(repo.Ubuntu.get_package_for_file("/bin/bash"), Equals("bash"))
@@ -738,3 +726,95 @@ def test_get_filtered_stage_package_empty_ignore_filter(mock_get_packages_in_bas
     )
 
     assert filtered_names == {"some-base-pkg", "some-other-base-pkg"}
+
+
+@pytest.fixture
+def unpack_paths(tmp_path, mocker):
+    """Return the cache, packages and install paths to unpack with."""
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    mocker.patch.object(repo._deb, "_EXTRACTED_DEB_CACHE_DIR", cache_dir)
+    mocker.patch.object(repo._deb.Ubuntu, "normalize")
+
+    packages_path = tmp_path / "packages"
+    packages_path.mkdir()
+    install_path = tmp_path / "install"
+    install_path.mkdir()
+    return cache_dir, packages_path, install_path
+
+
+def test_unpack_stage_packages(unpack_paths):
+    cache_dir, packages_path, install_path = unpack_paths
+    make_deb(packages_path / "hello.deb")
+    make_deb(
+        packages_path / "other.deb",
+        package="other",
+        version="1:2.0",
+        files={"./usr/bin/other": b"other"},
+    )
+
+    repo.Ubuntu.unpack_stage_packages(
+        stage_packages_path=packages_path, install_path=install_path
+    )
+
+    hello = install_path / "usr" / "bin" / "hello"
+    other = install_path / "usr" / "bin" / "other"
+    assert hello.read_bytes() == b"#!/bin/sh\necho hello\n"
+    assert xattrs.read_origin_stage_package(str(hello)) == "hello=1.0"
+    assert xattrs.read_origin_stage_package(str(other)) == "other=1:2.0"
+    assert sorted(p.name for p in cache_dir.iterdir()) == [
+        "hello_1.0_amd64",
+        "other_1%3a2.0_amd64",
+    ]
+    # The install directory does not share files with the cache.
+    cached = cache_dir / "hello_1.0_amd64" / "usr" / "bin" / "hello"
+    assert hello.stat().st_ino != cached.stat().st_ino
+
+
+def test_unpack_stage_packages_uses_cache(unpack_paths, mocker):
+    _, packages_path, install_path = unpack_paths
+    make_deb(packages_path / "hello.deb")
+    repo.Ubuntu.unpack_stage_packages(
+        stage_packages_path=packages_path, install_path=install_path
+    )
+    extract_mock = mocker.patch.object(repo._deb.DebFile, "extract")
+
+    new_install_path = install_path.parent / "new-install"
+    repo.Ubuntu.unpack_stage_packages(
+        stage_packages_path=packages_path, install_path=new_install_path
+    )
+
+    extract_mock.assert_not_called()
+    assert (new_install_path / "usr" / "bin" / "hello").exists()
+
+
+def test_unpack_stage_packages_evicts_unused(unpack_paths):
+    cache_dir, packages_path, install_path = unpack_paths
+    make_deb(packages_path / "hello.deb")
+    old_dir = cache_dir / "old_1.0_amd64"
+    (old_dir / "usr").mkdir(parents=True)
+    (old_dir / "usr").chmod(0o555)
+    os.utime(old_dir, (0, 0))
+    recent_dir = cache_dir / "recent_1.0_amd64"
+    recent_dir.mkdir()
+
+    repo.Ubuntu.unpack_stage_packages(
+        stage_packages_path=packages_path, install_path=install_path
+    )
+
+    assert sorted(p.name for p in cache_dir.iterdir()) == [
+        "hello_1.0_amd64",
+        "recent_1.0_amd64",
+    ]
+
+
+def test_unpack_stage_packages_unsupported_compression(unpack_paths, mocker):
+    _, packages_path, install_path = unpack_paths
+    deb_path = make_deb(packages_path / "hello.deb", data_compression="zst")
+    extract_deb_mock = mocker.patch.object(repo._deb.Ubuntu, "_extract_deb")
+
+    repo.Ubuntu.unpack_stage_packages(
+        stage_packages_path=packages_path, install_path=install_path
+    )
+
+    extract_deb_mock.assert_called_once_with(deb_path, mock.ANY)
@@ -0,0 +1,130 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import http.client
+import threading
+import time
+
+import pytest
+
+from snapcraft_legacy.internal.repo import errors
+from snapcraft_legacy.internal.repo._deb_downloader import DebArchive, DebDownloader
+
+from .test_deb_extractor import make_deb
+
+
+@pytest.fixture
+def file_archive(tmp_path):
+    """Return the packages of a local file:// archive."""
+    pool_path = tmp_path / "archive" / "pool" / "main"
+    pool_path.mkdir(parents=True)
+
+    archives = []
+    for package in ("hello", "other", "third"):
+        deb_path = make_deb(pool_path / f"{package}_1.0_amd64.deb", package=package)
+        archives.append(
+            DebArchive(
+                uri=deb_path.as_uri(),
+                sha256=hashlib.sha256(deb_path.read_bytes()).hexdigest(),
+                file_name=deb_path.name,
+            )
+        )
+    return archives
+
+
+def test_download(tmp_path, file_archive):
+    downloader = DebDownloader(tmp_path / "cache", downloads_per_host=2)
+
+    paths = downloader.download(file_archive)
+
+    assert paths == [
+        tmp_path / "cache" / "sha256" / archive.sha256 / archive.file_name
+        for archive in file_archive
+    ]
+    for archive, path in zip(file_archive, paths):
+        assert hashlib.sha256(path.read_bytes()).hexdigest() == archive.sha256
+    assert not list((tmp_path / "cache").glob("sha256/*/.download-*"))
+
+
+def test_download_uses_cache(tmp_path, file_archive):
+    downloader = DebDownloader(tmp_path / "cache", downloads_per_host=2)
+    downloader.download(file_archive)
+    for archive in file_archive:
+        (tmp_path / "archive" / "pool" / "main" / archive.file_name).unlink()
+
+    paths = downloader.download(file_archive)
+
+    assert all(path is not None and path.exists() for path in paths)
+
+
+def test_download_limits_per_host(tmp_path, file_archive, mocker):
+    downloader = DebDownloader(tmp_path / "cache", downloads_per_host=2)
+    lock = threading.Lock()
+    active = []
+    max_active = []
+    original_download = downloader._download
+
+    def slow_download(archive):
+        with lock:
+            active.append(archive)
+            max_active.append(len(active))
+        time.sleep(0.1)
+        with lock:
+            active.remove(archive)
+        return original_download(archive)
+
+    mocker.patch.object(downloader, "_download", side_effect=slow_download)
+
+    downloader.download(file_archive)
+
+    assert max(max_active) == 2
+
+
+def test_download_unsupported(tmp_path, file_archive):
+    downloader = DebDownloader(tmp_path / "cache", downloads_per_host=2)
+    archives = [
+        file_archive[0]._replace(uri="cdrom://hello_1.0_amd64.deb"),
+        file_archive[1]._replace(sha256=""),
+        file_archive[2]._replace(uri=file_archive[2].uri + ".missing"),
+    ]
+
+    assert downloader.download(archives) == [None, None, None]
+
+
+def test_download_incomplete(tmp_path, file_archive, mocker):
+    downloader = DebDownloader(tmp_path / "cache", downloads_per_host=2)
+    response = mocker.MagicMock()
+    response.__enter__.return_value.read.side_effect = http.client.IncompleteRead(
+        b"partial"
+    )
+    mocker.patch.object(downloader._opener, "open", return_value=response)
+
+    assert downloader.download(file_archive[:1]) == [None]
+
+    cache_path = downloader.get_cache_path(file_archive[0])
+    assert not list(cache_path.parent.iterdir())
+
+
+def test_download_hash_mismatch(tmp_path, file_archive):
+    downloader = DebDownloader(tmp_path / "cache", downloads_per_host=2)
+    archive = file_archive[0]._replace(sha256="0" * 64)
+
+    with pytest.raises(errors.PackageFetchError):
+        downloader.download([archive])
+
+    assert not downloader.get_cache_path(archive).exists()
+    assert not list(downloader.get_cache_path(archive).parent.iterdir())
@@ -0,0 +1,220 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import contextlib
+import io
+import tarfile
+from typing import Any, Dict
+
+import pytest
+
+from snapcraft_legacy.internal import xattrs
+from snapcraft_legacy.internal.repo import errors
+from snapcraft_legacy.internal.repo._deb_extractor import DebFile, parse_control
+
+
+def _make_tarball(files: Dict[str, Any], compression: str) -> bytes:
+    tarball = io.BytesIO()
+    with tarfile.open(fileobj=tarball, mode=f"w:{compression}") as tar:
+        for name, contents in files.items():
+            if isinstance(contents, tarfile.TarInfo):
+                tar.addfile(contents)
+                continue
+            info = tarfile.TarInfo(name)
+            if name.endswith("/"):
+                # a read-only directory
+                info.type = tarfile.DIRTYPE
+                info.mode = 0o555
+                tar.addfile(info)
+                continue
+            info.size = len(contents)
+            info.mode = 0o755
+            tar.addfile(info, io.BytesIO(contents))
+        link = tarfile.TarInfo("./usr/bin/hello-link")
+        link.type = tarfile.SYMTYPE
+        link.linkname = "hello"
+        tar.addfile(link)
+    return tarball.getvalue()
+
+
+def _ar_member(name: str, data: bytes) -> bytes:
+    header = (
+        f"{name + '/':<16}{0:<12}{0:<6}{0:<6}{100644:<8}{len(data):<10}`\n".encode()
+    )
+    return header + data + (b"\n" if len(data) % 2 else b"")
+
+
+def make_deb(
+    path,
+    *,
+    package="hello",
+    version="1.0",
+    files=None,
+    data_compression="xz",
+):
+    """Write a .deb with the given control fields and files."""
+    if files is None:
+        files = {"./usr/bin/hello": b"#!/bin/sh\necho hello\n"}
+
+    control = (
+        f"Package: {package}\nVersion: {version}\nArchitecture: amd64\n"
+        "Description: a package\n more description\n"
+    ).encode()
+    data_name = "data.tar" + (f".{data_compression}" if data_compression else "")
+    if data_compression in ("", "gz", "bz2", "xz"):
+        data = _make_tarball(files, data_compression)
+    else:
+        data = b"unsupported"
+
+    path.write_bytes(
+        b"!<arch>\n"
+        + _ar_member("debian-binary", b"2.0\n")
+        + _ar_member("control.tar.gz", _make_tarball({"./control": control}, "gz"))
+        + _ar_member(data_name, data)
+    )
+    return path
+
+
+def test_get_control(tmp_path):
+    deb_file = DebFile(make_deb(tmp_path / "hello.deb", version="1:2.0-1"))
+
+    assert deb_file.get_control() == {
+        "Package": "hello",
+        "Version": "1:2.0-1",
+        "Architecture": "amd64",
+        "Description": "a package",
+    }
+
+
+@pytest.mark.parametrize("compression", ["", "gz", "bz2", "xz"])
+def test_extract(tmp_path, compression):
+    deb_file = DebFile(make_deb(tmp_path / "hello.deb", data_compression=compression))
+    extract_dir = tmp_path / "extract"
+    extract_dir.mkdir()
+
+    assert deb_file.extract(str(extract_dir), stage_package="hello=1.0") is True
+
+    hello = extract_dir / "usr" / "bin" / "hello"
+    assert hello.read_bytes() == b"#!/bin/sh\necho hello\n"
+    assert hello.stat().st_mode & 0o777 == 0o755
+    assert (extract_dir / "usr" / "bin" / "hello-link").is_symlink()
+    assert xattrs.read_origin_stage_package(str(hello)) == "hello=1.0"
+
+
+def test_extract_unsupported_compression(tmp_path):
+    deb_file = DebFile(make_deb(tmp_path / "hello.deb", data_compression="zst"))
+
+    assert deb_file.extract(str(tmp_path), stage_package="hello=1.0") is False
+
+
+def test_extract_outside_of_directory(tmp_path):
+    deb_file = DebFile(
+        make_deb(tmp_path / "hello.deb", files={"../escape": b"escaped"})
+    )
+    extract_dir = tmp_path / "extract"
+    extract_dir.mkdir()
+
+    with pytest.raises(errors.UnpackError):
+        deb_file.extract(str(extract_dir), stage_package="hello=1.0")
+
+    assert not (tmp_path / "escape").exists()
+
+
+def test_extract_read_only_directory(tmp_path):
+    deb_file = DebFile(
+        make_deb(
+            tmp_path / "hello.deb",
+            files={"./usr/share/doc/": b"", "./usr/share/doc/hello": b"doc"},
+        )
+    )
+    extract_dir = tmp_path / "extract"
+    extract_dir.mkdir()
+
+    assert deb_file.extract(str(extract_dir), stage_package="hello=1.0") is True
+
+    doc_dir = extract_dir / "usr" / "share" / "doc"
+    assert (doc_dir / "hello").read_bytes() == b"doc"
+    assert doc_dir.stat().st_mode & 0o777 == 0o555
+    assert xattrs.read_origin_stage_package(str(doc_dir / "hello")) == "hello=1.0"
+
+
+def _link(name, linkname, link_type=tarfile.SYMTYPE):
+    info = tarfile.TarInfo(name)
+    info.type = link_type
+    info.linkname = linkname
+    return info
+
+
+@pytest.mark.parametrize(
+    "members",
+    [
+        # a file written through a link to a directory outside
+        {"./escape": _link("./escape", "{victim}"), "./escape/owned": b"owned"},
+        # a link created through a link to a directory outside
+        {
+            "./escape": _link("./escape", "{victim}"),
+            "./escape/owned": _link("./escape/owned", "/etc/passwd"),
+        },
+        # a hard link to a file outside
+        {"./owned": _link("./owned", "../victim/file", tarfile.LNKTYPE)},
+    ],
+    ids=["file-through-symlink", "symlink-through-symlink", "hard-link-outside"],
+)
+def test_extract_malicious(tmp_path, members):
+    victim = tmp_path / "victim"
+    victim.mkdir()
+    (victim / "file").write_bytes(b"file")
+    for member in members.values():
+        if isinstance(member, tarfile.TarInfo):
+            member.linkname = member.linkname.format(victim=victim)
+    deb_file = DebFile(make_deb(tmp_path / "evil.deb", files=members))
+    extract_dir = tmp_path / "extract"
+    extract_dir.mkdir()
+
+    # The package is either rejected or extracted within extract_dir.
+    with contextlib.suppress(errors.UnpackError):
+        deb_file.extract(str(extract_dir), stage_package="evil=1.0")
+
+    assert sorted(p.name for p in victim.iterdir()) == ["file"]
+    assert (victim / "file").read_bytes() == b"file"
+    assert not (extract_dir / "owned").exists()
+
+
+def test_extract_error(tmp_path):
+    deb_file = DebFile(make_deb(tmp_path / "hello.deb"))
+    extract_dir = tmp_path / "extract"
+    extract_dir.mkdir()
+    # a file where the package has a directory
+    (extract_dir / "usr").write_text("not a directory")
+
+    with pytest.raises(errors.UnpackError):
+        deb_file.extract(str(extract_dir), stage_package="hello=1.0")
+
+
+def test_not_a_deb(tmp_path):
+    deb_path = tmp_path / "hello.deb"
+    deb_path.write_bytes(b"not a deb")
+
+    with pytest.raises(errors.UnpackError):
+        DebFile(deb_path).get_control()
+
+
+def test_parse_control():
+    assert parse_control("Package: foo\nDepends: bar,\n baz\nVersion: 1\n") == {
+        "Package": "foo",
+        "Depends": "bar,",
+        "Version": "1",
+    }
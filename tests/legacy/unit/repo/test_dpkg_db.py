@@ -0,0 +1,105 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+import pytest
+
+from snapcraft_legacy.internal.repo import dpkg_db
+
+
+def make_admin_dir(path, lists, diversions=()):
+    """Write a dpkg administrative directory with lists and diversions."""
+    info_dir = path / "info"
+    info_dir.mkdir(parents=True, exist_ok=True)
+    for list_name, files in lists.items():
+        (info_dir / f"{list_name}.list").write_text(
+            "".join(f"{f}\n" for f in ["/."] + files)
+        )
+    (path / "diversions").write_text(
+        "".join(f"{line}\n" for diversion in diversions for line in diversion)
+    )
+    (path / "status").touch()
+    return path
+
+
+@pytest.fixture
+def admin_dir(tmp_path, monkeypatch):
+    admin_dir = make_admin_dir(
+        tmp_path / "dpkg",
+        {
+            "bash": ["/bin", "/bin/bash"],
+            "dash": ["/bin", "/bin/sh", "/usr/share/man/man1/sh.1.gz"],
+            "libc6:amd64": ["/lib", "/lib/libc.so.6"],
+            "manpages": ["/usr/share/man/man1/sh.1.gz"],
+        },
+        [
+            (
+                "/usr/share/man/man1/sh.1.gz",
+                "/usr/share/man/man1/sh.distrib.1.gz",
+                "dash",
+            )
+        ],
+    )
+    monkeypatch.setattr(dpkg_db, "_ADMIN_DIR", admin_dir)
+    return admin_dir
+
+
+@pytest.mark.parametrize(
+    "path,package_name",
+    [
+        ("/bin/bash", "bash"),
+        ("/bin/../bin/sh", "dash"),
+        ("/lib/libc.so.6", "libc6"),
+        ("/usr/share/man/man1/sh.1.gz", "dash"),
+        ("/usr/share/man/man1/sh.distrib.1.gz", "manpages"),
+        ("/bin/not-found", None),
+    ],
+)
+def test_get_package_for_path(admin_dir, path, package_name):
+    assert dpkg_db.get_database().get_package_for_path(path) == package_name
+
+
+def test_get_package_files(admin_dir):
+    database = dpkg_db.get_database()
+
+    assert database.get_package_files("libc6") == {"/lib", "/lib/libc.so.6"}
+    assert database.get_package_files("not-installed") == set()
+
+
+def test_get_database_is_cached(admin_dir):
+    assert dpkg_db.get_database() is dpkg_db.get_database()
+
+
+def test_get_database_rebuilt_on_status_change(admin_dir):
+    database = dpkg_db.get_database()
+    make_admin_dir(admin_dir, {"zsh": ["/bin/zsh"]})
+    status_stat = (admin_dir / "status").stat()
+    os.utime(
+        admin_dir / "status",
+        ns=(status_stat.st_atime_ns, status_stat.st_mtime_ns + 1_000_000_000),
+    )
+
+    new_database = dpkg_db.get_database()
+
+    assert new_database is not database
+    assert new_database.get_package_for_path("/bin/zsh") == "zsh"
+
+
+def test_missing_admin_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(dpkg_db, "_ADMIN_DIR", tmp_path / "missing")
+
+    assert dpkg_db.get_database().get_package_for_path("/bin/bash") is None
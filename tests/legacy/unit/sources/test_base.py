@@ -14,12 +14,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
 import os
 from unittest import mock
 
+import pytest
 import requests
 from testtools.matchers import Contains, Equals
 
+from snapcraft_legacy.internal import cache
 from snapcraft_legacy.internal.sources import _base, errors
 from tests.legacy import unit
 
@@ -102,7 +105,7 @@ class TestFileBase(unit.TestCase):
             file_src.source, stream=True, allow_redirects=True
         )
         mock_request.raise_for_status.assert_called_once_with()
-        mock_download.assert_called_once_with(mock_request, file_src.file)
+        mock_download.assert_called_once_with(mock_request, file_src.file, digest=None)
 
     @mock.patch("snapcraft_legacy.internal.sources._base.download_urllib_source")
     def test_download_ftp(self, mock_download):
@@ -121,3 +124,73 @@ class TestFileBase(unit.TestCase):
         self.assertThat(mock_urlretrieve.call_count, Equals(1))
         self.assertThat(mock_urlretrieve.call_args[0][0], Equals(file_src.source))
         self.assertThat(mock_urlretrieve.call_args[0][1], Equals(file_src.file))
+
+
+@pytest.fixture
+def checksum_source(tmp_path, xdg_dirs):
+    source_dir = tmp_path / "src"
+    source_dir.mkdir()
+    file_src = _base.FileBase(
+        "http://snapcraft.io/file.tar",
+        source_dir.as_posix(),
+        source_checksum="sha256/" + hashlib.sha256(b"contents").hexdigest(),
+    )
+    file_src.provision = mock.Mock()
+    return file_src
+
+
+@pytest.fixture
+def fake_requests(mocker):
+    def fake_download(request, destination, *, digest):
+        with open(destination, "wb") as destination_file:
+            destination_file.write(request.content)
+        digest.update(request.content)
+
+    mocker.patch.object(_base, "download_requests_stream", side_effect=fake_download)
+    return mocker.patch.object(_base, "requests")
+
+
+def test_download_cached(checksum_source, fake_requests):
+    fake_requests.get.return_value.content = b"contents"
+    checksum_source.pull()
+    os.unlink(checksum_source.file)
+
+    checksum_source.pull()
+
+    assert fake_requests.get.call_count == 1
+    with open(checksum_source.file, "rb") as source_file:
+        assert source_file.read() == b"contents"
+
+
+def test_download_cached_corrupted(checksum_source, fake_requests):
+    fake_requests.get.return_value.content = b"contents"
+    checksum_source.pull()
+    os.unlink(checksum_source.file)
+    cached_file = cache.FileCache().get(
+        algorithm="sha256", hash=hashlib.sha256(b"contents").hexdigest()
+    )
+    os.chmod(cached_file, 0o644)
+    with open(cached_file, "wb") as cached:
+        cached.write(b"corrupted")
+
+    checksum_source.pull()
+
+    assert fake_requests.get.call_count == 2
+    with open(checksum_source.file, "rb") as source_file:
+        assert source_file.read() == b"contents"
+    with open(cached_file, "rb") as cached:
+        assert cached.read() == b"contents"
+
+
+def test_download_digest_mismatch(checksum_source, fake_requests):
+    fake_requests.get.return_value.content = b"other contents"
+
+    with pytest.raises(errors.DigestDoesNotMatchError):
+        checksum_source.pull()
+
+    assert (
+        cache.FileCache().get(
+            algorithm="sha256", hash=hashlib.sha256(b"contents").hexdigest()
+        )
+        is None
+    )
@@ -14,6 +14,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+from unittest import mock
+
+from snapcraft_legacy import yaml_utils
+from snapcraft_legacy.internal import states, steps
 from snapcraft_legacy.internal.states._state import PartState
 
 
@@ -62,3 +67,54 @@ class TestState:
         differing_properties = state.diff_project_options_of_interest(_TestProject(new))
 
         assert differing_properties == {"foo"}
+
+
+def _write_state(state_dir, step, state):
+    state_file = states.get_step_state_file(str(state_dir), step)
+    with open(state_file, "w") as f:
+        f.write(yaml_utils.dump(state))
+
+
+def test_get_state_missing(tmp_path):
+    assert states.get_state(str(tmp_path), steps.PULL) is None
+
+
+@mock.patch("snapcraft_legacy.yaml_utils.load", wraps=yaml_utils.load)
+def test_get_state_is_cached(mock_load, tmp_path):
+    _write_state(tmp_path, steps.PULL, {"foo": "bar"})
+
+    assert states.get_state(str(tmp_path), steps.PULL) == {"foo": "bar"}
+    assert states.get_state(str(tmp_path), steps.PULL) == {"foo": "bar"}
+    assert mock_load.call_count == 1
+
+
+def test_get_state_reloaded_when_written(tmp_path):
+    _write_state(tmp_path, steps.PULL, {"foo": "bar"})
+    assert states.get_state(str(tmp_path), steps.PULL) == {"foo": "bar"}
+
+    _write_state(tmp_path, steps.PULL, {"foo": "quux"})
+
+    assert states.get_state(str(tmp_path), steps.PULL) == {"foo": "quux"}
+
+
+def test_forget_state(tmp_path):
+    _write_state(tmp_path, steps.PULL, {"foo": "bar"})
+    state_file = states.get_step_state_file(str(tmp_path), steps.PULL)
+    mtime_ns = os.stat(state_file).st_mtime_ns
+    assert states.get_state(str(tmp_path), steps.PULL) == {"foo": "bar"}
+
+    # Same size and time, as written within the timestamp granularity.
+    _write_state(tmp_path, steps.PULL, {"foo": "baz"})
+    os.utime(state_file, ns=(mtime_ns, mtime_ns))
+    states.forget_state(str(tmp_path), steps.PULL)
+
+    assert states.get_state(str(tmp_path), steps.PULL) == {"foo": "baz"}
+
+
+def test_get_state_removed(tmp_path):
+    _write_state(tmp_path, steps.PULL, {"foo": "bar"})
+    assert states.get_state(str(tmp_path), steps.PULL) == {"foo": "bar"}
+
+    os.remove(states.get_step_state_file(str(tmp_path), steps.PULL))
+
+    assert states.get_state(str(tmp_path), steps.PULL) is None
@@ -0,0 +1,261 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+import craft_store
+import pytest
+import requests
+
+from snapcraft_legacy.storeapi import Downloader, errors
+
+URL = "https://example.com/test.snap"
+CDN_URL = "https://cdn.example.com/test.snap"
+
+
+class FakeResponse:
+    def __init__(self, *, url, status_code, headers, data=b"", fail_after=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self._data = data
+        self._fail_after = fail_after
+
+    def iter_content(self, chunk_size):
+        for offset in range(0, len(self._data), chunk_size):
+            if self._fail_after is not None and offset >= self._fail_after:
+                raise requests.exceptions.ChunkedEncodingError("connection broken")
+            yield self._data[offset : offset + chunk_size]
+
+
+class FakeServer:
+    """A CDN serving data, optionally with support for ranges."""
+
+    def __init__(
+        self, data, *, ranges=True, failures=0, honour_ranges=True, probe_failures=0
+    ):
+        self.data = data
+        self.ranges = ranges
+        self.failures = failures
+        self.honour_ranges = honour_ranges
+        self.probe_failures = probe_failures
+        self.requested_ranges = []
+        self._lock = threading.Lock()
+
+    def client(self):
+        return self
+
+    def request(self, method, url, headers=None, stream=False, allow_redirects=True):
+        response_headers = {"Content-Length": str(len(self.data))}
+        if self.ranges:
+            response_headers["Accept-Ranges"] = "bytes"
+
+        if method == "HEAD":
+            if self.probe_failures:
+                self.probe_failures -= 1
+                raise craft_store.errors.NetworkError(
+                    requests.exceptions.ConnectionError("connection refused")
+                )
+            return FakeResponse(url=CDN_URL, status_code=200, headers=response_headers)
+
+        fail_after = None
+        with self._lock:
+            if self.failures:
+                self.failures -= 1
+                # Fail after sending the first chunk.
+                fail_after = 1
+
+        range_header = (headers or {}).get("Range")
+        if range_header is None or not self.honour_ranges:
+            return FakeResponse(
+                url=url,
+                status_code=200,
+                headers=response_headers,
+                data=self.data,
+                fail_after=fail_after,
+            )
+
+        start, end = (
+            int(i) for i in re.match(r"bytes=(\d+)-(\d+)", range_header).groups()
+        )
+        with self._lock:
+            self.requested_ranges.append((start, end))
+        return FakeResponse(
+            url=url,
+            status_code=206,
+            headers={"Content-Length": str(end - start + 1)},
+            data=self.data[start : end + 1],
+            fail_after=fail_after,
+        )
+
+
+@pytest.fixture
+def data():
+    return os.urandom(1024 * 1024 + 123)
+
+
+@pytest.fixture
+def download_path(tmp_path):
+    return str(tmp_path / "test.snap")
+
+
+def _sha3_384(data):
+    return hashlib.sha3_384(data).hexdigest()
+
+
+def test_download_segmented(data, download_path):
+    server = FakeServer(data)
+    downloader = Downloader(
+        segments=4, min_segment_size=64 * 1024, client_factory=server.client
+    )
+
+    digest = downloader.download(URL, download_path, sha3_384=_sha3_384(data))
+
+    assert digest == _sha3_384(data)
+    with open(download_path, "rb") as downloaded:
+        assert downloaded.read() == data
+    assert len(server.requested_ranges) == 4
+    assert not os.path.exists(download_path + ".progress")
+
+
+def test_download_small_file_single_segment(data, download_path):
+    server = FakeServer(data)
+    downloader = Downloader(segments=4, client_factory=server.client)
+
+    downloader.download(URL, download_path)
+
+    assert server.requested_ranges == [(0, len(data) - 1)]
+
+
+def test_download_without_ranges(data, download_path):
+    server = FakeServer(data, ranges=False)
+    downloader = Downloader(client_factory=server.client)
+
+    digest = downloader.download(URL, download_path)
+
+    assert digest == _sha3_384(data)
+    assert server.requested_ranges == []
+    with open(download_path, "rb") as downloaded:
+        assert downloaded.read() == data
+
+
+def test_download_resumes_partial_file(data, download_path):
+    with open(download_path, "wb") as partial:
+        partial.write(data[:1000])
+    server = FakeServer(data)
+    downloader = Downloader(client_factory=server.client)
+
+    digest = downloader.download(URL, download_path)
+
+    assert digest == _sha3_384(data)
+    assert server.requested_ranges == [(1000, len(data) - 1)]
+
+
+def test_download_resumes_from_progress(data, download_path):
+    half = len(data) // 2
+    with open(download_path, "wb") as partial:
+        partial.write(data[:100] + bytes(half - 100) + data[half : half + 200])
+    with open(download_path + ".progress", "w") as progress:
+        json.dump(
+            {
+                "url": CDN_URL,
+                "size": len(data),
+                "segments": [[0, half, 100], [half, len(data), 200]],
+            },
+            progress,
+        )
+    server = FakeServer(data)
+    downloader = Downloader(client_factory=server.client)
+
+    digest = downloader.download(URL, download_path)
+
+    assert digest == _sha3_384(data)
+    assert sorted(server.requested_ranges) == [
+        (100, half - 1),
+        (half + 200, len(data) - 1),
+    ]
+
+
+def test_download_retries_segments(data, download_path, mocker):
+    mocker.patch("time.sleep")
+    server = FakeServer(data, failures=2)
+    downloader = Downloader(
+        segments=2, min_segment_size=64 * 1024, client_factory=server.client
+    )
+
+    digest = downloader.download(URL, download_path)
+
+    assert digest == _sha3_384(data)
+    # Retries only request what is missing.
+    assert len(server.requested_ranges) == 4
+    assert sorted(server.requested_ranges)[1][0] == 64 * 1024
+
+
+def test_download_retries_exhausted(data, download_path, mocker):
+    mocker.patch("time.sleep")
+    server = FakeServer(data, failures=10)
+    downloader = Downloader(max_retries=3, client_factory=server.client)
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        downloader.download(URL, download_path)
+
+    # Progress is kept to resume later on.
+    with open(download_path + ".progress") as progress:
+        assert json.load(progress)["segments"] == [[0, len(data), 3 * 64 * 1024]]
+
+
+def test_download_sha_mismatch(data, download_path):
+    server = FakeServer(data)
+    downloader = Downloader(client_factory=server.client)
+
+    with pytest.raises(errors.SHAMismatchError):
+        downloader.download(URL, download_path, sha3_384="bad-sha")
+
+    assert not os.path.exists(download_path)
+
+
+def test_download_restarts_when_ranges_ignored(data, download_path):
+    with open(download_path, "wb") as partial:
+        partial.write(b"stale data")
+    with open(download_path + ".progress", "w") as progress:
+        json.dump(
+            {"url": CDN_URL, "size": len(data), "segments": [[0, len(data), 10]]},
+            progress,
+        )
+    server = FakeServer(data, honour_ranges=False)
+    downloader = Downloader(client_factory=server.client)
+
+    digest = downloader.download(URL, download_path)
+
+    assert digest == _sha3_384(data)
+    with open(download_path, "rb") as downloaded:
+        assert downloaded.read() == data
+    assert not os.path.exists(download_path + ".progress")
+
+
+def test_download_retries_probe(data, download_path, mocker):
+    mocker.patch("time.sleep")
+    server = FakeServer(data, probe_failures=2)
+    downloader = Downloader(client_factory=server.client)
+
+    digest = downloader.download(URL, download_path)
+
+    assert digest == _sha3_384(data)
+    assert server.requested_ranges == [(0, len(data) - 1)]
@@ -20,11 +20,13 @@ import pytest
 
 from snapcraft_legacy.storeapi.metrics import (
     MetricResults,
+    MetricsColumns,
     MetricsFilter,
     MetricsNames,
     MetricsResults,
     MetricsStatus,
     Series,
+    get_date_ranges,
 )
 
 
@@ -480,3 +482,88 @@ def test_metrics_metrics_invalid_metrics(metrics):
     data = {"metrics": metrics}
     with pytest.raises(ValueError, match=re.escape(f"Invalid metrics: {metrics!r}")):
         MetricsResults.unmarshal(data)
+
+
+@pytest.mark.parametrize(
+    "start,end,days,expected",
+    [
+        ("2021-01-01", "2021-01-01", 30, [("2021-01-01", "2021-01-01")]),
+        (
+            "2021-01-01",
+            "2021-01-10",
+            4,
+            [
+                ("2021-01-01", "2021-01-04"),
+                ("2021-01-05", "2021-01-08"),
+                ("2021-01-09", "2021-01-10"),
+            ],
+        ),
+    ],
+)
+def test_get_date_ranges(start, end, days, expected):
+    assert get_date_ranges(start, end, days=days) == expected
+
+
+def test_get_date_ranges_invalid():
+    with pytest.raises(ValueError):
+        get_date_ranges("2021-01-02", "2021-01-01", days=1)
+
+
+def test_metrics_columns():
+    columns = MetricsColumns()
+    columns.extend(
+        snap_name="test-snap",
+        results=MetricResults(
+            status=MetricsStatus["OK"],
+            snap_id="test-snap-id",
+            metric_name="installed_base_by_version",
+            buckets=["2021-01-01", "2021-01-02"],
+            series=[
+                Series(name="1.0", values=[1, None]),
+                Series(name="2.0", values=[3, 4]),
+            ],
+        ),
+    )
+    other = MetricsColumns()
+    other.extend(
+        snap_name="other-snap",
+        results=MetricResults(
+            status=MetricsStatus["OK"],
+            snap_id="other-snap-id",
+            metric_name="daily_device_change",
+            buckets=["2021-01-01"],
+            series=[Series(name="new", values=[5])],
+        ),
+    )
+    columns.merge(other)
+
+    assert len(columns) == 5
+    assert list(columns.rows()) == [
+        ("test-snap", "installed_base_by_version", "1.0", "2021-01-01", 1),
+        ("test-snap", "installed_base_by_version", "1.0", "2021-01-02", None),
+        ("test-snap", "installed_base_by_version", "2.0", "2021-01-01", 3),
+        ("test-snap", "installed_base_by_version", "2.0", "2021-01-02", 4),
+        ("other-snap", "daily_device_change", "new", "2021-01-01", 5),
+    ]
+
+
+@pytest.mark.parametrize("values", [[1], [1, 2, 3]])
+def test_metrics_columns_series_length_mismatch(values):
+    columns = MetricsColumns()
+
+    with pytest.raises(ValueError):
+        columns.extend(
+            snap_name="test-snap",
+            results=MetricResults(
+                status=MetricsStatus["OK"],
+                snap_id="test-snap-id",
+                metric_name="installed_base_by_version",
+                buckets=["2021-01-01", "2021-01-02"],
+                series=[
+                    Series(name="1.0", values=[1, 2]),
+                    Series(name="2.0", values=values),
+                ],
+            ),
+        )
+
+    assert len(columns) == 0
@@ -0,0 +1,98 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import craft_store
+import pytest
+
+from snapcraft_legacy.storeapi import (
+    SharedHTTPClient,
+    get_session,
+    get_session_stats,
+    share_session,
+)
+from snapcraft_legacy.storeapi._session import reset_session
+
+
+@pytest.fixture(autouse=True)
+def session():
+    reset_session()
+    yield
+    reset_session()
+
+
+def test_session_is_shared():
+    client_1 = SharedHTTPClient(user_agent="test-1")
+    client_2 = SharedHTTPClient(user_agent="test-2")
+
+    assert client_1._session is get_session()
+    assert client_2._session is get_session()
+    assert client_1.user_agent == "test-1"
+
+
+def test_share_session():
+    store_client = craft_store.StoreClient(
+        base_url="https://dashboard.example.com",
+        storage_base_url="https://storage.example.com",
+        endpoints=craft_store.endpoints.SNAP_STORE,
+        application_name="snapcraft",
+        user_agent="test-agent",
+        environment_auth="SNAPCRAFT_STORE_CREDENTIALS",
+        ephemeral=True,
+    )
+
+    assert share_session(store_client) is store_client
+    assert isinstance(store_client.http_client, SharedHTTPClient)
+    assert store_client.http_client._session is get_session()
+    assert store_client.http_client.user_agent == "test-agent"
+
+
+def test_session_defaults():
+    adapter = get_session().get_adapter("https://example.com")
+
+    assert adapter._pool_maxsize == 10
+    assert adapter._timeout == 60.0
+    assert adapter.max_retries.status_forcelist == [500, 502, 503, 504]
+
+
+def test_session_from_environment(monkeypatch):
+    monkeypatch.setenv("SNAPCRAFT_STORE_POOL_SIZE", "32")
+    monkeypatch.setenv("SNAPCRAFT_STORE_TIMEOUT", "5")
+    monkeypatch.setenv("CRAFT_STORE_RETRIES", "2")
+
+    adapter = get_session().get_adapter("https://example.com")
+
+    assert adapter._pool_maxsize == 32
+    assert adapter._timeout == 5.0
+    assert adapter.max_retries.total == 2
+
+
+def test_session_invalid_environment(monkeypatch):
+    monkeypatch.setenv("SNAPCRAFT_STORE_POOL_SIZE", "many")
+
+    adapter = get_session().get_adapter("https://example.com")
+
+    assert adapter._pool_maxsize == 10
+
+
+def test_session_stats():
+    assert get_session_stats() == {"requests": 0, "connections": 0}
+
+    adapter = get_session().get_adapter("https://example.com")
+    pool = adapter.poolmanager.connection_from_url("https://example.com")
+    pool.num_requests = 5
+    pool.num_connections = 1
+
+    assert get_session_stats() == {"requests": 5, "connections": 1}
@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import errno
 import os
 import pathlib
 import re
@@ -23,7 +24,7 @@ from unittest import mock
 
 import pytest
 import testtools
-from testtools.matchers import Equals
+from testtools.matchers import Equals, NotEquals
 
 from snapcraft_legacy import file_utils
 from snapcraft_legacy.internal import common, errors
@@ -161,6 +162,80 @@ class TestLinkOrCopy(unit.TestCase):
         self.assertTrue(os.path.isfile("foo2/bar/baz/4"))
 
 
+class TestLinkOrCopyFiles(unit.TestCase):
+    def setUp(self):
+        super().setUp()
+
+        os.makedirs("foo/bar")
+        os.makedirs("qux/bar")
+        for name in ("1", "bar/2"):
+            with open(os.path.join("foo", name), "w") as f:
+                f.write(name)
+
+    def test_link_files(self):
+        file_utils.link_or_copy_files([("foo/1", "qux/1"), ("foo/bar/2", "qux/bar/2")])
+
+        self.assertThat(os.stat("qux/1").st_ino, Equals(os.stat("foo/1").st_ino))
+        self.assertThat(
+            os.stat("qux/bar/2").st_ino, Equals(os.stat("foo/bar/2").st_ino)
+        )
+
+    @mock.patch("os.link", side_effect=OSError(errno.EXDEV, "cross-device link"))
+    def test_copy_files_when_link_fails(self, mock_link):
+        file_utils.link_or_copy_files([("foo/1", "qux/1"), ("foo/bar/2", "qux/bar/2")])
+
+        self.assertThat(pathlib.Path("qux/1").read_text(), Equals("1"))
+        self.assertThat(pathlib.Path("qux/bar/2").read_text(), Equals("bar/2"))
+        self.assertThat(
+            os.stat("qux/1").st_ino,
+            NotEquals(os.stat("foo/1").st_ino),
+        )
+
+    def test_link_files_missing_source(self):
+        self.assertRaises(
+            errors.SnapcraftCopyFileNotFoundError,
+            file_utils.link_or_copy_files,
+            [("foo/missing", "qux/missing")],
+        )
+
+
+class TestCopy(unit.TestCase):
+    def setUp(self):
+        super().setUp()
+
+        with open("1", "w") as f:
+            f.write("contents")
+        os.chmod("1", 0o750)
+
+    def test_copy(self):
+        file_utils.copy("1", "2")
+
+        self.assertThat(pathlib.Path("2").read_text(), Equals("contents"))
+        self.assertThat(os.stat("2").st_mode & 0o777, Equals(0o750))
+
+    @mock.patch("fcntl.ioctl", side_effect=OSError(errno.EOPNOTSUPP, "no clone"))
+    @mock.patch("os.copy_file_range", side_effect=OSError(errno.EXDEV, "no copy"))
+    def test_copy_without_kernel_copy(self, mock_copy_file_range, mock_ioctl):
+        file_utils.copy("1", "2")
+
+        self.assertThat(pathlib.Path("2").read_text(), Equals("contents"))
+        self.assertThat(os.stat("2").st_mode & 0o777, Equals(0o750))
+
+    def test_copy_symlink(self):
+        os.symlink("1", "1-link")
+
+        file_utils.copy("1-link", "2")
+
+        self.assertThat("2", unit.LinkExists("1"))
+
+    @mock.patch("fcntl.ioctl")
+    def test_copy_clones(self, mock_ioctl):
+        file_utils.copy("1", "2")
+
+        self.assertThat(mock_ioctl.call_args[0][1], Equals(file_utils._FICLONE))
+        self.assertThat(os.stat("2").st_mode & 0o777, Equals(0o750))
+
+
 class RequiresCommandSuccessTestCase(unit.TestCase):
     @mock.patch("subprocess.check_call")
     def test_requires_command_works(self, mock_check_call):
@@ -14,10 +14,13 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import logging
 import os
 import textwrap
+from unittest import mock
 
-from testtools.matchers import FileContains, FileExists, Not
+import fixtures
+from testtools.matchers import Equals, FileContains, FileExists, Not
 
 from snapcraft_legacy.internal import mangling
 from tests.legacy import fixture_setup, unit
@@ -153,6 +156,73 @@ class ManglingPythonShebangTestCase(unit.TestCase):
             ),
         )
 
+    def test_nested_directories(self):
+        os.makedirs(os.path.join("test-dir", "usr", "bin"))
+        file_path = _create_file(
+            os.path.join("usr", "bin", "file"), "#!/usr/bin/python3"
+        )
+        mangling.rewrite_python_shebangs("test-dir")
+        self.assertThat(file_path, FileContains("#!/usr/bin/env python3"))
+
+    def test_binary_contents_after_shebang_are_kept(self):
+        file_path = _create_file("file", "")
+        with open(file_path, "wb") as f:
+            f.write(b"#!/usr/bin/python3 -E\r\n\xff\xfe\x00binary\n")
+        mangling.rewrite_python_shebangs(os.path.dirname(file_path))
+        with open(file_path, "rb") as f:
+            self.assertThat(
+                f.read(),
+                Equals(
+                    b"#!/bin/sh\n''''exec python3 -E -- \"$0\" \"$@\" # '''\r\n"
+                    b"\xff\xfe\x00binary\n"
+                ),
+            )
+
+    def test_other_files_not_rewritten(self):
+        binary_path = _create_file("binary", "")
+        with open(binary_path, "wb") as f:
+            f.write(b"\x7fELF\x00#!/usr/bin/python3\n")
+        shell_path = _create_file("shell", "#!/bin/sh\n#!/usr/bin/python3\n")
+        with open("target", "w") as f:
+            f.write("#!/usr/bin/python3")
+        os.symlink(os.path.abspath("target"), os.path.join("test-dir", "link"))
+
+        mangling.rewrite_python_shebangs("test-dir")
+
+        with open(binary_path, "rb") as f:
+            self.assertThat(f.read(), Equals(b"\x7fELF\x00#!/usr/bin/python3\n"))
+        self.assertThat(shell_path, FileContains("#!/bin/sh\n#!/usr/bin/python3\n"))
+        self.assertThat("target", FileContains("#!/usr/bin/python3"))
+
+    def test_long_first_line_not_rewritten(self):
+        contents = "#!/usr/bin/python3 " + "x" * 5000 + "\nprint()\n"
+        file_path = _create_file("file", contents)
+
+        mangling.rewrite_python_shebangs(os.path.dirname(file_path))
+
+        self.assertThat(file_path, FileContains(contents))
+
+    def test_missing_directory(self):
+        mangling.rewrite_python_shebangs("missing")
+
+    def test_unreadable_file(self):
+        file_path = _create_file("file", "#!/usr/bin/python3")
+        fake_logger = fixtures.FakeLogger(level=logging.WARNING)
+        self.useFixture(fake_logger)
+
+        with mock.patch(
+            "snapcraft_legacy.internal.mangling.open",
+            side_effect=PermissionError("denied"),
+            create=True,
+        ):
+            mangling.rewrite_python_shebangs(os.path.dirname(file_path))
+
+        self.assertThat(file_path, FileContains("#!/usr/bin/python3"))
+        self.assertThat(
+            fake_logger.output,
+            Equals(f"Unable to open {file_path} for reading: denied\n"),
+        )
+
 
 class TestClearExecstack(unit.TestCase):
     def setUp(self):
@@ -259,6 +259,7 @@ def test_following(emitter, fake_store_get_status_map, channel_map_result):
     channel_map_result.revisions.append(
         channel_map.Revision(architectures=["amd64"], revision=20, version="10")
     )
+    channel_map_result.reindex()
     fake_store_get_status_map.return_value = channel_map_result
 
     cmd = commands.StoreStatusCommand(None)
@@ -284,6 +285,7 @@ def test_following(emitter, fake_store_get_status_map, channel_map_result):
 @pytest.mark.usefixtures("memory_keyring")
 def test_no_releases(emitter, fake_store_get_status_map, channel_map_result):
     channel_map_result.channel_map = []
+    channel_map_result.reindex()
 
     cmd = commands.StoreStatusCommand(None)
 
@@ -314,6 +316,7 @@ def test_progressive(emitter, fake_store_get_status_map, channel_map_result):
     channel_map_result.revisions.append(
         channel_map.Revision(architectures=["amd64"], revision=20, version="11")
     )
+    channel_map_result.reindex()
     fake_store_get_status_map.return_value = channel_map_result
 
     cmd = commands.StoreStatusCommand(None)
@@ -356,6 +359,7 @@ def test_arch(emitter, fake_store_get_status_map, channel_map_result):
     channel_map_result.revisions.append(
         channel_map.Revision(architectures=["s390x"], revision=99, version="10")
     )
+    channel_map_result.reindex()
     fake_store_get_status_map.return_value = channel_map_result
 
     cmd = commands.StoreStatusCommand(None)
@@ -407,6 +411,7 @@ def test_multiple_arch(emitter, fake_store_get_status_map, channel_map_result):
     channel_map_result.revisions.append(
         channel_map.Revision(architectures=["arm64"], revision=99, version="10")
     )
+    channel_map_result.reindex()
     fake_store_get_status_map.return_value = channel_map_result
 
     cmd = commands.StoreStatusCommand(None)
@@ -508,6 +513,7 @@ def test_arch_and_track(emitter, fake_store_get_status_map, channel_map_result):
     channel_map_result.revisions.append(
         channel_map.Revision(architectures=["s390x"], revision=99, version="10")
     )
+    channel_map_result.reindex()
     fake_store_get_status_map.return_value = channel_map_result
 
     cmd = commands.StoreStatusCommand(None)
@@ -554,6 +560,7 @@ def test_branch(emitter, fake_store_get_status_map, channel_map_result):
             fallback="2.1/stable",
         )
     )
+    channel_map_result.reindex()
     fake_store_get_status_map.return_value = channel_map_result
 
     cmd = commands.StoreStatusCommand(None)
@@ -605,6 +612,7 @@ def test_progressive_branch(emitter, fake_store_get_status_map, channel_map_resu
             fallback="2.1/stable",
         )
     )
+    channel_map_result.reindex()
     fake_store_get_status_map.return_value = channel_map_result
 
     cmd = commands.StoreStatusCommand(None)
@@ -738,3 +746,67 @@ def test_list_revisions_no_release_information(emitter, list_revisions_result):
             1       2016-09-27T18:38:43Z  amd64     2.0.2"""
         )
     )
+
+
+@pytest.mark.usefixtures("memory_keyring", "fake_store_list_revisions")
+def test_list_revisions_paginated(emitter, mocker):
+    mocker.patch("snapcraft.commands.status._REVISIONS_PAGE_SIZE", 2)
+    cmd = commands.StoreListRevisionsCommand(None)
+
+    cmd.run(argparse.Namespace(snap_name="test-snap", arch=None))
+
+    emitter.assert_messages(
+        [
+            dedent(
+                """\
+                Rev.    Uploaded              Arches    Version    Channels
+                2       2016-09-27T19:23:40Z  i386      2.0.1      -"""
+            ),
+            "1       2016-09-27T18:38:43Z  amd64     2.0.2      latest/edge*,latest/stable*",
+        ]
+    )
+
+
+@pytest.mark.usefixtures("memory_keyring", "fake_store_list_revisions")
+def test_list_revisions_historic_channels(emitter, list_revisions_result):
+    list_revisions_result.releases = Releases.unmarshal(
+        {
+            "revisions": [],
+            "releases": [
+                {
+                    "architecture": architecture,
+                    "branch": None,
+                    "channel": channel,
+                    "expiration-date": None,
+                    "revision": revision,
+                    "risk": "stable",
+                    "track": "latest",
+                    "when": "2020-02-12T17:51:40.891996Z",
+                }
+                for architecture, channel, revision in [
+                    ("amd64", "latest/stable", 1),
+                    ("amd64", "latest/candidate", 1),
+                    ("i386", "latest/edge", 2),
+                    ("amd64", "latest/edge", 1),
+                    ("i386", "latest/stable", 2),
+                    ("i386", "latest/edge", None),
+                    ("i386", "latest/edge", 2),
+                    ("amd64", "latest/candidate", 2),
+                    ("i386", "latest/beta", 2),
+                ]
+            ],
+        }
+    ).releases
+
+    cmd = commands.StoreListRevisionsCommand(None)
+
+    cmd.run(argparse.Namespace(snap_name="test-snap", arch=None))
+
+    emitter.assert_message(
+        dedent(
+            """\
+            Rev.    Uploaded              Arches    Version    Channels
+            2       2016-09-27T19:23:40Z  i386      2.0.1      latest/beta*,latest/candidate,latest/edge*,latest/stable*
+            1       2016-09-27T18:38:43Z  amd64     2.0.2      latest/candidate*,latest/edge*,latest/stable*"""
+        )
+    )
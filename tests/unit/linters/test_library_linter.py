@@ -318,15 +318,24 @@ def test_ld_config_cache(fake_process):
     }
 
 
-def test_find_deb_package(mocker, fake_process):
+@pytest.fixture
+def fake_dpkg_db(tmp_path, mocker):
+    """Point the dpkg database to an empty administrative directory."""
+    admin_dir = tmp_path / "dpkg"
+    (admin_dir / "info").mkdir(parents=True)
+    (admin_dir / "status").touch()
+    mocker.patch("snapcraft_legacy.internal.repo.dpkg_db._ADMIN_DIR", admin_dir)
+    return admin_dir
+
+
+def test_find_deb_package(mocker, fake_dpkg_db):
     """Sarching a system package that includes a library file"""
     mocker.patch(
         "snapcraft.linters.library_linter.LibraryLinter._generate_ld_config_cache"
     )
 
-    fake_process.register_subprocess(
-        ["dpkg", "-S", "/usr/lib/x86_64-linux-gnu/libcurl.so.4"],
-        stdout=b"libcurl4:amd64: /usr/lib/x86_64-linux-gnu/libcurl.so.4",
+    (fake_dpkg_db / "info" / "libcurl4:amd64.list").write_text(
+        "/.\n/usr/lib/x86_64-linux-gnu/libcurl.so.4\n"
     )
 
     linter = LibraryLinter(name="library", snap_metadata=Mock(), lint=None)
@@ -346,18 +355,12 @@ def test_find_deb_package(mocker, fake_process):
     assert result == "libcurl4"
 
 
-def test_find_deb_package_no_available(mocker, fake_process):
+def test_find_deb_package_no_available(mocker, fake_dpkg_db):
     """Sarching a system package that includes a library file but not found"""
     mocker.patch(
         "snapcraft.linters.library_linter.LibraryLinter._generate_ld_config_cache"
     )
 
-    fake_process.register_subprocess(
-        ["dpkg", "-S", "/usr/lib/x86_64-linux-gnu/libcurl.so.4"],
-        stdout=b"dpkg-query: no path found matching pattern /usr/lib/x86_64-linux-gnu/libcurl.so.4",
-        returncode=1,
-    )
-
     linter = LibraryLinter(name="library", snap_metadata=Mock(), lint=None)
     linter._ld_config_cache = {
         "libcurl.so.4": Path("/lib/x86_64-linux-gnu/libcurl.so.4"),
@@ -39,6 +39,187 @@ def test_parse_rosdep_resolve_dependencies():
     assert True
 
 
+def test_resolve_dependencies(fake_process, tmp_path):
+    fake_process.register_subprocess(
+        ["rosdep", "resolve", "python3-yaml", "rclcpp", "--rosdistro", "humble"],
+        stdout=(
+            b"#ROSDEP[python3-yaml]\n#apt\npython3-yaml\n"
+            b"#ROSDEP[rclcpp]\n#apt\nros-humble-rclcpp\n#pip\nfoo"
+        ),
+    )
+
+    resolved = _ros.resolve_dependencies(
+        ["rclcpp", "python3-yaml"],
+        ros_distro="humble",
+        base="core22",
+        target_arch="amd64",
+        cache_dir=tmp_path,
+    )
+
+    assert resolved == {
+        "python3-yaml": {"apt": {"python3-yaml"}},
+        "rclcpp": {"apt": {"ros-humble-rclcpp"}, "pip": {"foo"}},
+    }
+    assert len(fake_process.calls) == 1
+
+    # Resolved dependencies are cached.
+    assert _ros.resolve_dependencies(
+        ["rclcpp"],
+        ros_distro="humble",
+        base="core22",
+        target_arch="amd64",
+        cache_dir=tmp_path,
+    ) == {"rclcpp": {"apt": {"ros-humble-rclcpp"}, "pip": {"foo"}}}
+    assert len(fake_process.calls) == 1
+
+
+def test_resolve_dependencies_partially_cached(fake_process, tmp_path):
+    fake_process.register_subprocess(
+        ["rosdep", "resolve", "rclcpp", "--rosdistro", "humble"],
+        stdout=b"#apt\nros-humble-rclcpp",
+    )
+    fake_process.register_subprocess(
+        ["rosdep", "resolve", "python3-yaml", "--rosdistro", "humble"],
+        stdout=b"#apt\npython3-yaml",
+    )
+    _ros.resolve_dependencies(
+        ["rclcpp"],
+        ros_distro="humble",
+        base="core22",
+        target_arch="amd64",
+        cache_dir=tmp_path,
+    )
+
+    resolved = _ros.resolve_dependencies(
+        ["rclcpp", "python3-yaml"],
+        ros_distro="humble",
+        base="core22",
+        target_arch="amd64",
+        cache_dir=tmp_path,
+    )
+
+    assert resolved == {
+        "python3-yaml": {"apt": {"python3-yaml"}},
+        "rclcpp": {"apt": {"ros-humble-rclcpp"}},
+    }
+    assert [call[2] for call in fake_process.calls] == ["rclcpp", "python3-yaml"]
+
+
+def test_resolve_dependencies_cached_by_arch(fake_process, tmp_path):
+    fake_process.register_subprocess(
+        ["rosdep", "resolve", "rclcpp", "--rosdistro", "humble"],
+        stdout=b"#apt\nros-humble-rclcpp",
+        occurrences=2,
+    )
+
+    for target_arch in ["amd64", "arm64"]:
+        _ros.resolve_dependencies(
+            ["rclcpp"],
+            ros_distro="humble",
+            base="core22",
+            target_arch=target_arch,
+            cache_dir=tmp_path,
+        )
+
+    assert len(fake_process.calls) == 2
+
+
+def test_resolve_dependencies_error(fake_process, tmp_path):
+    fake_process.register_subprocess(
+        ["rosdep", "resolve", "bar", "foo", "--rosdistro", "humble"],
+        stdout=b"#ROSDEP[bar]\n#apt\nbar\n#ROSDEP[foo]\n"
+        b"ERROR: no rosdep rule for 'foo'",
+        returncode=1,
+    )
+
+    with pytest.raises(_ros.RosdepError):
+        _ros.resolve_dependencies(
+            ["foo", "bar"],
+            ros_distro="humble",
+            base="core22",
+            target_arch="amd64",
+            cache_dir=tmp_path,
+        )
+
+    assert not list(tmp_path.rglob("*.json"))
+
+
+@pytest.mark.parametrize(
+    "stdout",
+    [
+        b"#ROSDEP[bar]\n#apt\nbar",
+        b"#ROSDEP[bar]\n#apt\nbar\n#ROSDEP[baz]\n#apt\nbaz",
+        b"#ROSDEP[bar]\n#apt\nbar\n#ROSDEP[bar]\n#apt\nbar",
+    ],
+)
+def test_resolve_dependencies_unexpected_keys(fake_process, tmp_path, stdout):
+    fake_process.register_subprocess(
+        ["rosdep", "resolve", "bar", "foo", "--rosdistro", "humble"],
+        stdout=stdout,
+    )
+
+    with pytest.raises(_ros.RosdepUnexpectedResultError):
+        _ros.resolve_dependencies(
+            ["foo", "bar"],
+            ros_distro="humble",
+            base="core22",
+            target_arch="amd64",
+            cache_dir=tmp_path,
+        )
+
+    assert not list(tmp_path.rglob("*.json"))
+
+
+_APT_DEPENDS = [
+    "apt",
+    "depends",
+    "--recurse",
+    "--no-recommends",
+    "--no-suggests",
+    "--no-conflicts",
+    "--no-breaks",
+    "--no-replaces",
+    "--no-enhances",
+]
+
+
+def test_get_installed_dependencies(fake_process, tmp_path):
+    installed_packages_path = tmp_path / "installed_packages.txt"
+    installed_packages_path.write_text("foo\nbar\n")
+    fake_process.register_subprocess(
+        [*_APT_DEPENDS, "bar", "foo"],
+        stdout=b"bar\n  Depends: libbar\nlibbar\nfoo\n  Depends: libfoo\nlibfoo\n",
+    )
+
+    assert _ros.get_installed_dependencies(str(installed_packages_path)) == {
+        "bar",
+        "foo",
+        "libbar",
+        "libfoo",
+    }
+    assert len(fake_process.calls) == 1
+
+
+def test_get_installed_dependencies_error(fake_process, tmp_path):
+    installed_packages_path = tmp_path / "installed_packages.txt"
+    installed_packages_path.write_text("foo\nbar\n")
+    fake_process.register_subprocess(
+        [*_APT_DEPENDS, "bar", "foo"], stdout=b"E: No packages found", returncode=100
+    )
+    fake_process.register_subprocess(
+        [*_APT_DEPENDS, "bar"], stdout=b"E: No packages found", returncode=100
+    )
+    fake_process.register_subprocess(
+        [*_APT_DEPENDS, "foo"], stdout=b"foo\n  Depends: libfoo\nlibfoo\n"
+    )
+
+    assert _ros.get_installed_dependencies(str(installed_packages_path)) == {
+        "bar",
+        "foo",
+        "libfoo",
+    }
+
+
 @pytest.fixture
 def setup_method_fixture():
     def _setup_method_fixture(new_dir, properties=None):
@@ -26,7 +26,7 @@ from craft_cli import EmitterMode, emit
 from craft_parts import Action, Step, callbacks
 from craft_providers.bases.ubuntu import BuilddBaseAlias
 
-from snapcraft import errors
+from snapcraft import build_events, errors, shared_cache
 from snapcraft.elf import ElfFile
 from snapcraft.parts import lifecycle as parts_lifecycle
 from snapcraft.parts.plugins import KernelPlugin
@@ -1351,14 +1351,129 @@ def test_lifecycle_run_in_provider_default(
         allow_unstable=False,
     )
     mock_prepare_instance.assert_called_with(
-        instance=mock_instance, host_project_path=tmp_path, bind_ssh=False
+        instance=mock_instance,
+        host_project_path=tmp_path,
+        bind_ssh=False,
+        shared_cache_dir=None,
     )
     mock_instance.execute_run.assert_called_once_with(
-        expected_command, check=True, cwd=Path("/root/project")
+        expected_command,
+        check=True,
+        cwd=Path("/root/project"),
+        env={
+            "SNAPCRAFT_EVENTS_FILE": (
+                "/root/project/.snapcraft/events-test-instance-name.jsonl"
+            )
+        },
+        stdout=ANY,
+        stderr=ANY,
     )
     mock_capture_logs_from_instance.assert_called_once()
 
 
+def test_lifecycle_run_in_provider_events(
+    emitter,
+    mock_get_instance_name,
+    mock_instance,
+    mock_provider,
+    mocker,
+    snapcraft_yaml,
+    tmp_path,
+):
+    """Verify events streamed from the instance are reported."""
+    mocker.patch("snapcraft.parts.lifecycle.providers.get_base_configuration")
+    mocker.patch("snapcraft.parts.lifecycle.providers.capture_logs_from_instance")
+    mocker.patch("snapcraft.parts.lifecycle.providers.ensure_provider_is_available")
+    mocker.patch("snapcraft.parts.lifecycle.providers.prepare_instance")
+    events_path = tmp_path / ".snapcraft" / "events-test-instance-name.jsonl"
+
+    def _execute_run(*args, **kwargs):
+        events_path.write_text(
+            '{"event": "step-finished", "part": "p1", "step": "pull", '
+            '"duration": 1.0}\n'
+        )
+
+    mock_instance.execute_run.side_effect = _execute_run
+
+    project = Project.unmarshal(snapcraft_yaml(base="core22"))
+    parts_lifecycle._run_in_provider(
+        project=project,
+        command_name="test",
+        parsed_args=argparse.Namespace(
+            use_lxd=False,
+            debug=False,
+            bind_ssh=False,
+            http_proxy=None,
+            https_proxy=None,
+        ),
+    )
+
+    emitter.assert_debug("  pull p1: 1.0s")
+    assert not events_path.parent.exists()
+
+
+def test_lifecycle_emit_build_event(emitter):
+    """Verify events are shown while the build runs in the instance."""
+    parts_lifecycle._emit_build_event(
+        build_events.ProgressEvent(event="step-started", part="p1", step="pull")
+    )
+    parts_lifecycle._emit_build_event(
+        build_events.ProgressEvent(
+            event="step-finished", part="p1", step="pull", duration=1.0
+        )
+    )
+    parts_lifecycle._emit_build_event(
+        build_events.ProgressEvent(event="log", level="INFO", message="hello")
+    )
+
+    emitter.assert_progress("Running pull for p1")
+    emitter.assert_debug("Ran pull for p1 in 1.0s")
+    emitter.assert_debug("hello")
+
+
+def test_lifecycle_run_in_provider_shared_cache(
+    mock_get_instance_name,
+    mock_instance,
+    mock_provider,
+    mocker,
+    monkeypatch,
+    snapcraft_yaml,
+    tmp_path,
+):
+    """Verify the shared cache is pruned and mounted in the instance."""
+    monkeypatch.setenv("SNAPCRAFT_SHARED_CACHE", "1")
+    monkeypatch.setenv("SNAPCRAFT_SHARED_CACHE_MAX_SIZE", "10")
+    mocker.patch("snapcraft.parts.lifecycle.providers.get_base_configuration")
+    mocker.patch("snapcraft.parts.lifecycle.providers.capture_logs_from_instance")
+    mocker.patch("snapcraft.parts.lifecycle.providers.ensure_provider_is_available")
+    mock_prepare_instance = mocker.patch(
+        "snapcraft.parts.lifecycle.providers.prepare_instance"
+    )
+    mock_evict = mocker.patch("snapcraft.shared_cache.evict")
+    shared_cache_dir = shared_cache.get_host_cache_dir()
+
+    project = Project.unmarshal(snapcraft_yaml(base="core22"))
+    parts_lifecycle._run_in_provider(
+        project=project,
+        command_name="test",
+        parsed_args=argparse.Namespace(
+            use_lxd=False,
+            debug=False,
+            bind_ssh=False,
+            http_proxy=None,
+            https_proxy=None,
+        ),
+    )
+
+    mock_evict.assert_called_once_with(shared_cache_dir, 10 * 1024 * 1024)
+    mock_prepare_instance.assert_called_with(
+        instance=mock_instance,
+        host_project_path=tmp_path,
+        bind_ssh=False,
+        shared_cache_dir=shared_cache_dir,
+    )
+
+
 @pytest.mark.parametrize(
     "emit_mode,verbosity",
     [
@@ -1474,10 +1589,20 @@ def test_lifecycle_run_in_provider_all_options(
         allow_unstable=False,
     )
     mock_prepare_instance.assert_called_with(
-        instance=mock_instance, host_project_path=tmp_path, bind_ssh=True
+        instance=mock_instance,
+        host_project_path=tmp_path,
+        bind_ssh=True,
+        shared_cache_dir=None,
     )
     mock_instance.execute_run.assert_called_once_with(
-        expected_command, check=True, cwd=Path("/root/project")
+        expected_command,
+        check=True,
+        cwd=Path("/root/project"),
+        env={
+            "SNAPCRAFT_EVENTS_FILE": (
+                "/root/project/.snapcraft/events-test-instance-name.jsonl"
+            )
+        },
     )
     mock_capture_logs_from_instance.assert_called_once()
 
@@ -1528,7 +1653,14 @@ def test_lifecycle_run_in_provider_try(
     mock_instance.assert_has_calls(
         [
             call.mount(host_source=tmp_path / "prime", target=Path("/root/prime")),
-            call.execute_run(expected_command, check=True, cwd=Path("/root/project")),
+            call.execute_run(
+                expected_command,
+                check=True,
+                cwd=Path("/root/project"),
+                env={"SNAPCRAFT_EVENTS_FILE": ANY},
+                stdout=ANY,
+                stderr=ANY,
+            ),
         ],
         any_order=False,
     )
@@ -20,7 +20,7 @@ from unittest.mock import ANY, call
 import craft_parts
 import pytest
 
-from snapcraft import errors
+from snapcraft import build_events, errors
 from snapcraft.parts import PartsLifecycle
 
 
@@ -368,3 +368,86 @@ def test_parts_lifecycle_run_with_all_architecture(mocker, parts_data, new_dir):
             confinement="strict",
         )
     ]
+
+
+def test_parts_lifecycle_run_shared_cache(mocker, parts_data, new_dir, monkeypatch):
+    monkeypatch.setenv("SNAPCRAFT_MANAGED_MODE", "1")
+    monkeypatch.setenv("SNAPCRAFT_SHARED_CACHE", "1")
+    shared_cache_dir = Path(new_dir, "shared")
+    mocker.patch(
+        "snapcraft.parts.parts.get_managed_environment_shared_cache_path",
+        return_value=shared_cache_dir,
+    )
+    lcm_spy = mocker.spy(craft_parts, "LifecycleManager")
+    mock_lock = mocker.patch("snapcraft.shared_cache.lock")
+
+    lifecycle = PartsLifecycle(
+        parts_data,
+        work_dir=new_dir,
+        assets_dir=new_dir,
+        base="core22",
+        project_base="core22",
+        confinement="strict",
+        parallel_build_count=8,
+        part_names=[],
+        package_repositories=[],
+        adopt_info=None,
+        project_name="test-project",
+        parse_info={},
+        project_vars={"version": "1", "grade": "stable"},
+        track_stage_packages=True,
+        target_arch="amd64",
+    )
+    lifecycle.run("build")
+
+    assert lcm_spy.call_args.kwargs["cache_dir"] == str(shared_cache_dir)
+    # only the pull step is locked
+    assert mock_lock.mock_calls == [
+        call(shared_cache_dir, shared=True),
+        call().__enter__(),
+        call().__exit__(None, None, None),
+    ]
+
+
+def test_parts_lifecycle_run_events(mocker, parts_data, new_dir, monkeypatch):
+    events_path = Path(new_dir, "events.jsonl")
+    monkeypatch.setenv("SNAPCRAFT_EVENTS_FILE", str(events_path))
+    mocker.patch("snapcraft.build_events.get_received_bytes", side_effect=[1000, 1500])
+
+    lifecycle = PartsLifecycle(
+        parts_data,
+        work_dir=new_dir,
+        assets_dir=new_dir,
+        base="core22",
+        project_base="core22",
+        confinement="strict",
+        parallel_build_count=8,
+        part_names=[],
+        package_repositories=[],
+        adopt_info=None,
+        project_name="test-project",
+        parse_info={},
+        project_vars={"version": "1", "grade": "stable"},
+        track_stage_packages=True,
+        target_arch="amd64",
+    )
+    lifecycle.run("build")
+
+    monitor = build_events.EventMonitor(events_path)
+    monitor._read()
+    steps = [
+        (event.event, event.part, event.step)
+        for event in monitor.events
+        if event.event != build_events.LOG
+    ]
+    assert steps == [
+        ("step-started", "p1", "pull"),
+        ("step-finished", "p1", "pull"),
+        ("step-started", "p1", "build"),
+        ("step-finished", "p1", "build"),
+    ]
+    finished = [
+        event for event in monitor.events if event.event == build_events.STEP_FINISHED
+    ]
+    assert all(event.duration is not None for event in finished)
+    assert [event.bytes_fetched for event in finished] == [500, None]
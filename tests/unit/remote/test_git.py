@@ -294,6 +294,86 @@ def test_is_clean_error(new_dir, mocker):
     )
 
 
+def test_commit_merge(new_dir):
+    """Commit with a second parent."""
+    Path("other").mkdir()
+    other_repo = GitRepo(Path("other"))
+    (other_repo.path / "other-file").touch()
+    other_repo.add_all()
+    other_commit = other_repo.commit()
+    Path("repo").mkdir()
+    repo = GitRepo(Path("repo"))
+    (repo.path / "test-file").touch()
+    repo.add_all()
+    first_commit = repo.commit()
+    repo.fetch_head(Path("other"))
+
+    commit = repo.commit(merge=other_commit)
+
+    parent_ids = pygit2.Repository("repo")[commit].parent_ids
+    assert [str(parent_id) for parent_id in parent_ids] == [
+        first_commit,
+        other_commit,
+    ]
+
+
+def test_fetch_head(new_dir):
+    """Fetch the HEAD and tags of a repository on disk."""
+    Path("source").mkdir()
+    source = GitRepo(Path("source"))
+    (source.path / "test-file").touch()
+    source.add_all()
+    commit = source.commit()
+    pygit2.Repository("source").references.create("refs/tags/1.0", commit)
+    Path("repo").mkdir()
+    repo = GitRepo(Path("repo"))
+
+    assert repo.fetch_head(Path("source")) == commit
+    assert str(pygit2.Repository("repo").revparse_single("1.0").id) == commit
+    assert not repo.has_commit(commit)
+
+
+def test_fetch_head_unborn(new_dir):
+    """Nothing is fetched from a repository without commits."""
+    Path("source").mkdir()
+    GitRepo(Path("source"))
+    Path("repo").mkdir()
+
+    assert GitRepo(Path("repo")).fetch_head(Path("source")) is None
+
+
+def test_fetch_head_error(new_dir):
+    """Raise an error if the HEAD of a repository cannot be fetched."""
+    Path("repo").mkdir()
+
+    with pytest.raises(GitError):
+        GitRepo(Path("repo")).fetch_head(Path("not-a-repo"))
+
+
+def test_fast_forward(new_dir):
+    """Move HEAD to a descendant commit, but not to unrelated commits."""
+    Path("source").mkdir()
+    source = GitRepo(Path("source"))
+    (source.path / "test-file").touch()
+    source.add_all()
+    first_commit = source.commit()
+    (source.path / "test-file").write_text("changed")
+    source.add_all()
+    second_commit = source.commit()
+    Path("repo").mkdir()
+    repo = GitRepo(Path("repo"))
+    repo.fetch_head(Path("source"))
+    (repo.path / "test-file").write_text("changed")
+
+    assert repo.fast_forward(first_commit)
+    assert repo.has_commit(first_commit)
+    assert repo.fast_forward(second_commit)
+    assert repo.has_commit(first_commit)
+    assert repo.has_commit(second_commit)
+    assert repo.is_clean()
+    assert not repo.fast_forward(first_commit)
+
+
 def test_push_url(new_dir):
     """Push the default ref (HEAD) to a remote branch."""
     # create a local repo and make a commit
@@ -439,6 +519,33 @@ def test_push_tags(new_dir):
     assert blob.name == "test-file"
 
 
+def test_push_url_force(new_dir):
+    """Force push a ref that is not a fast-forward of the remote branch."""
+    remote_url = f"file://{str(Path('remote-repo').absolute())}"
+    Path("remote-repo").mkdir()
+    remote = pygit2.init_repository(Path("remote-repo"), True)
+    # push a first history
+    Path("local-repo-1").mkdir()
+    repo_1 = GitRepo(Path("local-repo-1"))
+    (repo_1.path / "test-file-1").touch()
+    repo_1.add_all()
+    repo_1.commit()
+    repo_1.push_url(remote_url=remote_url, remote_branch="test-branch")
+    # create an unrelated history
+    Path("local-repo-2").mkdir()
+    repo_2 = GitRepo(Path("local-repo-2"))
+    (repo_2.path / "test-file-2").touch()
+    repo_2.add_all()
+    commit = repo_2.commit()
+
+    with pytest.raises(GitError):
+        repo_2.push_url(remote_url=remote_url, remote_branch="test-branch")
+
+    repo_2.push_url(remote_url=remote_url, remote_branch="test-branch", force=True)
+
+    assert str(remote.revparse_single("test-branch").id) == commit
+
+
 def test_push_url_refspec_unknown_ref(new_dir):
     """Raise an error for an unknown refspec."""
     repo = GitRepo(new_dir)
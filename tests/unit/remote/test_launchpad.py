@@ -14,14 +14,18 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
+import gzip
+import io
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional
 from unittest.mock import ANY, MagicMock, Mock, call, patch
 
 import pytest
+import requests
 
-from snapcraft.remote import LaunchpadClient, errors
+from snapcraft.remote import LaunchpadClient, errors, monitor_builds
 
 
 class FakeLaunchpadObject:
@@ -445,15 +449,172 @@ def test_monitor_build(mock_download_file, mock_login_with, new_dir, launchpad_c
     launchpad_client.start_build()
     launchpad_client.monitor_build(interval=0)
 
-    assert mock_download_file.mock_calls == [
-        call(url="url_for/snap_file_i386.snap", dst="snap_file_i386.snap"),
-        call(
-            url="url_for/build_log_file_1", dst="test-project_i386.2.txt", gunzip=True
-        ),
-        call(url="url_for/snap_file_amd64.snap", dst="snap_file_amd64.snap"),
-        call(url="url_for/build_log_file_2", dst="test-project_amd64.txt", gunzip=True),
-        call(url="url_for/snap_file_amd64.snap", dst="snap_file_amd64.snap"),
+    # downloads run concurrently
+    assert mock_download_file.call_count == 5
+    mock_download_file.assert_has_calls(
+        [
+            call(url="url_for/snap_file_i386.snap", dst="snap_file_i386.snap"),
+            call(
+                url="url_for/build_log_file_1",
+                dst="test-project_i386.2.txt",
+                gunzip=True,
+            ),
+            call(url="url_for/snap_file_amd64.snap", dst="snap_file_amd64.snap"),
+            call(
+                url="url_for/build_log_file_2",
+                dst="test-project_amd64.txt",
+                gunzip=True,
+            ),
+            call(url="url_for/snap_file_amd64.snap", dst="snap_file_amd64.snap"),
+        ],
+        any_order=True,
+    )
+
+
+@patch("snapcraft.remote.LaunchpadClient._download_file")
+def test_monitor_build_download_while_building(
+    mock_download_file, mock_login_with, new_dir, launchpad_client, mocker
+):
+    """Artifacts of finished builds are downloaded while others still build."""
+    i386_build = SnapBuildEntryImpl(
+        arch_tag="i386",
+        buildstate="Successfully built",
+        self_link="http://build_self_link_1",
+        build_log_url="url_for/build_log_file_1",
+    )
+    amd64_build = SnapBuildEntryImpl(
+        arch_tag="amd64",
+        buildstate="Currently building",
+        self_link="http://build_self_link_2",
+        build_log_url="url_for/build_log_file_2",
+    )
+    mock_login_with._mock_return_value.rbi.builds.entries = [i386_build, amd64_build]
+    fetch_artifacts = mocker.spy(launchpad_client, "_fetch_artifacts")
+    fetched_while_building = []
+
+    async def _sleep(interval):
+        fetched_while_building.extend(
+            fetch_call.args[0]["arch_tag"] for fetch_call in fetch_artifacts.mock_calls
+        )
+        amd64_build.buildstate = "Successfully built"
+
+    mocker.patch("asyncio.sleep", side_effect=_sleep)
+
+    launchpad_client.start_build()
+    launchpad_client.monitor_build(interval=0)
+
+    assert fetched_while_building == ["i386"]
+    # each build is only fetched once
+    assert [
+        fetch_call.args[0]["arch_tag"] for fetch_call in fetch_artifacts.mock_calls
+    ] == ["i386", "amd64"]
+    assert mock_download_file.call_count == 4
+
+
+def _set_build_states(builds, *states):
+    """Returns an asyncio.sleep replacement setting the build states on each call."""
+    pending_states = list(states)
+    intervals = []
+
+    async def _sleep(interval):
+        intervals.append(interval)
+        for build, state in zip(builds, pending_states.pop(0)):
+            build.buildstate = state
+
+    return _sleep, intervals
+
+
+def test_watch_builds_events(mock_login_with, launchpad_client, mocker):
+    """Events are emitted when a build is first seen and when it changes state."""
+    builds = [
+        SnapBuildEntryImpl(arch_tag="i386", buildstate="Needs building"),
+        SnapBuildEntryImpl(arch_tag="amd64", buildstate="Needs building"),
+    ]
+    mock_login_with._mock_return_value.rbi.builds.entries = builds
+    sleep, _ = _set_build_states(
+        builds,
+        ("Currently building", "Needs building"),
+        ("Successfully built", "Failed to build"),
+    )
+    mocker.patch("asyncio.sleep", side_effect=sleep)
+    events = []
+
+    asyncio.run(launchpad_client.watch_builds(events.append))
+
+    assert [
+        (event.build_id, event.arch, event.previous_state, event.state)
+        for event in events
+    ] == [
+        ("id", "i386", None, "Needs building"),
+        ("id", "amd64", None, "Needs building"),
+        ("id", "i386", "Needs building", "Currently building"),
+        ("id", "i386", "Currently building", "Successfully built"),
+        ("id", "amd64", "Needs building", "Failed to build"),
     ]
+    assert [event.finished for event in events] == [False, False, False, True, True]
+    assert events[-1].build is builds[1]
+
+
+def test_watch_builds_backoff(mock_login_with, launchpad_client, mocker):
+    """Polls back off while no build changes state."""
+    builds = [SnapBuildEntryImpl(arch_tag="i386", buildstate="Needs building")]
+    mock_login_with._mock_return_value.rbi.builds.entries = builds
+    sleep, intervals = _set_build_states(
+        builds,
+        ("Needs building",),
+        ("Needs building",),
+        ("Needs building",),
+        ("Currently building",),
+        ("Currently building",),
+        ("Successfully built",),
+    )
+    mocker.patch("asyncio.sleep", side_effect=sleep)
+
+    asyncio.run(launchpad_client.watch_builds(Mock(), min_interval=2, max_interval=4))
+
+    # reset on the first poll and when the build started
+    assert intervals == [2, 3, 4, 4, 2, 3]
+
+
+def test_monitor_builds(mock_login_with, mocker):
+    """Builds of several remote builds are watched from one event loop."""
+    clients = [
+        LaunchpadClient(
+            app_name="test-app",
+            build_id=build_id,
+            project_name="test-project",
+            architectures=[],
+        )
+        for build_id in ["id-1", "id-2"]
+    ]
+    events = []
+
+    asyncio.run(monitor_builds(clients, events.append, min_interval=0, max_interval=0))
+
+    assert sorted((event.build_id, event.arch) for event in events) == [
+        ("id-1", "amd64"),
+        ("id-1", "arm64"),
+        ("id-1", "i386"),
+        ("id-2", "amd64"),
+        ("id-2", "arm64"),
+        ("id-2", "i386"),
+    ]
+
+
+def test_monitor_builds_timeout_error(mock_login_with, mocker):
+    """Raise an error if one of the builds times out."""
+    mocker.patch("time.time", return_value=500)
+    client = LaunchpadClient(
+        app_name="test-app",
+        build_id="id",
+        project_name="test-project",
+        architectures=[],
+        timeout=100,
+    )
+    mocker.patch("time.time", return_value=601)
+
+    with pytest.raises(errors.RemoteBuildTimeoutError):
+        asyncio.run(monitor_builds([client], Mock()))
 
 
 @patch("snapcraft.remote.LaunchpadClient._download_file")
@@ -482,6 +643,79 @@ def test_monitor_build_error(mock_log, mock_download_file, mocker, launchpad_cli
     ]
 
 
+@pytest.fixture
+def mock_requests_get(mocker):
+    """Returns a mocked `requests.get` serving `data`."""
+
+    def _get(data, *, status_code=200, content_length=None):
+        response = MagicMock()
+        response.__enter__.return_value = response
+        response.raw = io.BytesIO(data)
+        response.headers = {
+            "Content-Length": str(
+                len(data) if content_length is None else content_length
+            )
+        }
+        if status_code >= 400:
+            response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+                f"{status_code} error"
+            )
+        return mocker.patch("requests.get", return_value=response)
+
+    return _get
+
+
+def test_download_file(new_dir, launchpad_client, mock_requests_get):
+    mock_requests_get(b"snap data")
+
+    launchpad_client._download_file(url="url_for/test.snap", dst="test.snap")
+
+    assert Path("test.snap").read_bytes() == b"snap data"
+    assert not Path("test.snap.partial").exists()
+
+
+def test_download_file_gunzip(new_dir, launchpad_client, mock_requests_get):
+    mock_requests_get(gzip.compress(b"build log"))
+
+    launchpad_client._download_file(url="url_for/log", dst="log.txt", gunzip=True)
+
+    assert Path("log.txt").read_bytes() == b"build log"
+
+
+@patch("logging.Logger.error")
+def test_download_file_size_mismatch(
+    mock_log, new_dir, launchpad_client, mock_requests_get
+):
+    mock_requests_get(b"snap data", content_length=100)
+
+    launchpad_client._download_file(url="url_for/test.snap", dst="test.snap")
+
+    assert not Path("test.snap").exists()
+    assert not Path("test.snap.partial").exists()
+    assert mock_log.mock_calls == [
+        call(
+            "Error downloading %s: expected %s bytes, received %d.",
+            "url_for/test.snap",
+            "100",
+            9,
+        )
+    ]
+
+
+@patch("logging.Logger.error")
+def test_download_file_http_error(
+    mock_log, new_dir, launchpad_client, mock_requests_get
+):
+    mock_requests_get(b"not found", status_code=404)
+
+    launchpad_client._download_file(url="url_for/test.snap", dst="test.snap")
+
+    assert not Path("test.snap").exists()
+    assert mock_log.mock_calls == [
+        call("Error downloading %s: %s", "url_for/test.snap", "404 error")
+    ]
+
+
 def test_monitor_build_deadline_not_reached(mock_login_with, mocker):
     """Do not raise an error if the deadline has not been reached."""
     mocker.patch("snapcraft.remote.LaunchpadClient._download_file")
@@ -559,9 +793,24 @@ def test_push_source_tree(new_dir, mock_git_repo, launchpad_client):
                 "HEAD",
                 "access-token",
                 push_tags=True,
+                force=True,
             ),
         ]
     )
+    # the existing repository is reused
+    launchpad_client._lp.git_repositories.new_mock.assert_not_called()
+    launchpad_client._lp.git_repositories._git.lp_delete_mock.assert_not_called()
+
+
+def test_push_source_tree_new_repository(new_dir, mock_git_repo, launchpad_client):
+    launchpad_client._lp.git_repositories.getByPath_mock.return_value = None
+
+    launchpad_client.push_source_tree(Path())
+
+    launchpad_client._lp.git_repositories.new_mock.assert_called_once_with(
+        name="id", owner="/~user", target="/~user"
+    )
+    mock_git_repo.return_value.push_url.assert_called_once()
 
 
 def test_push_source_tree_error(new_dir, mock_git_repo, launchpad_client):
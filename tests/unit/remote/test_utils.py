@@ -16,6 +16,7 @@
 
 """Remote-build utility tests."""
 
+import os
 import re
 from pathlib import Path
 
@@ -28,7 +29,7 @@ from snapcraft.remote import (
     rmtree,
     validate_architectures,
 )
-from snapcraft.remote.utils import _SUPPORTED_ARCHS
+from snapcraft.remote.utils import _SUPPORTED_ARCHS, _compute_hash, _hash_file
 
 ###############################
 # validate architecture tests #
@@ -191,6 +192,119 @@ def test_get_build_id_directory_is_not_a_directory_error():
     )
 
 
+@pytest.mark.usefixtures("new_dir")
+def test_get_build_id_computed_is_unique_file_renamed():
+    """The build id should change when a file is renamed."""
+    Path("test1").write_text("Hello, World!", encoding="utf-8")
+    build_id_1 = get_build_id("test-app", "test-project", Path())
+
+    Path("test1").rename("test2")
+    build_id_2 = get_build_id("test-app", "test-project", Path())
+
+    assert build_id_1 != build_id_2
+
+
+def test_compute_hash_uses_directory(new_dir):
+    """Only files in the given directory are hashed."""
+    (new_dir / "project").mkdir()
+    (new_dir / "project/test").write_text("Hello, World!", encoding="utf-8")
+    hash_1 = _compute_hash(new_dir / "project")
+
+    Path("outside").write_text("Hello, World!", encoding="utf-8")
+    hash_2 = _compute_hash(new_dir / "project")
+
+    assert hash_1 == hash_2
+
+
+@pytest.mark.parametrize(
+    "ignored", [".git/config", "parts/part/src/file", "stage/file", "prime/file"]
+)
+def test_compute_hash_ignored_paths(new_dir, ignored):
+    """Ignored paths are not part of the hash."""
+    Path("test").write_text("Hello, World!", encoding="utf-8")
+    hash_1 = _compute_hash(new_dir)
+
+    Path(ignored).parent.mkdir(parents=True)
+    Path(ignored).write_text("ignored", encoding="utf-8")
+    hash_2 = _compute_hash(new_dir)
+
+    assert hash_1 == hash_2
+
+
+def test_compute_hash_nested_lifecycle_names(new_dir):
+    """Lifecycle directory names are only ignored at the root of the project."""
+    Path("test").write_text("Hello, World!", encoding="utf-8")
+    hash_1 = _compute_hash(new_dir)
+
+    Path("src/parts").mkdir(parents=True)
+    Path("src/parts/file").write_text("not ignored", encoding="utf-8")
+    hash_2 = _compute_hash(new_dir)
+
+    assert hash_1 != hash_2
+
+
+def test_compute_hash_large_file(new_dir, mocker):
+    """Large files are hashed like small files."""
+    mocker.patch("snapcraft.remote.utils._HASH_MMAP_MIN_SIZE", 1)
+    Path("test").write_bytes(os.urandom(1024))
+    Path("empty").touch()
+    hash_1 = _compute_hash(new_dir)
+
+    mocker.patch("snapcraft.remote.utils._HASH_MMAP_MIN_SIZE", 10**6)
+    hash_2 = _compute_hash(new_dir)
+
+    assert hash_1 == hash_2
+
+
+def test_compute_hash_cache(new_dir, tmp_path_factory, mocker):
+    """Unchanged files are not hashed again when a cache is used."""
+    cache_dir = tmp_path_factory.mktemp("cache")
+    old_time = 1_000_000_000
+    for name in ["test1", "test2"]:
+        Path(name).write_text(f"Hello, {name}!", encoding="utf-8")
+        os.utime(name, (old_time, old_time))
+    hash_file = mocker.patch("snapcraft.remote.utils._hash_file", wraps=_hash_file)
+
+    hash_1 = _compute_hash(new_dir, cache_dir=cache_dir)
+    assert hash_file.call_count == 2
+
+    hash_2 = _compute_hash(new_dir, cache_dir=cache_dir)
+    assert hash_file.call_count == 2
+    assert hash_1 == hash_2
+
+    Path("test2").write_text("Goodbye, World!", encoding="utf-8")
+    os.utime("test2", (old_time, old_time + 1))
+    hash_3 = _compute_hash(new_dir, cache_dir=cache_dir)
+    assert hash_file.call_count == 3
+    assert hash_3 != hash_1
+    assert hash_3 == _compute_hash(new_dir)
+
+
+def test_compute_hash_cache_recent_files(new_dir, tmp_path_factory, mocker):
+    """Recently modified files are not trusted from the cache."""
+    cache_dir = tmp_path_factory.mktemp("cache")
+    Path("test").write_text("Hello, World!", encoding="utf-8")
+    hash_file = mocker.patch("snapcraft.remote.utils._hash_file", wraps=_hash_file)
+
+    _compute_hash(new_dir, cache_dir=cache_dir)
+    _compute_hash(new_dir, cache_dir=cache_dir)
+
+    assert hash_file.call_count == 2
+
+
+def test_compute_hash_corrupted_cache(new_dir, tmp_path_factory):
+    """A corrupted cache is ignored."""
+    cache_dir = tmp_path_factory.mktemp("cache")
+    Path("test").write_text("Hello, World!", encoding="utf-8")
+    hash_1 = _compute_hash(new_dir, cache_dir=cache_dir)
+    for cache_file in cache_dir.iterdir():
+        cache_file.write_text("{not json", encoding="utf-8")
+
+    hash_2 = _compute_hash(new_dir, cache_dir=cache_dir)
+
+    assert hash_1 == hash_2
+
+
 ################
 # rmtree tests #
 ################
@@ -16,12 +16,15 @@
 
 """Unit tests for the worktree module."""
 
+import os
+import shutil
 from pathlib import Path
 from unittest.mock import call
 
+import pygit2
 import pytest
 
-from snapcraft.remote import WorkTree
+from snapcraft.remote import GitRepo, WorkTree
 
 
 @pytest.fixture(autouse=True)
@@ -38,19 +41,15 @@ def mock_base_directory(mocker, new_dir):
     return _mock_base_directory
 
 
-@pytest.fixture(autouse=True)
-def mock_copytree(mocker):
-    """Returns a mocked `shutil.copytree()`."""
-    return mocker.patch("snapcraft.remote.worktree.copytree")
-
-
-def test_worktree_init_clean(
-    mock_base_directory, mock_copytree, mock_git_repo, new_dir
-):
+def test_worktree_init_clean(mock_base_directory, mock_git_repo, new_dir):
     """Test initialization of a WorkTree with a clean git repository."""
     mock_git_repo.return_value.is_clean.return_value = True
 
-    worktree = WorkTree(app_name="test-app", build_id="test-id", project_dir=Path())
+    Path("project").mkdir()
+
+    worktree = WorkTree(
+        app_name="test-app", build_id="test-id", project_dir=Path("project")
+    )
     worktree.init_repo()
 
     assert isinstance(worktree, WorkTree)
@@ -63,13 +62,15 @@ def test_worktree_init_clean(
     ]
 
 
-def test_worktree_init_dirty(
-    mock_base_directory, mock_copytree, mock_git_repo, new_dir
-):
+def test_worktree_init_dirty(mock_base_directory, mock_git_repo, new_dir):
     """Test initialization of a WorkTree with a clean git repository."""
     mock_git_repo.return_value.is_clean.return_value = False
 
-    worktree = WorkTree(app_name="test-app", build_id="test-id", project_dir=Path())
+    Path("project").mkdir()
+
+    worktree = WorkTree(
+        app_name="test-app", build_id="test-id", project_dir=Path("project")
+    )
     worktree.init_repo()
 
     assert isinstance(worktree, WorkTree)
@@ -80,7 +81,7 @@ def test_worktree_init_dirty(
         call(Path().resolve() / "repo"),
         call().is_clean(),
         call().add_all(),
-        call().commit(),
+        call().commit(merge=None),
     ]
 
 
@@ -89,3 +90,165 @@ def test_worktree_repo_dir(new_dir):
     worktree = WorkTree(app_name="test-app", build_id="test-id", project_dir=Path())
 
     assert worktree.repo_dir == Path().resolve() / "repo"
+
+
+@pytest.fixture
+def project_dir(new_dir):
+    """Returns a project directory with files to sync."""
+    project = new_dir / "project"
+    (project / ".git").mkdir(parents=True)
+    (project / ".git/index").write_text("project index", encoding="utf-8")
+    (project / ".git/HEAD").write_text("ref: refs/heads/main", encoding="utf-8")
+    (project / "dir").mkdir()
+    (project / "dir/file").write_text("file", encoding="utf-8")
+    (project / "snapcraft.yaml").write_text("name: test", encoding="utf-8")
+    return project
+
+
+def _tree(path):
+    return sorted(
+        (str(file.relative_to(path)), file.read_bytes() if file.is_file() else None)
+        for file in path.glob("**/*")
+    )
+
+
+def test_worktree_init_copies_project(project_dir):
+    """The project is copied to the cached repo, except the git directory."""
+    worktree = WorkTree(
+        app_name="test-app", build_id="test-id", project_dir=project_dir
+    )
+    worktree.init_repo()
+
+    assert not (worktree.repo_dir / ".git").exists()
+    shutil.rmtree(project_dir / ".git")
+    assert _tree(worktree.repo_dir) == _tree(project_dir)
+
+
+def test_worktree_init_syncs_changes(project_dir, mocker):
+    """Only changes to the project are synced to an existing cached repo."""
+    worktree = WorkTree(
+        app_name="test-app", build_id="test-id", project_dir=project_dir
+    )
+    worktree.init_repo()
+    (worktree.repo_dir / ".git").mkdir()
+    (worktree.repo_dir / ".git/index").write_text("repo index", encoding="utf-8")
+    copy = mocker.patch("shutil.copy2", wraps=shutil.copy2)
+
+    # modified, added and removed files and directories
+    (project_dir / "snapcraft.yaml").write_text("name: changed", encoding="utf-8")
+    (project_dir / "new-dir").mkdir()
+    (project_dir / "new-dir/new-file").write_text("new", encoding="utf-8")
+    shutil.rmtree(project_dir / "dir")
+    (project_dir / "dir").write_text("now a file", encoding="utf-8")
+    worktree.init_repo()
+
+    assert sorted(call.args[1].name for call in copy.mock_calls) == [
+        "dir",
+        "new-file",
+        "snapcraft.yaml",
+    ]
+    assert (worktree.repo_dir / ".git/index").read_text() == "repo index"
+    shutil.rmtree(worktree.repo_dir / ".git")
+    shutil.rmtree(project_dir / ".git")
+    assert _tree(worktree.repo_dir) == _tree(project_dir)
+
+
+def test_worktree_init_syncs_same_size_changes(project_dir):
+    """Changes that keep the size of a file are synced."""
+    worktree = WorkTree(
+        app_name="test-app", build_id="test-id", project_dir=project_dir
+    )
+    worktree.init_repo()
+
+    (project_dir / "dir/file").write_text("FILE", encoding="utf-8")
+    stat = (project_dir / "dir/file").stat()
+    os.utime(project_dir / "dir/file", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    worktree.init_repo()
+
+    assert (worktree.repo_dir / "dir/file").read_text() == "FILE"
+
+
+def test_worktree_init_read_only_files(project_dir):
+    """Read-only files, such as git objects, can be replaced."""
+    worktree = WorkTree(
+        app_name="test-app", build_id="test-id", project_dir=project_dir
+    )
+    (project_dir / "dir/file").chmod(0o444)
+    worktree.init_repo()
+
+    (project_dir / "dir/file").chmod(0o644)
+    (project_dir / "dir/file").write_text("changed", encoding="utf-8")
+    worktree.init_repo()
+
+    assert (worktree.repo_dir / "dir/file").read_text() == "changed"
+
+
+@pytest.fixture
+def real_git_repo(mocker):
+    """Use a real GitRepo for the cached repo."""
+    mocker.patch("snapcraft.remote.worktree.GitRepo", GitRepo)
+
+
+def _commit_file(path, content):
+    path.write_text(content, encoding="utf-8")
+    repo = GitRepo(path.parent)
+    repo.add_all()
+    return repo.commit(content)
+
+
+def test_worktree_init_twice_git_project(real_git_repo, new_dir):
+    """Auto commits are stacked and the project history is kept."""
+    project_dir = new_dir / "project"
+    project_dir.mkdir()
+    first_commit = _commit_file(project_dir / "snapcraft.yaml", "name: test")
+    worktree = WorkTree(
+        app_name="test-app", build_id="test-id", project_dir=project_dir
+    )
+    worktree.init_repo()
+    repo = pygit2.Repository(worktree.repo_dir)
+    first_head = repo.head.target
+
+    assert str(first_head) == first_commit
+
+    # an uncommitted change, then a new project commit
+    (project_dir / "file").write_text("uncommitted", encoding="utf-8")
+    worktree.init_repo()
+    second_head = repo.head.target
+
+    assert repo[second_head].parent_ids == [first_head]
+    assert repo[second_head].tree["file"].data == b"uncommitted"
+
+    second_commit = _commit_file(project_dir / "snapcraft.yaml", "name: changed")
+    worktree.init_repo()
+    third_head = repo.head.target
+
+    assert [str(parent) for parent in repo[third_head].parent_ids] == [
+        str(second_head),
+        second_commit,
+    ]
+    assert repo[third_head].tree["snapcraft.yaml"].data == b"name: changed"
+
+    worktree.init_repo()
+
+    assert repo.head.target == third_head
+
+
+def test_worktree_init_twice_project_without_git(real_git_repo, new_dir):
+    """The cached git directory is kept for a project that is not a repo."""
+    project_dir = new_dir / "project"
+    project_dir.mkdir()
+    (project_dir / "snapcraft.yaml").write_text("name: test", encoding="utf-8")
+    worktree = WorkTree(
+        app_name="test-app", build_id="test-id", project_dir=project_dir
+    )
+    worktree.init_repo()
+    repo = pygit2.Repository(worktree.repo_dir)
+    first_head = repo.head.target
+
+    (project_dir / "snapcraft.yaml").write_text("name: changed", encoding="utf-8")
+    worktree.init_repo()
+    second_head = repo.head.target
+
+    assert not (project_dir / ".git").exists()
+    assert repo[second_head].parent_ids == [first_head]
+    assert repo[second_head].tree["snapcraft.yaml"].data == b"name: changed"
@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import itertools
 from typing import cast
 
 import pytest
@@ -486,3 +487,100 @@ def test_channel_map_from_list_releases_model():
 
     # Test the get_existing_architectures method.
     assert cm.get_existing_architectures() == set(["amd64"])
+
+
+def test_channel_map_reindex(mapped_channel_payload, channel_payload):
+    cm = channel_map.ChannelMap(
+        channel_map=[],
+        revisions=[],
+        snap=channel_map.Snap(name="my-snap", channels=[], tracks=[]),
+    )
+
+    with pytest.raises(ValueError):
+        cm.get_mapped_channel(
+            channel_name="latest/stable", architecture="amd64", progressive=False
+        )
+    assert cm.get_existing_architectures() == set()
+
+    cm.channel_map.append(channel_map.MappedChannel.unmarshal(mapped_channel_payload))
+    cm.revisions = [
+        channel_map.Revision(revision=2, version="2.0", architectures=["amd64"])
+    ]
+    cm.snap.channels.append(channel_map.SnapChannel.unmarshal(channel_payload))
+    cm.reindex()
+
+    assert (
+        cm.get_mapped_channel(
+            channel_name="latest/stable", architecture="amd64", progressive=False
+        )
+        == cm.channel_map[0]
+    )
+    assert cm.get_revision(2) == cm.revisions[0]
+    assert cm.get_channel_info("latest/candidate") == cm.snap.channels[0]
+    assert cm.get_existing_architectures() == {"amd64"}
+
+
+def test_channel_map_large():
+    """Test lookups over a synthetic 10k entry channel map."""
+    architectures = ["amd64", "arm64", "armhf", "i386", "ppc64el", "riscv64", "s390x"]
+    risks = ["stable", "candidate", "beta", "edge"]
+    channels = [
+        channel_map.SnapChannel(
+            name=f"track{track}/{risk}/branch{branch}",
+            track=f"track{track}",
+            risk=risk,
+            branch=f"branch{branch}",
+            fallback=None,
+        )
+        for track in range(25)
+        for risk in risks
+        for branch in range(15)
+    ]
+    mapped_channels = []
+    revisions = []
+    for revision, (snap_channel, architecture) in enumerate(
+        itertools.product(channels, architectures), start=1
+    ):
+        if revision > 10000:
+            break
+        revisions.append(
+            channel_map.Revision(
+                revision=revision, version=f"{revision}", architectures=[architecture]
+            )
+        )
+        mapped_channels.append(
+            channel_map.MappedChannel(
+                channel=snap_channel.name,
+                revision=revision,
+                architecture=architecture,
+                expiration_date=None,
+                progressive=channel_map.Progressive(
+                    paused=None,
+                    percentage=None if revision % 2 else 50.0,
+                    current_percentage=None,
+                ),
+            )
+        )
+    cm = channel_map.ChannelMap(
+        channel_map=mapped_channels,
+        revisions=revisions,
+        snap=channel_map.Snap(name="big-snap", channels=channels, tracks=[]),
+    )
+
+    assert len(cm.channel_map) == 10000
+    for mapped_channel in cm.channel_map:
+        assert (
+            cm.get_mapped_channel(
+                channel_name=mapped_channel.channel,
+                architecture=mapped_channel.architecture,
+                progressive=mapped_channel.progressive.percentage is not None,
+            )
+            is mapped_channel
+        )
+        assert cm.get_revision(mapped_channel.revision).revision == (
+            mapped_channel.revision
+        )
+        assert cm.get_channel_info(mapped_channel.channel).name == (
+            mapped_channel.channel
+        )
+    assert cm.get_existing_architectures() == set(architectures)
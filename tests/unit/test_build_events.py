@@ -0,0 +1,145 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+from pathlib import Path
+
+import pytest
+
+from snapcraft import build_events
+from snapcraft.build_events import ProgressEvent
+
+
+@pytest.fixture
+def events_path(new_dir):
+    return Path(new_dir, ".snapcraft", "events.jsonl")
+
+
+def test_event_marshal():
+    event = ProgressEvent(
+        event=build_events.STEP_FINISHED,
+        timestamp=1.0,
+        part="part1",
+        step="pull",
+        duration=2.5,
+    )
+
+    assert event.marshal() == {
+        "event": "step-finished",
+        "timestamp": 1.0,
+        "part": "part1",
+        "step": "pull",
+        "duration": 2.5,
+    }
+    assert ProgressEvent.unmarshal({**event.marshal(), "unknown": 1}) == event
+
+
+def test_get_writer_not_requested():
+    assert build_events.get_writer() is None
+
+
+def test_monitor(events_path, monkeypatch, caplog):
+    caplog.set_level(logging.DEBUG)
+    monkeypatch.setenv("SNAPCRAFT_EVENTS_FILE", str(events_path))
+    received = []
+
+    with build_events.EventMonitor(
+        events_path, callback=received.append, interval=0.01
+    ) as monitor:
+        with build_events.open_writer() as writer:
+            assert writer is not None
+            writer.write(
+                ProgressEvent(event=build_events.STEP_STARTED, part="p1", step="pull")
+            )
+            logging.getLogger("craft_parts").info("Pulling p1")
+            logging.getLogger("craft_parts").debug("not forwarded")
+
+    assert received == monitor.events
+    assert [(e.event, e.part, e.message) for e in monitor.events] == [
+        ("step-started", "p1", None),
+        ("log", None, "Pulling p1"),
+    ]
+    assert monitor.events[1].level == "INFO"
+    assert not events_path.exists()
+
+
+def test_monitor_partial_lines(events_path):
+    monitor = build_events.EventMonitor(events_path)
+    monitor.start()
+    monitor.stop()
+    events_path.write_text('{"event": "step-started", "part": "p1"}\n{"event": "st')
+
+    monitor._read()
+    assert [e.part for e in monitor.events] == ["p1"]
+
+    with events_path.open("a") as events_file:
+        events_file.write('ep-finished", "part": "p2"}\nnot json\n')
+
+    monitor._read()
+    assert [(e.event, e.part) for e in monitor.events] == [
+        ("step-started", "p1"),
+        ("step-finished", "p2"),
+    ]
+
+
+def test_get_received_bytes(mocker):
+    mocker.patch(
+        "builtins.open",
+        mocker.mock_open(
+            read_data=(
+                "Inter-|   Receive\n"
+                " face |bytes    packets\n"
+                "    lo:    1000      10    0    0\n"
+                "  eth0:     200       2    0    0\n"
+                "  eth1:      30       1    0    0\n"
+            )
+        ),
+    )
+
+    assert build_events.get_received_bytes() == 230
+
+
+def test_get_received_bytes_unavailable(mocker):
+    mocker.patch("builtins.open", side_effect=FileNotFoundError)
+
+    assert build_events.get_received_bytes() is None
+
+
+def test_get_timing_report():
+    events = [
+        ProgressEvent(event=build_events.STEP_STARTED, part="p1", step="pull"),
+        ProgressEvent(
+            event=build_events.STEP_FINISHED,
+            part="p1",
+            step="pull",
+            duration=1.25,
+            bytes_fetched=3 * 1024 * 1024,
+        ),
+        ProgressEvent(
+            event=build_events.STEP_FINISHED, part="p1", step="build", duration=2.0
+        ),
+        ProgressEvent(event=build_events.LOG, message="message"),
+    ]
+
+    assert build_events.get_timing_report(events) == [
+        "pull p1: 1.2s, 3.0 MiB fetched",
+        "build p1: 2.0s",
+        "Total: 3.2s",
+    ]
+
+
+def test_get_timing_report_empty():
+    assert build_events.get_timing_report([]) == []
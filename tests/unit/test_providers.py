@@ -14,16 +14,19 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from datetime import datetime, timedelta
 from pathlib import Path
 from unittest.mock import ANY, MagicMock, Mock, call, patch
 
 import pytest
 from craft_providers import ProviderError, bases
 from craft_providers.actions.snap_installer import Snap
-from craft_providers.lxd import LXDProvider
+from craft_providers.lxd import LXDError, LXDProvider, launcher
+from craft_providers.lxd.remotes import get_remote_image
 from craft_providers.multipass import MultipassProvider
 
 from snapcraft import providers
+from snapcraft.errors import SnapcraftError
 from snapcraft.snap_config import SnapConfig
 
 
@@ -348,6 +351,7 @@ def test_get_command_environment_passthrough(
     monkeypatch.setenv("SNAPCRAFT_BUILD_INFO", "test-build-info")
     monkeypatch.setenv("SNAPCRAFT_IMAGE_INFO", "test-image-info")
     monkeypatch.setenv("SNAPCRAFT_MAX_PARALLEL_BUILD_COUNT", "test-build-count")
+    monkeypatch.setenv("SNAPCRAFT_SHARED_CACHE", "1")
 
     # ensure other variables are not being passed
     monkeypatch.setenv("other_var", "test-other-var")
@@ -365,6 +369,7 @@ def test_get_command_environment_passthrough(
         "SNAPCRAFT_BUILD_INFO": "test-build-info",
         "SNAPCRAFT_IMAGE_INFO": "test-image-info",
         "SNAPCRAFT_MAX_PARALLEL_BUILD_COUNT": "test-build-count",
+        "SNAPCRAFT_SHARED_CACHE": "1",
     }
 
 
@@ -613,3 +618,285 @@ def test_prepare_instance(bind_ssh, mock_instance, mocker, tmp_path):
     mock_instance.push_file_io.assert_called_with(
         content=ANY, destination=Path("/root/.bashrc"), file_mode="644"
     )
+
+
+def test_prepare_instance_shared_cache(mock_instance, tmp_path):
+    providers.prepare_instance(
+        instance=mock_instance,
+        host_project_path=tmp_path,
+        bind_ssh=False,
+        shared_cache_dir=tmp_path / "cache",
+    )
+
+    mock_instance.mount.assert_has_calls(
+        [
+            call(
+                host_source=tmp_path / "cache",
+                target=Path("/root/.cache/snapcraft-shared"),
+            )
+        ]
+    )
+
+
+def test_base_instance_pool_from_environment(monkeypatch):
+    monkeypatch.setenv("SNAPCRAFT_WARM_BASES", "core20, core22")
+    monkeypatch.setenv("SNAPCRAFT_BASE_INSTANCE_MAX_COUNT", "3")
+    monkeypatch.setenv("SNAPCRAFT_BASE_INSTANCE_MAX_AGE", "7")
+
+    assert providers.BaseInstancePool.from_environment() == (
+        providers.BaseInstancePool(
+            warm_bases=("core20", "core22"),
+            max_count=3,
+            max_age=timedelta(days=7),
+        )
+    )
+
+
+def test_base_instance_pool_from_environment_default():
+    assert providers.BaseInstancePool.from_environment() == (
+        providers.BaseInstancePool()
+    )
+
+
+@pytest.mark.parametrize(
+    "env_key,value",
+    [
+        ("SNAPCRAFT_WARM_BASES", "core18,core"),
+        ("SNAPCRAFT_BASE_INSTANCE_MAX_COUNT", "many"),
+        ("SNAPCRAFT_BASE_INSTANCE_MAX_AGE", "0"),
+    ],
+)
+def test_base_instance_pool_from_environment_invalid(monkeypatch, env_key, value):
+    monkeypatch.setenv(env_key, value)
+
+    with pytest.raises(SnapcraftError):
+        providers.BaseInstancePool.from_environment()
+
+
+@pytest.fixture()
+def mock_lxd_provider():
+    provider = Mock(spec=LXDProvider)
+    provider.lxc = Mock()
+    provider.lxd_project = "snapcraft"
+    provider.lxd_remote = "local"
+    now = datetime.utcnow()
+    provider.lxc.list.return_value = [
+        {
+            "name": f"base-instance-{name}",
+            "created_at": (now - timedelta(days=age)).isoformat() + "123Z",
+        }
+        for name, age in [("old", 30), ("new", 1), ("mid", 5)]
+    ] + [{"name": "snapcraft-project", "created_at": "2020-01-01T00:00:00Z"}]
+    return provider
+
+
+def test_prune_base_instances_max_age(mock_lxd_provider):
+    providers.prune_base_instances(
+        mock_lxd_provider, providers.BaseInstancePool(max_age=timedelta(days=14))
+    )
+
+    assert mock_lxd_provider.lxc.delete.mock_calls == [
+        call(
+            instance_name="base-instance-old",
+            force=True,
+            project="snapcraft",
+            remote="local",
+        )
+    ]
+
+
+def test_prune_base_instances_max_count(mock_lxd_provider):
+    providers.prune_base_instances(
+        mock_lxd_provider, providers.BaseInstancePool(max_count=1)
+    )
+
+    assert mock_lxd_provider.lxc.delete.mock_calls == [
+        call(
+            instance_name="base-instance-mid",
+            force=True,
+            project="snapcraft",
+            remote="local",
+        ),
+        call(
+            instance_name="base-instance-old",
+            force=True,
+            project="snapcraft",
+            remote="local",
+        ),
+    ]
+
+
+def test_prune_base_instances_delete_error(mock_lxd_provider):
+    mock_lxd_provider.lxc.delete.side_effect = LXDError("in use")
+
+    providers.prune_base_instances(
+        mock_lxd_provider, providers.BaseInstancePool(max_count=1)
+    )
+
+    assert mock_lxd_provider.lxc.delete.call_count == 2
+
+
+def test_prune_base_instances_not_configured(mock_lxd_provider):
+    providers.prune_base_instances(mock_lxd_provider, providers.BaseInstancePool())
+
+    mock_lxd_provider.lxc.list.assert_not_called()
+
+
+def test_prune_base_instances_list_error(mock_lxd_provider):
+    mock_lxd_provider.lxc.list.side_effect = LXDError("unavailable")
+
+    providers.prune_base_instances(
+        mock_lxd_provider, providers.BaseInstancePool(max_count=1)
+    )
+
+    mock_lxd_provider.lxc.delete.assert_not_called()
+
+
+@pytest.fixture()
+def interactive(mocker, monkeypatch):
+    mocker.patch("sys.stdin.isatty", return_value=True)
+    monkeypatch.delenv("CI", raising=False)
+
+
+@pytest.fixture()
+def mock_lxd_instance(mocker):
+    mocker.patch("snapcraft.providers.get_remote_image")
+    _mock_lxd_instance = mocker.patch("snapcraft.providers.LXDInstance")
+    _mock_lxd_instance.return_value.exists.return_value = False
+    return _mock_lxd_instance
+
+
+@pytest.mark.usefixtures("interactive")
+def test_warm_base_instances(
+    mocker, mock_lxd_provider, mock_lxd_instance, mock_instance, tmp_path
+):
+    mock_lxd_provider.launched_environment = MagicMock()
+    mock_lxd_provider.launched_environment.return_value.__enter__.return_value = (
+        mock_instance
+    )
+    mock_get_base_configuration = mocker.patch(
+        "snapcraft.providers.get_base_configuration"
+    )
+
+    providers.warm_base_instances(
+        mock_lxd_provider,
+        providers.BaseInstancePool(warm_bases=("core22", "devel")),
+        project_path=tmp_path,
+    )
+
+    assert mock_get_base_configuration.call_args_list == [
+        call(
+            alias=bases.BuilddBaseAlias.JAMMY,
+            instance_name="snapcraft-warm-core22",
+            http_proxy=None,
+            https_proxy=None,
+        ),
+        call(
+            alias=bases.BuilddBaseAlias.DEVEL,
+            instance_name="snapcraft-warm-devel",
+            http_proxy=None,
+            https_proxy=None,
+        ),
+    ]
+    assert mock_lxd_provider.launched_environment.call_args_list == [
+        call(
+            project_name="warm",
+            project_path=tmp_path,
+            base_configuration=mock_get_base_configuration.return_value,
+            instance_name="snapcraft-warm-core22",
+            allow_unstable=False,
+        ),
+        call(
+            project_name="warm",
+            project_path=tmp_path,
+            base_configuration=mock_get_base_configuration.return_value,
+            instance_name="snapcraft-warm-devel",
+            allow_unstable=True,
+        ),
+    ]
+    assert mock_instance.delete.call_count == 2
+
+
+@pytest.mark.usefixtures("interactive")
+def test_warm_base_instances_existing(
+    mocker, mock_lxd_provider, mock_lxd_instance, tmp_path
+):
+    mocker.patch("snapcraft.providers.get_base_configuration")
+    mock_lxd_instance.return_value.exists.return_value = True
+
+    providers.warm_base_instances(
+        mock_lxd_provider,
+        providers.BaseInstancePool(warm_bases=("core22",)),
+        project_path=tmp_path,
+    )
+
+    mock_lxd_provider.launched_environment.assert_not_called()
+
+
+@pytest.mark.usefixtures("interactive")
+def test_warm_base_instances_error(
+    mocker, mock_lxd_provider, mock_lxd_instance, tmp_path
+):
+    mocker.patch("snapcraft.providers.get_base_configuration")
+    mock_lxd_provider.launched_environment = MagicMock()
+    mock_lxd_provider.launched_environment.side_effect = LXDError("failed")
+
+    providers.warm_base_instances(
+        mock_lxd_provider,
+        providers.BaseInstancePool(warm_bases=("core20", "core22")),
+        project_path=tmp_path,
+    )
+
+    assert mock_lxd_provider.launched_environment.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "isatty, ci", [(False, None), (True, "true")], ids=["no-tty", "ci"]
+)
+def test_warm_base_instances_not_interactive(
+    isatty, ci, mocker, monkeypatch, mock_lxd_provider, tmp_path
+):
+    mocker.patch("sys.stdin.isatty", return_value=isatty)
+    if ci:
+        monkeypatch.setenv("CI", ci)
+    else:
+        monkeypatch.delenv("CI", raising=False)
+
+    providers.warm_base_instances(
+        mock_lxd_provider,
+        providers.BaseInstancePool(warm_bases=("core22",)),
+        project_path=tmp_path,
+    )
+
+    mock_lxd_provider.launched_environment.assert_not_called()
+
+
+def test_get_base_instance_name():
+    """The name must match the one craft-providers launches from."""
+    base_configuration = providers.get_base_configuration(
+        alias=bases.BuilddBaseAlias.JAMMY,
+        instance_name="test-instance",
+        http_proxy=None,
+        https_proxy=None,
+    )
+    image = get_remote_image(base_configuration)
+
+    assert providers._get_base_instance_name(
+        base_configuration
+    ) == launcher._formulate_base_instance_name(
+        image_name=image.image_name,
+        image_remote=image.remote_name,
+        compatibility_tag=base_configuration.compatibility_tag,
+    )
+
+
+def test_warm_base_instances_multipass(tmp_path):
+    provider = Mock(spec=MultipassProvider)
+
+    providers.warm_base_instances(
+        provider,
+        providers.BaseInstancePool(warm_bases=("core22",)),
+        project_path=tmp_path,
+    )
+
+    provider.launched_environment.assert_not_called()
@@ -0,0 +1,120 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import fcntl
+import os
+from pathlib import Path
+
+import pytest
+
+from snapcraft import errors, shared_cache
+
+
+@pytest.mark.parametrize(
+    "value,expected", [(None, False), ("0", False), ("1", True), ("yes", True)]
+)
+def test_is_enabled(monkeypatch, value, expected):
+    if value is not None:
+        monkeypatch.setenv("SNAPCRAFT_SHARED_CACHE", value)
+
+    assert shared_cache.is_enabled() is expected
+
+
+def test_get_max_size(monkeypatch):
+    monkeypatch.setenv("SNAPCRAFT_SHARED_CACHE_MAX_SIZE", "2")
+
+    assert shared_cache.get_max_size() == 2 * 1024 * 1024
+
+
+def test_get_max_size_default():
+    assert shared_cache.get_max_size() is None
+
+
+@pytest.mark.parametrize("value", ["big", "-1"])
+def test_get_max_size_invalid(monkeypatch, value):
+    monkeypatch.setenv("SNAPCRAFT_SHARED_CACHE_MAX_SIZE", value)
+
+    with pytest.raises(errors.SnapcraftError):
+        shared_cache.get_max_size()
+
+
+def test_get_host_cache_dir():
+    cache_dir = shared_cache.get_host_cache_dir()
+
+    assert cache_dir.is_dir()
+    assert cache_dir.parts[-2:] == ("snapcraft", "shared")
+
+
+def test_lock(new_dir):
+    cache_dir = Path(new_dir, "cache")
+
+    with shared_cache.lock(cache_dir):
+        with open(cache_dir / ".lock") as lock_file:
+            with pytest.raises(BlockingIOError):
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    with open(cache_dir / ".lock") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def test_lock_shared(new_dir):
+    cache_dir = Path(new_dir, "cache")
+
+    with shared_cache.lock(cache_dir, shared=True):
+        with open(cache_dir / ".lock") as lock_file:
+            # other builds can pull
+            fcntl.flock(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        with open(cache_dir / ".lock") as lock_file:
+            # but the cache cannot be evicted
+            with pytest.raises(BlockingIOError):
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def _create_entry(path: Path, size: int, last_used: int) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    os.utime(path, (last_used, last_used))
+    return path
+
+
+def test_evict(new_dir):
+    cache_dir = Path(new_dir)
+    old = _create_entry(cache_dir / "download" / "old.deb", 100, 1000)
+    new = _create_entry(cache_dir / "download" / "new.deb", 100, 3000)
+    file = _create_entry(cache_dir / "files" / "abc123", 100, 2000)
+    apt_state = _create_entry(cache_dir / "stage-packages" / "lists", 100, 0)
+
+    assert shared_cache.evict(cache_dir, 250) == 100
+
+    assert not old.exists()
+    assert new.exists()
+    assert file.exists()
+    assert apt_state.exists()
+
+    assert shared_cache.evict(cache_dir, 0) == 200
+
+    assert not new.exists()
+    assert not file.exists()
+    assert apt_state.exists()
+
+
+def test_evict_under_limit(new_dir):
+    cache_dir = Path(new_dir)
+    entry = _create_entry(cache_dir / "download" / "package.deb", 100, 1000)
+
+    assert shared_cache.evict(cache_dir, 100) == 0
+    assert entry.exists()